@@ -0,0 +1,182 @@
+# Benchmark for fb01_cc2sysex: feeds synthetic controller streams through the same routing as the live loop
+# (handle_message -> cc_to_sysex / cc_2nd_sysex -> coalescer) without any MIDI hardware.
+#
+# python fb01_bench.py                  run every scenario and compare against the saved baseline
+# python fb01_bench.py --save           run and store the results as the new baseline
+# python fb01_bench.py sweep multi      run only some scenarios
+# python fb01_bench.py --mode both      also run the raw-bytes path (--raw) and show what it saves per message
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from mido import Message
+
+import fb01_cc2sysex as fb01
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fb01_bench_baseline.json")
+
+class FakeInput: # In-memory input port: hands out a prepared message list like a port's iter_pending()
+    def __init__(self, messages):
+        self.Messages = messages
+
+    def __iter__(self):
+        return iter(self.Messages)
+
+class Sink: # In-memory output port
+    def __init__(self):
+        self.Count = 0
+        self.Bytes = 0
+
+    def send(self, msg):
+        self.Count += 1
+        self.Bytes += len(msg.bytes())
+
+    def close(self):
+        pass
+
+# Scenarios: each returns the message list for one run, always built from the same seed
+
+def mapped_ccs():
+    return [control for control in range(128) if fb01.cc_map[control] is not None]
+
+def scenario_sweep(rng): # Every mapped CC swept 0 -> 127 -> 0 on channel 0
+    values = list(range(128)) + list(range(127, -1, -1))
+    return [Message('control_change', control=control, value=value) for control in mapped_ccs() for value in values]
+
+def scenario_operators(rng): # Random moves on the operator CCs only, as when editing envelopes
+    controls = [control for control in mapped_ccs() if fb01.cc_map[control].Param.Address >= 0x50]
+    return [Message('control_change', control=rng.choice(controls), value=rng.randrange(128)) for n in range(20000)]
+
+def scenario_multi(rng): # Multi/DT2 CCs, each of which produces two sysex messages
+    return [Message('control_change', control=rng.choice((39, 55, 74, 90)), value=rng.randrange(128))
+            for n in range(20000)]
+
+def scenario_mixed(rng): # Notes and pass-through CCs interleaved with parameter changes
+    controls = mapped_ccs()
+    thru = [control for control in range(128) if fb01.cc_passthru[control]]
+    messages = []
+    for n in range(20000):
+        kind = rng.randrange(4)
+        if kind == 0:
+            messages.append(Message('note_on', note=rng.randrange(36, 96), velocity=rng.randrange(1, 128)))
+        elif kind == 1:
+            messages.append(Message('note_off', note=rng.randrange(36, 96)))
+        elif kind == 2:
+            messages.append(Message('control_change', control=rng.choice(thru), value=rng.randrange(128)))
+        else:
+            messages.append(Message('control_change', control=rng.choice(controls), value=rng.randrange(128)))
+    return messages
+
+def scenario_multitimbral(rng): # All 8 instruments receiving parameter changes and notes at once
+    controls = [control for control in mapped_ccs() if control not in (112, 113)]
+    messages = []
+    for n in range(20000):
+        channel = rng.randrange(8)
+        if rng.randrange(3) == 0:
+            messages.append(Message('note_on', channel=channel, note=rng.randrange(36, 96), velocity=100))
+        else:
+            messages.append(Message('control_change', channel=channel, control=rng.choice(controls),
+                                    value=rng.randrange(128)))
+    return messages
+
+scenarios = {'sweep': scenario_sweep, 'operators': scenario_operators, 'multi': scenario_multi,
+             'mixed': scenario_mixed, 'multitimbral': scenario_multitimbral}
+
+def percentile(values, percent):
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+def run(name, window, raw):
+    fb01.reset_state()
+    fb01.use_raw_messages(raw)
+    messages = scenarios[name](random.Random(1))
+    if raw: # What python-rtmidi hands the input callback
+        messages = [fb01.RawMessage(bytes(msg.bytes())) for msg in messages]
+    sink = Sink()
+    device = fb01.Devices[0]
+    device.attach(sink, window)
+    fb01.Log = fb01.Logger(fb01.LOG_OFF)
+    fb01.History = fb01.EditHistory() # On by default in the live script
+
+    latencies = []
+    clock = time.perf_counter
+    handle_message = fb01.handle_message
+    coalescer = device.Coalescer
+    start = clock()
+    for msg in FakeInput(messages):
+        received = clock()
+        handle_message(msg)
+        if coalescer.Deadline is not None and coalescer.timeout() == 0:
+            coalescer.flush()
+        latencies.append(clock() - received)
+    coalescer.flush()
+    elapsed = clock() - start
+
+    latencies.sort()
+    return {'messages': len(messages), 'sent': sink.Count, 'bytes': sink.Bytes,
+            'msgs_per_sec': round(len(messages) / elapsed),
+            'p50_us': round(percentile(latencies, 50) * 1e6, 2),
+            'p99_us': round(percentile(latencies, 99) * 1e6, 2),
+            'max_us': round(latencies[-1] * 1e6, 2)}
+
+def best_of(name, window, raw, repeat): # Fastest of a few runs, the others are mostly noise from the OS
+    results = [run(name, window, raw) for n in range(repeat)]
+    return max(results, key=lambda result: result['msgs_per_sec'])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the CC to sysex translation with synthetic input.")
+    parser.add_argument('scenario', nargs='*', help="scenarios to run: " + ", ".join(scenarios) + " (default: all)")
+    parser.add_argument('--coalesce', type=float, default=0, metavar='MS',
+                        help="sysex coalescing window in milliseconds (default 0, every message is sent)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per scenario, the best one counts (default 3)")
+    parser.add_argument('--mode', choices=('mido', 'raw', 'both'), default='mido',
+                        help="mido messages (default), raw bytes as with --raw, or both")
+    parser.add_argument('--save', action='store_true', help="store the results as the new baseline")
+    parser.add_argument('--baseline', default=BASELINE, help="baseline file (default fb01_bench_baseline.json)")
+    parser.add_argument('--tolerance', type=float, default=20,
+                        help="percent of throughput that may be lost against the baseline (default 20)")
+    args = parser.parse_args()
+    for name in args.scenario:
+        if name not in scenarios:
+            parser.error(f"unknown scenario {name!r}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    results = {}
+    regressions = []
+    print(f"{'scenario':<18} {'msgs':>7} {'sent':>7} {'msgs/s':>10} {'p50 us':>8} {'p99 us':>8} {'max us':>9}  baseline")
+    modes = {'mido': (False,), 'raw': (True,), 'both': (False, True)}[args.mode]
+    for name in args.scenario or scenarios:
+        for raw in modes:
+            key = name + " raw" if raw else name
+            result = results[key] = best_of(name, args.coalesce / 1000, raw, args.repeat)
+            line = (f"{key:<18} {result['messages']:>7} {result['sent']:>7} {result['msgs_per_sec']:>10}"
+                    f" {result['p50_us']:>8} {result['p99_us']:>8} {result['max_us']:>9}")
+            previous = baseline.get(key)
+            if previous is not None:
+                change = (result['msgs_per_sec'] / previous['msgs_per_sec'] - 1) * 100
+                line += f"  {change:+.1f}%"
+                if change < -args.tolerance:
+                    regressions.append(key)
+                    line += " REGRESSION"
+                if previous['sent'] != result['sent']:
+                    line += f" (sent {previous['sent']} before)"
+            print(line)
+        if len(modes) == 2:
+            saved = 1e6 / results[name]['msgs_per_sec'] - 1e6 / results[name + " raw"]['msgs_per_sec']
+            print(f"{'':<18} raw saves {saved:.2f} us per message")
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+    elif regressions:
+        print("Slower than the baseline: " + ", ".join(regressions))
+        sys.exit(1)
@@ -1,1703 +1,2323 @@
-# Yamaha FB-01 CC to SysEx conversion script
-# Version 1.0
-# by Brandon Blume, Nov 13, 2024
-# shine62 _AT= gmail )DOT{ calm
-#
-# This script reads MIDI message from an input port and passes them through to an output port. If CC
-# messages are sent through that correspond to the (currently hardcoded) mapped CCs for setting voice,
-# instrument, config, or system data parameters on the FB-01 it will convert the values of those
-# intercepted CC messages into the proper sysex messages.
-#
-# CURRENT STATE:
-#
-# This script is currently still unfinished. Its basic functions work (please report any bugs if you run 
-# into any!) but further plans include sending an initial dump request for the currently selected voice
-# on the FB-01 so that you can modify any voice you currently have already. Right now it will start with a
-# default blank slate "INIT" voice but there isn't currently any implementation to let the FB-01 know that 
-# either. Which means any modifications to parameters will be done in context with the "INIT" voice and you 
-# could see parameters reset to zero (or whatever I set the defaults to) that share sysex messages with 
-# other parameters that you modify. Meaning you'll have to set those again. Implementing a voice dump 
-# request from the FB-01 means that there would need to be two MIDI input ports; one for the MIDI controller 
-# and one to act as the return port for dumps from the FB-01.
-#
-# I also want to dedicate a MIDI CC# to manually triggering a dump from the FB-01 at any time and another
-# CC# for sending the default blank slate "INIT" instrument to the FB-01 to guarantee that everything is
-# in sync. There's no checking for any of this currently.
-#
-# The current hardcoded map for CC numbers to FB-01 parameter change sysex messages are listed below.
-# CC's that the FB-01 already understands are marked with square brackets "[]". They are not converted and
-# are passed "thru" without any additional processing directly to the FB-01. Notes and other MIDI messages 
-# are also sent "thru" unchanged.
-#
-# CC #     |        FB-01 Parameter Sysex Message          |     Value range
-# CC   0      System: Memory Protect (toggle)                  0 / 127 (0=off, 127=on)
-# CC  [1]     [Mod Wheel]                                      0 ~ 127
-# CC  [2]     [Breath]                                         0 ~ 127
-# CC   3      Config: Combine Mode (toggle)                    0 / 127 (0=off, 127=on)
-# CC  [4]     [Foot Controller]                                0 ~ 127
-# CC  [5]     [Portamento Time]                                0 ~ 127
-# CC   6      Config: Name (Char #1)                           0 ~ 127
-# CC  [7]     [Channel Volume]                                 0 ~ 127
-# CC   8      Config: Name (Char #2)                           0 ~ 127
-# CC   9      Config: Name (Char #3)                           0 ~ 127
-# CC [10]     [Pan]                                            0 / 63 / 127 (0=L, 64=LR, 127=R)
-# CC  11      Config: Name (Char #4)                           0 ~ 127
-# CC  12      Config: Name (Char #5)                           0 ~ 127
-# CC  13      Config: Name (Char #6)                           0 ~ 127
-# CC  14      Config: Name (Char #7)                           0 ~ 127
-# CC  15      Config: Name (Char #8)                           0 ~ 127
-# CC  16      Voice: Load LFO                                  0 / 127 (0=off, 127=on)
-# CC  17      Voice: AMD                                       0 ~ 127
-# CC  18      Voice: LFO Sync to Note On (toggle)              0 / 127 (0=off, 127=on)
-# CC  19      Voice: PMD                                       0 ~ 127
-# CC  20      Voice: Toggle Operator 1                         0 / 127 (0=off, 127=on)
-# CC  21      Voice: Toggle Operator 2                         0 / 127 (0=off, 127=on)
-# CC  22      Voice: Toggle Operator 3                         0 / 127 (0=off, 127=on)
-# CC  23      Voice: Toggle Operator 4                         0 / 127 (0=off, 127=on)
-# CC  24      Voice: Set Algorithm                             0 ~ 7
-#                                                                     0 = 4 -> 3 -> 2 -> 1
-#                                                                     1 = (4+3) -> 2 -> 1
-#                                                                     2 = (4+(3 -> 2)) -> 1
-#                                                                     3 = ((4 -> 3) +2) ->1
-#                                                                     4 = (4 -> 3) + (2 -> 1)
-#                                                                     5 = 4 -> (3+2+1)
-#                                                                     6 = (4 -> 3)+2+1
-#                                                                     7 = 4+3+2+1
-# CC  25      Voice: Feedback Level                            0 ~ 7
-# CC  26      Voice: PMS                                       0 ~ 7
-# CC  27      Voice: AMS                                       0 ~ 3
-# CC  28      Voice: Set LFO Waveform                          0 ~ 3 (0=Saw, 1=Sqr, 2=Tri, 3=Noise)
-# CC  29      Voice: PMD Assign                                0 ~ 4 (0=None, 1=Aftertouch, 2=Mod Wheel, 3=Breath, 4=Foot Controller)
-# CC  30      Voice: Transpose                                 -128 ~ +127 (signed, technically the values can be 0 ~ 255 but since CC values onyl go to 127 this script is programmed to interpret CC values 0 ~ 24 as "-24 ~ -1" and 25 ~ 49 as "0 ~ +24")
-# CC  31      Voice: Pitch Bend Range                          0 ~ 12
-# CC  32      Op1: TL (Total Level)                            0 ~ 127
-# CC  33      Op1: Key Height/TL scaling type (-/+)            0 / 127 (0=off, 127=on)
-# CC  34      Op1: Key Height/TL scaling type (Lin/Exp)        0 / 127 (0=off, 127=on)
-# CC  35      Op1: Key Velocity/TL sensitivity                 0 ~ 7
-# CC  36      Op1: Key Height/Envelope Lvl scaling dpth        0 ~ 15
-# CC  37      Op1: TL Fine Adjust                              0 ~ 15
-# CC  38      Op1: Detune 1 (Coarse)                           0 ~ 7 (0 & 4=0, 1~3 = -3 ~ -1, 5~7 = +1 ~ +3)
-# CC  39      Op1: Freq Multiplier/Detune 2 (Fine)             0 ~ 63 (see Multi/DT2 Tuple table below for CC value/freq multiple reference)
-# CC  40      Op1: Key Height/Envelope Rt scaling dpth         0 ~ 3
-# CC  41      Op1: AR (Attack Rate)                            0 ~ 31
-# CC  42      Op1: Toggle AM (Amplitude Modulation)            0 / 127 (0=off, 127=on)
-# CC  43      Op1: Key Velocity/Attack Rate sensitivity        0 ~ 3
-# CC  44      Op1: D1R (Decay 1 Rate)                          0 ~ 31
-# CC  45      Op1: D2R (Decay 2 Rate)                          0 ~ 31
-# CC  46      Op1: SL (Sustain Level)                          0 ~ 15
-# CC  47      Op1: RR (Release Rate)                           0 ~ 15
-# CC  48      Op2: TL (Total Level)                            0 ~ 127
-# CC  49      Op2: Key Height/TL scaling type (-/+)            0 / 127 (0=off, 127=on)
-# CC  50      Op2: Key Height/TL scaling type (Lin/Exp)        0 / 127 (0=off, 127=on)
-# CC  51      Op2: Key Velocity/TL sensitivity                 0 ~ 7
-# CC  52      Op2: Key Height/Envelope Lvl scaling dpth        0 ~ 15
-# CC  53      Op2: TL Fine Adjust                              0 ~ 15
-# CC  54      Op2: Detune 1 (Coarse)                           0 ~ 7
-# CC  55      Op2: Freq Multi/Detune 2 (Fine)                  0 ~ 63 (see Multi/DT2 Tuple table below for CC value/freq multiple reference)
-# CC  56      Op2: Key Height/Envelope Rt scaling dpth         0 ~ 15
-# CC  57      Op2: AR (Attack Rate)                            0 ~ 31
-# CC  58      Op2: Toggle AM (Amplitude Modulation)            0 / 127 (0=off, 127=on)
-# CC  59      Op2: Key Velocity/Attack Rate sensitivity        0 ~ 3
-# CC  60      Op2: D1R (Decay 1 Rate)                          0 ~ 31
-# CC  61      Op2: D2R (Decay 2 Rate)                          0 ~ 31
-# CC  62      Op2: SL (Sustain Level)                          0 ~ 15
-# CC  63      Op2: RR (Release Rate)                           0 ~ 15
-# CC [64]     [Damper Pedal on/off (Sustain)]                  0 / 127 (0=off, 127=on)
-# CC [65]     [Portamento on/off              ]                0 / 127 (0=off, 127=on)
-# CC [66]     [Sostenuto on/off]                               0 / 127 (0=off, 127=on)
-# CC  67      Op3: TL (Total Level)                            0 ~ 127
-# CC  68      Op3: Key Height/TL scaling type (-/+)            0 / 127 (0=off, 127=on)
-# CC  69      Op3: Key Height/TL scaling type (Lin/Exp)        0 / 127 (0=off, 127=on)
-# CC  70      Op3: Key Velocity/TL sensitivity                 0 ~ 7
-# CC  71      Op3: Key Height/Envelope Lvl scaling dpth        0 ~ 15
-# CC  72      Op3: TL Fine Adjust                              0 ~ 15
-# CC  73      Op3: Detune 1 (Coarse)                           0 ~ 7
-# CC  74      Op3: Freq Multiplier/Detune 2 (Fine)             0 ~ 63
-# CC  75      Op3: Key Height/Envelope Rt scaling dpth         0 ~ 15
-# CC  76      Op3: AR (Attack Rate)                            0 ~ 31
-# CC  77      Op3: Toggle AM (Amplitude Modulation)            0 / 127 (0=off, 127=on)
-# CC  78      Op3: Key Velocity/Attack Rate sensitivity        0 ~ 3
-# CC  79      Op3: D1R (Decay 1 Rate)                          0 ~ 31
-# CC  80      Op3: D2R (Decay 2 Rate)                          0 ~ 31
-# CC  81      Op3: SL (Sustain Level)                          0 ~ 15
-# CC  82      Op3: RR (Release Rate)                           0 ~ 15
-# CC  83      Op4: TL (Total Level)                            0 ~ 127
-# CC  84      Op4: Key Height/TL scaling type (-/+)            0 / 127 (0=off, 127=on)
-# CC  85      Op4: Key Height/TL scaling type (Lin/Exp)        0 / 127 (0=off, 127=on)
-# CC  86      Op4: Key Velocity/TL sensitivity                 0 ~ 7
-# CC  87      Op4: Key Height/Envelope Lvl scaling dpth        0 ~ 15
-# CC  88      Op4: TL Fine Adjust                              0 ~ 15
-# CC  89      Op4: Detune 1 (Coarse)                           0 ~ 7
-# CC  90      Op4: Freq Multiplier/Detune 2 (Fine)             0 ~ 63
-# CC  91      Op4: Key Height/Envelope Rt scaling dpth         0 ~ 15
-# CC  92      Op4: AR (Attack Rate)                            0 ~ 31
-# CC  93      Op4: Toggle AM (Amplitude Modulation)            0 / 127 (0=off, 127=on)
-# CC  94      Op4: Key Velocity/Attack Rate sensitivity        0 ~ 3
-# CC  95      Op4: D1R (Decay 1 Rate)                          0 ~ 31
-# CC  96      Op4: D2R (Decay 2 Rate)                          0 ~ 31
-# CC  97      Op4: SL (Sustain Level)                          0 ~ 15
-# CC  98      Op4: RR (Release Rate)                           0 ~ 15
-# CC  99      Inst: # of notes                                 0 ~ 8
-# CC 100      Inst: MIDI Channel                               0 ~ 15
-# CC 101      Inst: KC Limit/L                                 0 ~ 127
-# CC 102      Inst: KC Limit/H                                 0 ~ 127
-# CC 103      Inst: Voice Bank                                 0 ~ 6
-# CC 104      Inst: Voice #                                    0 ~ 47
-# CC 105      Inst: Detune                                     0 ~ 127
-# CC 106      Inst: Octave Transpose                           0 ~ 4 (-2 ~ +2)
-# CC 107      Inst: Output Level                               0 ~ 127
-# CC 108      Inst: Pan (L, L+R, R)                            0 ~ 127 (0=L, 64=LR, 127=R)
-# CC 109      Inst: LFO Enable                                 0 / 127 (0=off, 127=on)
-# CC 110      Inst: Pitch Bend Range                           0 ~ 12
-# CC 111      System: Config Number                            0 ~ 19
-# CC 112      System: Channel Number                           0 ~ 15
-# CC 113      System: Master Detune                            0 ~ 127 (0~63 = 0~63, 64~127 = -64 ~ -1)
-# CC 114          {currently unused}
-# CC 115      Voice: LFO Speed                                 Relative Binary Offset (64 = 0, 64 + x = +x, 64 -x = -x)
-# CC 116      Voice: Name (Char #1)                            0 ~ 127
-# CC 117      Voice: Name (Char #2)                            0 ~ 127
-# CC 118      Voice: Name (Char #3)                            0 ~ 127
-# CC 119      Voice: Name (Char #4)                            0 ~ 127
-# CC 120      Voice: Name (Char #5)                            0 ~ 127
-# CC 121      Voice: Name (Char #6)                            0 ~ 127
-# CC 122      Voice: Name (Char #7)                            0 ~ 127
-# CC[123]     [All Notes Off]                                  0 / 127 (0=off, 127=on)
-# CC 124      Voice: User Code                                 Relative Binary Offset (64 = 0, 64 + x = +x, 64 -x = -x)
-# CC 125      System: Master Output Level                      0 ~ 127
-# CC[126]     [Mono Mode on/Poly off/All Notes Off]            1
-# CC[127]     [Poly Mode on/Mono off/All Notes Off]            0
-
-from colorama import init, Fore, Back, Style
-init()
-import mido
-from mido import Message
-import time
-
-# Tuple lookup table to determine linear consecutive frequencies for Multi/DT2 combined sysex messages (16 x 4)
-freq_table = [
-# Multi/DT2 Bytes   CC Value   Resulting Freq Multiple
-    (0x00, 0x00),    #  0        x0.50
-    (0x00, 0x04),    #  1        x0.71
-    (0x00, 0x08),    #  2        x0.78
-    (0x00, 0x0C),    #  3        x0.87
-    (0x01, 0x00),    #  4        x1.00
-    (0x01, 0x04),    #  5        x1.41
-    (0x01, 0x08),    #  6        x1.57
-    (0x01, 0x0C),    #  7        x1.73
-    (0x02, 0x00),    #  8        x2.00
-    (0x02, 0x04),    #  9        x2.82
-    (0x03, 0x00),    # 10        x3.00
-    (0x02, 0x08),    # 11        x3.14
-    (0x02, 0x0C),    # 12        x3.46
-    (0x04, 0x00),    # 13        x4.00
-    (0x03, 0x04),    # 14        x4.24
-    (0x03, 0x08),    # 15        x4.71
-    (0x05, 0x00),    # 16        x5.00
-    (0x03, 0x0C),    # 17        x5.19
-    (0x04, 0x04),    # 18        x5.65
-    (0x06, 0x00),    # 19        x6.00
-    (0x04, 0x08),    # 20        x6.28
-    (0x04, 0x0C),    # 21        x6.92
-    (0x07, 0x00),    # 22        x7.00
-    (0x05, 0x04),    # 23        x7.07
-    (0x05, 0x08),    # 24        x7.85
-    (0x08, 0x00),    # 25        x8.00
-    (0x06, 0x04),    # 26        x8.48
-    (0x05, 0x0C),    # 27        x8.65
-    (0x09, 0x00),    # 28        x9.00
-    (0x06, 0x08),    # 29        x9.42
-    (0x07, 0x04),    # 30        x9.89
-    (0x0A, 0x00),    # 31        x10.00
-    (0x06, 0x0C),    # 32        x10.38
-    (0x07, 0x08),    # 33        x10.99
-    (0x0B, 0x00),    # 34        x11.00
-    (0x08, 0x04),    # 35        x11.30
-    (0x0C, 0x00),    # 36        x12.00
-    (0x07, 0x0C),    # 37        x12.11
-    (0x08, 0x08),    # 38        x12.56
-    (0x09, 0x04),    # 39        x12.72
-    (0x0D, 0x00),    # 40        x13.00
-    (0x08, 0x0C),    # 41        x13.84
-    (0x0E, 0x00),    # 42        x14.00
-    (0x0A, 0x04),    # 43        x14.10
-    (0x09, 0x08),    # 44        x14.13
-    (0x0F, 0x00),    # 45        x15.00
-    (0x0B, 0x04),    # 46        x15.55
-    (0x09, 0x0C),    # 47        x15.57
-    (0x0A, 0x08),    # 48        x15.70
-    (0x0C, 0x04),    # 49        x16.96
-    (0x0B, 0x08),    # 50        x17.27
-    (0x0A, 0x0C),    # 51        x17.30
-    (0x0D, 0x04),    # 52        x18.37
-    (0x0C, 0x08),    # 53        x18.84
-    (0x0B, 0x0C),    # 54        x19.03
-    (0x0E, 0x04),    # 55        x19.78
-    (0x0D, 0x08),    # 56        x20.41
-    (0x0C, 0x0C),    # 57        x20.76
-    (0x0F, 0x04),    # 58        x21.20
-    (0x0E, 0x08),    # 59        x21.98
-    (0x0D, 0x0C),    # 60        x22.49
-    (0x0F, 0x08),    # 61        x23.55
-    (0x0E, 0x0C),    # 62        x24.22
-    (0x0F, 0x0C),    # 63        x25.95
-]
-
-input_ports = mido.get_input_names()
-output_ports = mido.get_output_names()
-
-print(f"\nMIDI Inputs:\n{input_ports}\n")
-input_port = mido.open_input(input_ports[int(input("Select Controller Input: "))])
-
-print(f"\nMIDI Outputs:\n{output_ports}\n")
-output_port = mido.open_output(output_ports[int(input("Select Output: "))])
-
-#print(f"\nInputs:\n{input_ports}\n")
-#return_port = mido.open_input(input_ports[int(input("Select FB-01 Return: "))])
-
-#print(f"\nController Input Port: {input_port}\nOutput Port: {output_port}\nFB-01 Return Port: {return_port}\n")
-
-class SystemData: # System Functions
-    def __init__(self):
-        self.Channel = 0
-        self.MemProtect = 0
-        self.ConfigNum = 0 # 0 ~ 19
-        self.Detune = 0 # Master detune (not documented), 0 ~ 63 = 0 ~ +63, 64 ~ 127 = -64 ~ -1
-        self.TL = 127
-    
-        self.Config = self.ConfigData()
-        
-    class ConfigData: # Configuration block
-        def __init__(self):
-            namestring = "InitConf"
-            self.Name = bytearray(namestring, "ascii")
-            self.Combine = 0 # When on, Global config for last selected voice replaces Inst configuration
-            self.LFOSpeed = 100
-            self.AMD = 0
-            self.PMD = 39
-            self.Waveform = 2 # 0 = Saw, 1 = Square, 2 = Triangle, 3 = Noise
-            self.KeyReceive = 0 # 0 = ALL, 1 = EVEN, 2 = ODD
-
-class InstData: # Init inst parameters
-    def __init__(self):
-        self.Notes = 8 # 8 notes default (max)
-        self.Channel = 0 # Channel 1 default
-        self.KCLimitL = 0
-        self.KCLimitH = 127
-        self.Bank = 0 # max 7 (0 ~ 6)
-        self.Voice = 0 # max 48 (0 ~ 47)
-        self.Detune = 0 # 0 ~ 63 = positive, 64 ~ 127 = negative
-        self.Octave = 2 # 0 ~ 4 (0 = -2, 1 = -1, 2 = 0, 3 = +1, 4 = +2)
-        self.Output = 127
-        self.Pan = 64 # 0 = L, 64 = C, 127 = R
-        self.LFOEnable = 1 # 0 = PMS and AMS disabled, 1 = Use PMS and AMS from Voice Data
-        self.PortTime = 0
-        self.BendRange = 2 # 0 ~ 12 (semitones)
-        self.Poly = 1
-        self.PMDAssign = 0 # 0 ~ 4 (None, Aftertouch, Mod Wheel, Breath, Foot)
-
-class VoiceData: # Init voice parameters
-    def __init__(self):
-        #self.LFOLoad = 0
-        #self.AMD = 0
-        #self.LFOSync = 0
-        #self.PMD = 0
-        #self.Feedback = 0
-        #self.Algorithm = 0
-        #self.PMS = 0
-        #self.AMS = 0
-        #self.Waveform = 0
-        #self.TransposeSign = 0
-        #self.Transpose = 0
-        #self.PMDAssign = 2
-        #self.PitchBendRange = 2
-        
-        #self.Op1 = self.Operator()
-        #self.Op1.Enable = 1
-        #self.Op1.TL = 127
-        #self.Op2 = self.Operator()
-        #self.Op3 = self.Operator()
-        #self.Op4 = self.Operator()
-        
-        namestring = "init   "   
-        self.Name = bytearray(namestring, "ascii")
-        self.UserCode = [0, 0]
-        self.LFOSpeed = [0x08, 0x0C] # 200 by default
-        self.LFOLoad_AMD = [0, 0]
-        self.LFOSync_PMD = [0, 0]
-        self.OpsEnable = [0, 0b0100] # Enable Op1 by default
-        self.Feedback_Algo = [0, 0]
-        self.PMS_AMS = [0, 0b0011]
-        self.Waveform = [0, 0]
-        self.Transpose = [0, 0]
-        self.Poly_Port = [0, 0]
-        self.PMDAssign_BendRange = [0, 0]
-        
-        self.Op1 = self.Operator()
-        self.Op1.TL = [0, 0] # Op1 TL set to 0 (max) by default
-        self.Op2 = self.Operator()
-        self.Op3 = self.Operator()
-        self.Op4 = self.Operator()
-    
-    class Operator:
-        def __init__(self):
-            #self.Enable = 0
-            #self.TL = 0
-            #self.KeyLvlType = 0
-            #self.TLVel = 0
-            #self.KeyLvlDepth = 0
-            #self.TLFine = 0
-            #self.DT = 0
-            #self.Multi = 1
-            #self.KeyEnvRt = 0
-            #self.AR = 31
-            #self.AM = 0
-            #self.ARVel = 0
-            #self.D1R = 0
-            #self.D2R = 0
-            #self.SL = 0
-            #self.RR = 15
-            
-            self.TL = [0b1111, 0b0111] # Set to 127 (min) by default
-            self.TypeBit0_TLVel = [0, 0] # Bit #0 = positive/negative (0/1)
-            self.KeyLvlDepth_TLFine = [0, 0]
-            self.TypeBit1_DT1_Multi = [0b0001, 0] # Multi set to 1 by default, TypeBit1 set to 0 (lin/exp, 0/1), and DT1 set to 0 (longest)
-            self.KeyEnvRt_AR = [0b1111, 0b0001] # AR set to 31 by default (fastest), KeyEnvRt set to 0
-            self.AM_ARVel_D1R = [0, 0]
-            self.DT2_D2R = [0, 0] # DT2 set to 0 by default (no modifying), D2R set to 0 by default (longest)
-            self.SL_RR = [0b1111, 0] # SL set to 0 by default (longest/constant), RR set to 15 by default (fastest)
-
-System = SystemData()
-NewInst = InstData()
-NewVoice = VoiceData()
-
-#def get_voice():
-    #sysex_data = [0x43, 0x75, 0x00, 0x28, 0x00, 0x00] # Sysex message to dump inst 1 voice data
-    #sysex_msg = Message('sysex', data=sysex_data)
-    
-    #output_port.send(sysex_msg)
-    #print("Voice dump requested")
-    
-    #response_sysex_data = []
-    
-    #while True:
-        #msg = return_port.receive() # Wait for message
-        #if msg.type == 'sysex':
-            #response_sysex_data = msg.data
-            #break
-    
-    #print(f"Received Sysex response: {len(response_sysex_data)}\n", response_sysex_data)
-    #return response_sysex_data[26:-1]
-
-def cc_to_sysex(control, value, channel):
-    high_data = 0
-    low_data = 0
-    
-    # Convert CC value to separate byte-split-and-swapped values if necessary
-
-    sysex_data = [0x43]                     # Yamaha FB-01 manufacturer ID
-    sysex_data += [0x75]                    # Sub-status
-    sysex_data += [System.Channel]                    # System channel number (1 by default)
-    # Determine sysex message type:
-    match control:
-        case 0 | 3 | 6 | 8 | 9 | 11 | 12 | 13 | 14 | 15 | 111 | 112 | 113 | 125:
-            sysex_data += [0x10]                    # System/Config parameter
-        case _:
-            # Determine Inst voice to modify (channels 1~8 = insts 1~8, channels 8~15 = inst 1)
-            match channel:
-                case 0 | 8 | 9 | 10 | 11 | 12 | 13 | 14 | 15:
-                    sysex_data += [0x18]            # Instrument number (1) - Voice and Inst parameter
-                case 1:
-                    sysex_data += [0x19]            # Instrument number (2) - Voice and Inst parameter
-                case 2:
-                    sysex_data += [0x1A]            # Instrument number (3) - Voice and Inst parameter
-                case 3:
-                    sysex_data += [0x1B]            # Instrument number (4) - Voice and Inst parameter
-                case 4:
-                    sysex_data += [0x1C]            # Instrument number (5) - Voice and Inst parameter
-                case 5:
-                    sysex_data += [0x1D]            # Instrument number (6) - Voice and Inst parameter
-                case 6:
-                    sysex_data += [0x1E]            # Instrument number (7) - Voice and Inst parameter
-                case 7:
-                    sysex_data += [0x1F]            # Instrument number (8) - Voice and Inst parameter
-    
-    # Map CC values to sysex data bytes
-    match control:
-        # System: Memory Protect
-        case 0:
-            sysex_data += [0x21]                    # System parameter ($21 = memory protect)
-            low_data = System.MemProtect
-            
-            if value == 0 and low_data != 0:
-                low_data = 0
-                System.MemProtect = low_data
-            elif value == 127 and low_data != 1:
-                low_data = 1
-                System.MemProtect = low_data
-        
-        # Config: Combine Mode
-        case 3:
-            sysex_data += [0x08]                    # System parameter ($08 = Config: Combine Mode)
-            low_data = System.Config.Combine
-            
-            if value == 0 and low_data != 0:
-                low_data = 0
-                System.Config.Combine = low_data
-            elif value == 127 and low_data != 1:
-                low_data = 1
-                System.Config.Combine = low_data
-        
-        # Config Name (Char #1)
-        case 6:
-            sysex_data += [0x00]
-            
-            if value != 64 and 0 <= System.Config.Name[0] <= 127:
-                System.Config.Name[0] += value - 64
-            high_data = System.Config.Name[0] >> 4
-            low_data = System.Config.Name[0] & 0x0F
-        # Config Name (Char #2)
-        case 8:
-            sysex_data += [0x01]
-            
-            if value != 64 and 0 <= System.Config.Name[1] <= 127:
-                System.Config.Name[1] += value - 64
-            high_data = System.Config.Name[1] >> 4
-            low_data = System.Config.Name[1] & 0x0F
-        # Config Name (Char #3)
-        case 9:
-            sysex_data += [0x02]
-            
-            if value != 64 and 0 <= System.Config.Name[2] <= 127:
-                System.Config.Name[2] += value - 64
-            high_data = System.Config.Name[2] >> 4
-            low_data = System.Config.Name[2] & 0x0F
-        # Config Name (Char #4)
-        case 11:
-            sysex_data += [0x03]
-            
-            if value != 64 and 0 <= System.Config.Name[3] <= 127:
-                System.Config.Name[3] += value - 64
-            high_data = System.Config.Name[3] >> 4
-            low_data = System.Config.Name[3] & 0x0F
-        # Config Name (Char #5)
-        case 12:
-            sysex_data += [0x04]
-            
-            if value != 64 and 0 <= System.Config.Name[4] <= 127:
-                System.Config.Name[4] += value - 64
-            high_data = System.Config.Name[4] >> 4
-            low_data = System.Config.Name[4] & 0x0F
-        # Config Name (Char #6)
-        case 13:
-            sysex_data += [0x05]
-            
-            if value != 64 and 0 <= System.Config.Name[5] <= 127:
-                System.Config.Name[5] += value - 64
-            high_data = System.Config.Name[5] >> 4
-            low_data = System.Config.Name[5] & 0x0F
-        # Config Name (Char #7)
-        case 14:
-            sysex_data += [0x06]
-            
-            if value != 64 and 0 <= System.Config.Name[6] <= 127:
-                System.Config.Name[6] += value - 64
-            high_data = System.Config.Name[6] >> 4
-            low_data = System.Config.Name[6] & 0x0F
-        # Config Name (Char #8)
-        case 15:
-            sysex_data += [0x07]
-            
-            if value != 64 and 0 <= System.Config.Name[7] <= 127:
-                System.Config.Name[7] += value - 64
-            high_data = System.Config.Name[7] >> 4
-            low_data = System.Config.Name[7] & 0x0F
-        
-        # Voice: LFOLoad
-        case 16:
-            sysex_data += [0x49]                    # Voice Parameter ($49 = LFO Load & AMD)
-            low_data = NewVoice.LFOLoad_AMD[0]
-            high_data = NewVoice.LFOLoad_AMD[1]
-            
-            if value == 0 and high_data & 0b1000 != 0:
-                high_data = NewVoice.LFOLoad_AMD[1] & 0b111  # Unsets bit 3
-                NewVoice.LFOLoad_AMD[1] = high_data
-            elif value == 127 and high_data & 0b1000 == 0:
-                high_data = NewVoice.LFOLoad_AMD[1] | 0b1000  # Sets bit 3
-                NewVoice.LFOLoad_AMD[1] = high_data
-        
-        # Voice: AMD, amplitude modulation depth
-        case 17:
-            sysex_data += [0x49]                    # Voice parameter ($49 = LFO Load & AMD)
-            low_data = NewVoice.LFOLoad_AMD[0]
-            high_data = NewVoice.LFOLoad_AMD[1]
-            
-            high_data = (high_data & 0b1000) | (value >> 4)
-            low_data = value & 0x0F
-            
-            NewVoice.LFOLoad_AMD = [low_data, high_data]
-        
-        # Voice: LFOSync
-        case 18:
-            sysex_data += [0x4A]                    # Voice parameter ($4A = LFO Sync & PMD)
-            low_data = NewVoice.LFOSync_PMD[0]
-            high_data = NewVoice.LFOSync_PMD[1]
-            
-            if value == 0 and high_data & 0b1000 != 0:
-                high_data = NewVoice.LFOSync_PMD[1] & 0b111
-                NewVoice.LFOSync_PMD = [low_data, high_data]
-            if value == 127 and high_data & 0b1000 == 0:
-                high_data = NewVoice.LFOSync_PMD[1] | 0b1000
-                NewVoice.LFOSync_PMD = [low_data, high_data]
-        
-        # Voice: PMD, pitch modulation depth
-        case 19:
-            sysex_data += [0x4A]                    # Voice parameter ($4A = LFO Sync & PMD)
-            low_data = NewVoice.LFOSync_PMD[0]
-            high_data = NewVoice.LFOSync_PMD[1]
-            
-            high_data = (high_data & 0b1000) | (value >> 4)
-            low_data = value & 0x0F
-            
-            NewVoice.LFOSync_PMD = [low_data, high_data]
-        
-        # Voice: Op1 Enable
-        case 20:
-            sysex_data += [0x4B]                    # Voice parameter ($4B = Toggle Op1, Op2, Op3, & Op4)
-            low_data = NewVoice.OpsEnable[0]
-            high_data = NewVoice.OpsEnable[1]
-            
-            if value == 0 and high_data & 0b0100 != 0:
-                high_data = NewVoice.OpsEnable[1] & 0b0011
-                NewVoice.OpsEnable[1] = high_data
-            elif value == 127 and high_data & 0b0100 == 0:
-                high_data = NewVoice.OpsEnable[1] | 0b0100
-                NewVoice.OpsEnable[1] = high_data
-        
-        # Voice: Op2 Enable
-        case 21:
-            sysex_data += [0x4B]                    # Voice parameter ($4B = Toggle Op1, Op2, Op3, & Op4)
-            low_data = NewVoice.OpsEnable[0]
-            high_data = NewVoice.OpsEnable[1]
-            
-            if value == 0:
-                high_data = NewVoice.OpsEnable[1] & 0b0101
-                NewVoice.OpsEnable[1] = high_data
-            elif value == 127 and high_data & 0b0010 == 0:
-                high_data = NewVoice.OpsEnable[1] | 0b0010
-                NewVoice.OpsEnable[1] = high_data
-        
-        # Voice: Op3 Enable
-        case 22:
-            sysex_data += [0x4B]                    # Voice parameter ($4B = Toggle Op1, Op2, Op3, & Op4)
-            low_data = NewVoice.OpsEnable[0]
-            high_data = NewVoice.OpsEnable[1]
-            
-            if value == 0 and high_data & 0b0001 != 0:
-                high_data = NewVoice.OpsEnable[1] & 0b0110
-                NewVoice.OpsEnable[1] = high_data
-            elif value == 127 and high_data & 0b0001 == 0:
-                high_data = NewVoice.OpsEnable[1] | 0b0001
-                NewVoice.OpsEnable[1] = high_data
-        
-        # Voice: Op4 Enable
-        case 23:
-            sysex_data += [0x4B]                    # Voice parameter ($4B = Toggle Op1, Op2, Op3, & Op4)
-            low_data = NewVoice.OpsEnable[0]
-            high_data = NewVoice.OpsEnable[1]
-            
-            if value == 0 and low_data & 0b1000 != 0:
-                low_data = 0
-                NewVoice.OpsEnable[0] = low_data
-            elif value == 127 and low_data & 0b1000 == 0:
-                low_data = 0b1000
-                NewVoice.OpsEnable[0] = low_data
-        
-        # Voice: Algorithm
-        case 24:
-            sysex_data += [0x4C]                    # Voice parameter ($4C = feedback level & algorithm)
-            low_data = NewVoice.Feedback_Algo[0]
-            high_data = NewVoice.Feedback_Algo[1]
-            if 0 <= value <= 7:
-                low_data = value
-                # Apply Feedback
-                low_data |= NewVoice.Feedback_Algo[0] & 0b1000
-                high_data = NewVoice.Feedback_Algo[1] & 0x0F
-                NewVoice.Feedback_Algo[0] = low_data
-                NewVoice.Feedback_Algo[1] = high_data
-        
-        # Voice: Feedback Level
-        case 25:
-            sysex_data += [0x4C]                    # Voice parameter ($4C = feedback level & algorithm)
-            low_data = NewVoice.Feedback_Algo[0]
-            high_data = NewVoice.Feedback_Algo[1]
-            if 0 <= value <= 7:
-                high_data = value >> 1
-                low_data = (value << 3) & 0x0F
-                # Apply Algorithm
-                low_data |= NewVoice.Feedback_Algo[0] & 0b0111
-                NewVoice.Feedback_Algo[0] = low_data
-                NewVoice.Feedback_Algo[1] = high_data
-        
-        # Voice: PMS
-        case 26:
-            sysex_data += [0x4D]                    # Voice parameter ($4D = PMS and AMS)
-            high_data = NewVoice.PMS_AMS[1]
-            
-            if 0 <= value <= 7:
-                high_data = value
-                NewVoice.PMS_AMS[1] = high_data
-            # Apply AMS
-            low_data = NewVoice.PMS_AMS[0]
-        
-        # Voice: AMS
-        case 27:
-            sysex_data += [0x4D]                    # Voice parameter ($4D = PMS and AMS)
-            low_data = NewVoice.PMS_AMS[0]
-            
-            if 0 <= value <= 3:
-                low_data = value
-                NewVoice.PMS_AMS[0] = low_data
-            # Apply PMS
-            high_data = NewVoice.PMS_AMS[1]
-        
-        # Voice: LFO Waveform
-        case 28:
-            sysex_data += [0x4E]                    # Voice parameter ($4E = LFO wave form)
-            high_data = NewVoice.Waveform[1]
-            if 0 <= value <= 3:
-                high_data = value << 1
-                NewVoice.Waveform[1] = high_data
-        
-        # Voice: PMD Assign
-        case 29:
-            sysex_data += [0x7B]                    # Voice parameter ($7B = PMD Assign & Pitchbend Range)
-            high_data = NewVoice.PMDAssign_BendRange[1]
-            low_data = NewVoice.PMDAssign_BendRange[0]
-            if 0 <= value <= 5:
-                high_data = value
-                NewVoice.PMDAssign_BendRange[1] = high_data
-        
-        # Voice: Transpose
-        case 30:
-            sysex_data += [0x4F]                    # Voice parameter ($4F = Transpose)
-            highvalue = value
-            low_data = NewVoice.Transpose[0]
-            high_data = NewVoice.Transpose[1]
-            
-            if 25 <= highvalue <= 49:
-                highvalue -= 25
-            elif 0 <= highvalue <= 24:
-                highvalue += 231
-                
-            high_data = highvalue >> 4
-            low_data = highvalue & 0x0F
-            NewVoice.Transpose[0] = low_data
-            NewVoice.Transpose[1] = high_data
-        
-        # Voice: Pitchbend Range
-        case 31:
-            sysex_data += [0x7B]                    # Voice parameter ($7B = PMD Assign & Pitchbend Range)
-            low_data = NewVoice.PMDAssign_BendRange[0]
-            high_data = NewVoice.PMDAssign_BendRange[1]
-            if 0 <= value <= 15:
-                low_data = value
-                NewVoice.PMDAssign_BendRange[0] = high_data
-                
-        # Inst: # of notes
-        case 99:
-            sysex_data += [0x00]                   # Inst parameter ($00 = # of Notes)
-            low_data = NewInst.Notes
-            if low_data != value and 0 <= value <= 8:
-                low_data = value
-                NewInst.Notes = low_data
-        
-        # Inst: MIDI Channel
-        case 100:
-            sysex_data += [0x01]                   # Inst parameter ($01 = MIDI Channel
-            low_data = NewInst.Channel
-            if low_data != value and 0 <= value <= 15:
-                low_data = value
-                NewInst.Channel = low_data
-        
-        # Inst: KC# Limit (Lower)
-        case 101:
-            sysex_data += [0x03]                   # Inst parameter ($03 = KC# Limit/L)
-            low_data = NewInst.KCLimitL
-            if low_data != value:
-                low_data = value
-                NewInst.KCLimitL = low_data
-        
-        # Inst: KC# Limit (Upper)
-        case 102:
-            sysex_data += [0x02]                   # Inst parameter ($02 = KC# Limit/H)
-            low_data = NewInst.KCLimitH
-            if low_data != value:
-                low_data = value
-                NewInst.KCLimitH = low_data
-        
-        # Inst: Voice Bank #
-        case 103:
-            sysex_data += [0x04]                   # Inst parameter ($04 = Voice Bank #)
-            low_data = NewInst.Bank
-            if low_data != value and 0 <= value <= 6:
-                low_data = value
-                NewInst.Bank = low_data
-        
-        # Inst: Voice #
-        case 104:
-            sysex_data += [0x05]                   # Inst parameter ($05 = Voice #)
-            low_data = NewInst.Voice
-            if low_data != value and 0 <= value <= 47:
-                low_data = value
-                NewInst.Voice = low_data
-        
-        # Inst: Detune
-        case 105:
-            sysex_data += [0x06]                   # Inst parameter ($06 = Detune)
-            low_data = NewInst.Detune
-            # Accomodate signed value for negative range
-            if 0 <= value <= 63:
-                value += 64
-            elif 64 <= value <= 127:
-                value -= 64
-            if low_data != value:
-                low_data = value
-                NewInst.Detune = low_data
-        
-        # Inst: Octave Transpose
-        case 106:
-            sysex_data += [0x07]                   # Inst parameter ($07 = Octave Transpose)
-            low_data = NewInst.Octave
-            if low_data != value and 0 <= value <= 4:
-                low_data = value
-                NewInst.Octave = low_data
-        
-        # Inst: Output Level
-        case 107:
-            sysex_data += [0x08]                   # Inst parameter ($08 = Output Level)
-            low_data = NewInst.Output
-            if low_data != value:
-                low_data = value
-                NewInst.Output = low_data
-        
-        # Inst: Pan
-        case 108:
-            sysex_data += [0x09]                   # Inst parameter ($09 = Pan)
-            low_data = NewInst.Pan
-            if low_data != value:
-                low_data = value
-                NewInst.Pan = low_data
-        
-        # Inst: LFO Enable
-        case 109:
-            sysex_data += [0x0A]                   # Inst parameter ($0A = LFO Enable)
-            low_data = NewInst.LFOEnable
-            if value == 0 and low_data != 0:
-                low_data = 0
-                NewInst.LFOEnable = low_data
-            if value == 127 and low_data != 1:
-                low_data = 1
-                NewInst.LFOEnable = low_data
-        
-        # Inst: Pitch Bend Range
-        case 110:
-            sysex_data += [0x0C]                   # Inst parameter ($0C = Pitch Bend Range)
-            low_data = NewInst.BendRange
-            if low_data != value and 0 <= value <= 12:
-                low_data = value
-                NewInst.BendRange = low_data
-        
-        # System: Config Number
-        case 111:
-            sysex_data += [0x22]                   # System parmeter ($22 = Config #)
-            low_data = System.ConfigNum
-            if low_data != value and 0 <= value <= 19:
-                low_data = value
-                System.ConfigNum = low_data
-        
-        # System: Channel Number
-        case 112:
-            sysex_data += [0x20]                   # System parameter ($20 = set system MIDI channel)
-            low_data = System.Channel
-            if low_data != value and 0 <= value <= 15:
-                low_data = value
-                System.Channel = low_data
-        
-        # System: Master Detune
-        case 113:
-            sysex_data += [0x23]                   # System parameter ($23 = system master detune, not documented)
-            low_data = System.Detune
-            # Accomodate signed value for negative range
-            if 0 <= value <= 63:
-                value += 64
-            elif 64 <= value <= 127:
-                value -= 64
-            if low_data != value:
-                low_data = value
-                System.Detune = low_data
-        
-        # Voice: LFO Speed (controller knob set to Relative Bit Offset)
-        case 115:                                   # Voice Parameter ($48 = Voice LFO Speed)
-            sysex_data += [0x48]
-            low_data = NewVoice.LFOSpeed[0]
-            high_data = NewVoice.LFOSpeed[1]
-            
-            LFOSpeed = (NewVoice.LFOSpeed[1] << 4) | (NewVoice.LFOSpeed[0] & 0x0F)
-            
-            if value != 64 and 0 <= LFOSpeed <= 255 and (LFOSpeed + value - 64) <= 255 and (LFOSpeed + value - 64) >= 0:
-                LFOSpeed += value - 64
-                low_data = LFOSpeed & 0x0F
-                high_data = LFOSpeed >> 4
-            NewVoice.LFOSpeed[0] = low_data
-            NewVoice.LFOSpeed[1] = high_data
-            
-        # Voice Name Char 1
-        case 116:
-            sysex_data += [0x40]                    # Voice Parameter ($40 = Voice Name Char 1)
-            highvalue = value
-            if highvalue != 64 and 0 <= NewVoice.Name[0] <= 127:
-                NewVoice.Name[0] += highvalue - 64
-            high_data = NewVoice.Name[0] >> 4
-            low_data = NewVoice.Name[0] & 0x0F
-        # Voice Name Char 2
-        case 117:
-            sysex_data += [0x41]                    # Voice Parameter ($41 = Voice Name Char 2)
-            
-            if value != 64 and 0 <= NewVoice.Name[1] <= 127:
-                NewVoice.Name[1] += value - 64
-            high_data = NewVoice.Name[1] >> 4
-            low_data = NewVoice.Name[1] & 0x0F
-        # Voice Name Char 3
-        case 118:
-            sysex_data += [0x42]                    # Voice Parameter ($42 = Voice Name Char 3)
-            
-            if value != 64 and 0 <= NewVoice.Name[2] <= 127:
-                NewVoice.Name[2] += value - 64
-            high_data = NewVoice.Name[2] >> 4
-            low_data = NewVoice.Name[2] & 0x0F
-        # Voice Name Char 4
-        case 119:
-            sysex_data += [0x43]                    # Voice Parameter ($43 = Voice Name Char 4)
-            
-            if value != 64 and 0 <= NewVoice.Name[3] <= 127:
-                NewVoice.Name[3] += value - 64
-            high_data = NewVoice.Name[3] >> 4
-            low_data = NewVoice.Name[3] & 0x0F
-        # Voice Name Char 5
-        case 120:
-            sysex_data += [0x44]                    # Voice Parameter ($44 = Voice Name Char 5)
-            
-            if value != 64 and 0 <= NewVoice.Name[4] <= 127:
-                NewVoice.Name[4] += value - 64
-            high_data = NewVoice.Name[4] >> 4
-            low_data = NewVoice.Name[4] & 0x0F
-        # Voice Name Char 6
-        case 121:
-            sysex_data += [0x45]                    # Voice Parameter ($45 = Voice Name Char 6)
-            
-            if value != 64 and 0 <= NewVoice.Name[5] <= 127:
-                NewVoice.Name[5] += value - 64
-            high_data = NewVoice.Name[5] >> 4
-            low_data = NewVoice.Name[5] & 0x0F
-        # Voice Name Char 7
-        case 122:
-            sysex_data += [0x46]                    # Voice Parameter ($46 = Voice Name Char 7)
-            
-            if value != 64 and 0 <= NewVoice.Name[6] <= 127:
-                NewVoice.Name[6] += value - 64
-            high_data = NewVoice.Name[6] >> 4
-            low_data = NewVoice.Name[6] & 0x0F
-        
-        # Voice User Code
-        case 124:
-            sysex_data += [0x07]                    # Voice Parameter ($07 = user code)
-            
-            if value != 64 and 0 <= NewVoice.UserCode <= 127:
-                NewVoice.UserCode += value - 64
-            high_data = NewVoice.UserCode >> 4
-            low_data = NewVoice.UserCode & 0x0F
-        
-        # System: Master Output Level
-        case 125:
-            sysex_data += [0x24]                   # System parameter ($24 = system master output level)
-            low_data = System.TL
-            if low_data != value:
-                low_data = value
-                System.TL = low_data
-        
-        # Handle the duplicate commands for the 4 operators
-        case _:
-            opOffset = [0,16,35,51]
-            for i in opOffset:
-                # Op TL
-                if control == 32 + i:
-                    value = 127 - value
-                    high_data = value >> 4
-                    low_data = value & 0x0F
-                    match i:
-                        case 0: # Voice parameter ($68 = Op1 TL)
-                            sysex_data += [0x68]
-                            NewVoice.Op1.TL = value
-                        case 16: # Voice parameter ($60 = Op2 TL)
-                            sysex_data += [0x60]
-                            NewVoice.Op2.TL = value
-                        case 35: # Voice parameter ($58 = Op3 TL)
-                            sysex_data += [0x58]
-                            NewVoice.Op3.TL = value
-                        case 51: # Voice parameter ($50 = Op4 TL)
-                            sysex_data += [0x50]
-                            NewVoice.Op4.TL = value
-                
-                # Op KeyLvlType (-/+ Toggle)
-                if control == 33 + i:
-                    match i:
-                        case 0: # Voice parameter ($69 = Op1 Keyboard level scaling type bit #0 (-/+) and Velocity Sensitivity)
-                            sysex_data += [0x69]
-                            low_data = NewVoice.Op1.TypeBit0_TLVel[0]
-                            high_data = NewVoice.Op1.TypeBit0_TLVel[1]
-                            if value == 0:
-                                high_data &= 0b0111
-                            elif value == 127:
-                                high_data |= 8
-                                
-                            if high_data != NewVoice.Op1.TypeBit0_TLVel[1]:
-                                NewVoice.Op1.TypeBit0_TLVel[1] = high_data
-                        case 16: # Voice parameter ($61 = Op2 Keyboard level scaling type bit #0 (-/+) and Velocity Sensitivity)
-                            sysex_data += [0x61]
-                            low_data = NewVoice.Op2.TypeBit0_TLVel[0]
-                            high_data = NewVoice.Op2.TypeBit0_TLVel[1]
-                            if value == 0:
-                                high_data &= 0b0111
-                            elif value == 127:
-                                high_data |= 8
-                                
-                            if high_data != NewVoice.Op2.TypeBit0_TLVel[1]:
-                                NewVoice.Op2.TypeBit0_TLVel[1] = high_data
-                        case 35: # Voice parameter ($59 = Op3 Keyboard level scaling type bit #0 (-/+) and Velocity Sensitivity)
-                            sysex_data += [0x59]
-                            low_data = NewVoice.Op3.TypeBit0_TLVel[0]
-                            high_data = NewVoice.Op3.TypeBit0_TLVel[1]
-                            if value == 0:
-                                high_data &= 0b0111
-                            elif value == 127:
-                                high_data |= 8
-                                
-                            if high_data != NewVoice.Op3.TypeBit0_TLVel[1]:
-                                NewVoice.Op3.TypeBit0_TLVel[1] = high_data
-                        case 51: # Voice parameter ($51 = Op4 Keyboard level scaling type bit #0 (-/+) and Velocity Sensitivity)
-                            sysex_data += [0x51]
-                            low_data = NewVoice.Op4.TypeBit0_TLVel[0]
-                            high_data = NewVoice.Op4.TypeBit0_TLVel[1]
-                            if value == 0:
-                                high_data &= 0b0111
-                            elif value == 127:
-                                high_data |= 8
-                                
-                            if high_data != NewVoice.Op4.TypeBit0_TLVel[1]:
-                                NewVoice.Op4.TypeBit0_TLVel[1] = high_data
-                
-                # Op KeyLvlType (Lin/Exp Toggle)
-                if control == 34 + i:
-                    match i:
-                        case 0: # Voice parameter ($6B = Op1 Keyboard level scaling type bit #1 (Lin/Exp) and Velocity Sensitivity)
-                            sysex_data += [0x6B]
-                            low_data = NewVoice.Op1.TypeBit1_DT1_Multi[0]
-                            high_data = NewVoice.Op1.TypeBit1_DT1_Multi[1]
-                            if value == 0:
-                                high_data &= 0b0111
-                            elif value == 127:
-                                high_data |= 8
-                                
-                            if high_data != NewVoice.Op1.TypeBit1_DT1_Multi[1]:
-                                NewVoice.Op1.TypeBit1_DT1_Multi[1] = high_data
-                        case 16: # Voice parameter ($63 = Op2 Keyboard level scaling type bit #1 (Lin/Exp) and Velocity Sensitivity)
-                            sysex_data += [0x63]
-                            low_data = NewVoice.Op2.TypeBit1_DT1_Multi[0]
-                            high_data = NewVoice.Op2.TypeBit1_DT1_Multi[1]
-                            if value == 0:
-                                high_data &= 0b0111
-                            elif value == 127:
-                                high_data |= 8
-                                
-                            if high_data != NewVoice.Op2.TypeBit1_DT1_Multi[1]:
-                                NewVoice.Op2.TypeBit1_DT1_Multi[1] = high_data
-                        case 35: # Voice parameter ($5B = Op3 Keyboard level scaling type bit #1 (Lin/Exp) and Velocity Sensitivity)
-                            sysex_data += [0x5B]
-                            low_data = NewVoice.Op3.TypeBit1_DT1_Multi[0]
-                            high_data = NewVoice.Op3.TypeBit1_DT1_Multi[1]
-                            if value == 0:
-                                high_data &= 0b0111
-                            elif value == 127:
-                                high_data |= 8
-                                
-                            if high_data != NewVoice.Op3.TypeBit1_DT1_Multi[1]:
-                                NewVoice.Op3.TypeBit1_DT1_Multi[1] = high_data
-                        case 51: # Voice parameter ($53 = Op4 Keyboard level scaling type bit #1 (Lin/Exp) and Velocity Sensitivity)
-                            sysex_data += [0x53]
-                            low_data = NewVoice.Op4.TypeBit1_DT1_Multi[0]
-                            high_data = NewVoice.Op4.TypeBit1_DT1_Multi[1]
-                            if value == 0:
-                                high_data &= 0b0111
-                            elif value == 127:
-                                high_data |= 8
-                                
-                            if high_data != NewVoice.Op4.TypeBit1_DT1_Multi[1]:
-                                NewVoice.Op4.TypeBit1_DT1_Multi[1] = high_data
-                
-                # Op TLVel
-                if control == 35 + i:
-                    if 0 <= value < 8:
-                        high_data = value
-                        match i:
-                            case 0: # Voice parameter ($69 = Op1 Keyboard level scaling type bit #0 and Velocity Sensitivity)
-                                sysex_data += [0x69]
-                                high_data = NewVoice.Op1.TypeBit0_TLVel[1]
-                                if 0 <= value <= 7 and NewVoice.Op1.TypeBit0_TLVel[1] & 0b0111 != value:
-                                    high_data |= value & 0b0111
-                                    NewVoice.Op1.TypeBit0_TLVel[1] = high_data
-                            case 16: # Voice parameter ($61 = Op2 Keyboard level scaling type bit #0 and Velocity Sensitivity)
-                                sysex_data += [0x61]
-                                high_data = NewVoice.Op2.TypeBit0_TLVel[1]
-                                if 0 <= value <= 7 and NewVoice.Op2.TypeBit0_TLVel[1] & 0b0111 != value:
-                                    high_data |= value & 0b0111
-                                    NewVoice.Op2.TypeBit0_TLVel[1] = high_data
-                            case 35: # Voice parameter ($59 = Op3 Keyboard level scaling type bit #0 and Velocity Sensitivity)
-                                sysex_data += [0x59]
-                                high_data = NewVoice.Op3.TypeBit0_TLVel[1]
-                                if 0 <= value <= 7 and NewVoice.Op3.TypeBit0_TLVel[1] & 0b0111 != value:
-                                    high_data |= value & 0b0111
-                                    NewVoice.Op3.TypeBit0_TLVel[1] = high_data
-                            case 51: # Voice parameter ($51 = Op4 Keyboard level scaling type bit #0 and Velocity Sensitivity)
-                                sysex_data += [0x51]
-                                high_data = NewVoice.Op4.TypeBit0_TLVel[1]
-                                if 0 <= value <= 7 and NewVoice.Op4.TypeBit0_TLVel[1] & 0b0111 != value:
-                                    high_data |= value & 0b0111
-                                    NewVoice.Op4.TypeBit0_TLVel[1] = high_data
-                
-                # Op KeyLvlDepth
-                if control == 36 + i:
-                    if 0 <= value < 16:
-                        high_data = value
-                        match i:
-                            case 0: # Voice parameter ($6A = Op1 Keyboard level scaling depth and TL adjust)
-                                sysex_data += [0x6A]
-                                low_data = NewVoice.Op1.KeyLvlDepth_TLFine[0]
-                                high_data = NewVoice.Op1.KeyLvlDepth_TLFine[1]
-                                if 0 <= value <= 15 and NewVoice.Op1.KeyLvlDepth_TLFine[1] != value:
-                                    high_data = value
-                                    NewVoice.Op1.KeyLvlDepth_TLFine[1] = high_data
-                            case 16: # Voice parameter ($62 = Op2 Keyboard level scaling depth and TL adjust)
-                                sysex_data += [0x62]
-                                low_data = NewVoice.Op2.KeyLvlDepth_TLFine[0]
-                                high_data = NewVoice.Op2.KeyLvlDepth_TLFine[1]
-                                if 0 <= value <= 15 and NewVoice.Op2.KeyLvlDepth_TLFine[1] != value:
-                                    high_data = value
-                                    NewVoice.Op2.KeyLvlDepth_TLFine[1] = high_data
-                            case 35: # Voice parameter ($5A = Op3 Keyboard level scaling depth and TL adjust)
-                                sysex_data += [0x5A]
-                                low_data = NewVoice.Op3.KeyLvlDepth_TLFine[0]
-                                high_data = NewVoice.Op3.KeyLvlDepth_TLFine[1]
-                                if 0 <= value <= 15 and NewVoice.Op3.KeyLvlDepth_TLFine[1] != value:
-                                    high_data = value
-                                    NewVoice.Op3.KeyLvlDepth_TLFine[1] = high_data
-                            case 51: # Voice parameter ($52 = Op4 Keyboard level scaling depth and TL adjust)
-                                sysex_data += [0x52]
-                                low_data = NewVoice.Op4.KeyLvlDepth_TLFine[0]
-                                high_data = NewVoice.Op4.KeyLvlDepth_TLFine[1]
-                                if 0 <= value <= 15 and NewVoice.Op4.KeyLvlDepth_TLFine[1] != value:
-                                    high_data = value
-                                    NewVoice.Op4.KeyLvlDepth_TLFine[1] = high_data
-                
-                # Op TLFine
-                if control == 37 + i:
-                    if 0 <= value < 16:
-                        low_data = value
-                        match i:
-                            case 0: # Voice parameter ($6A = Op1 Keyboard level scaling depth and TL adjust)
-                                sysex_data += [0x6A]
-                                low_data = NewVoice.Op1.KeyLvlDepth_TLFine[0]
-                                high_data = NewVoice.Op1.KeyLvlDepth_TLFine[1]
-                                if 0 <= value <= 15 and NewVoice.Op1.KeyLvlDepth_TLFine[0] != value:
-                                    low_data = value
-                                    NewVoice.Op1.KeyLvlDepth_TLFine[0] = low_data
-                            case 16: # Voice parameter ($62 = Op2 Keyboard level scaling depth and TL adjust)
-                                sysex_data += [0x62]
-                                low_data = NewVoice.Op2.KeyLvlDepth_TLFine[0]
-                                high_data = NewVoice.Op2.KeyLvlDepth_TLFine[1]
-                                if 0 <= value <= 15 and NewVoice.Op2.KeyLvlDepth_TLFine[0] != value:
-                                    low_data = value
-                                    NewVoice.Op2.KeyLvlDepth_TLFine[0] = low_data
-                            case 35: # Voice parameter ($5A = Op3 Keyboard level scaling depth and TL adjust)
-                                sysex_data += [0x5A]
-                                low_data = NewVoice.Op3.KeyLvlDepth_TLFine[0]
-                                high_data = NewVoice.Op3.KeyLvlDepth_TLFine[1]
-                                if 0 <= value <= 15 and NewVoice.Op3.KeyLvlDepth_TLFine[0] != value:
-                                    low_data = value
-                                    NewVoice.Op3.KeyLvlDepth_TLFine[0] = low_data
-                            case 51: # Voice parameter ($52 = Op4 Keyboard level scaling depth and TL adjust)
-                                sysex_data += [0x52]
-                                low_data = NewVoice.Op4.KeyLvlDepth_TLFine[0]
-                                high_data = NewVoice.Op4.KeyLvlDepth_TLFine[1]
-                                if 0 <= value <= 15 and NewVoice.Op4.KeyLvlDepth_TLFine[0] != value:
-                                    low_data = value
-                                    NewVoice.Op4.KeyLvlDepth_TLFine[0] = low_data
-                
-                # Op DT1 (Coarse/Inharmonic)
-                if control == 38 + i:
-                    # CC value 3 sets DT1 value to 0 which has already been done when 'high_data' was first initialized
-                    # DT1 value 4 = DT1 value 0 so we don't need to have a condition for it
-                    
-                    # CC values 0-2 map to inverted DT1 sysex values 7-5 respectively (-3 to -1)
-                    if value < 3:
-                        high_data = 7 - value
-                    # CC values 4-6 map to DT1 sysex values 1-3 respectively (+1 to +3)
-                    elif 3 < value < 7:
-                        high_data = value - 3
-                    
-                    match i:
-                        case 0: # Voice parameter ($6B = Op1 Keyboard level scaling type bit #1, DT1, and Multiple)
-                            sysex_data += [0x6B]
-                            low_data = NewVoice.Op1.TypeBit1_DT1_Multi[0]
-                            high_data |= NewVoice.Op1.TypeBit1_DT1_Multi[1] & 0b1000
-                            if high_data != NewVoice.Op1.TypeBit1_DT1_Multi[1]:
-                                NewVoice.Op1.TypeBit1_DT1_Multi[1] = high_data
-                        case 16: # Voice parameter ($63 = Op2 Keyboard level scaling type bit #1, DT1, and Multiple)
-                            sysex_data += [0x63]
-                            low_data = NewVoice.Op2.TypeBit1_DT1_Multi[0]
-                            high_data |= NewVoice.Op2.TypeBit1_DT1_Multi[1] & 0b1000
-                            if high_data != NewVoice.Op2.TypeBit1_DT1_Multi[1]:
-                                NewVoice.Op2.TypeBit1_DT1_Multi[1] = high_data
-                        case 35: # Voice parameter ($5B = Op3 Keyboard level scaling type bit #1, DT1, and Multiple)
-                            sysex_data += [0x5B]
-                            low_data = NewVoice.Op3.TypeBit1_DT1_Multi[0]
-                            high_data |= NewVoice.Op3.TypeBit1_DT1_Multi[1] & 0b1000
-                            if high_data != NewVoice.Op3.TypeBit1_DT1_Multi[1]:
-                                NewVoice.Op3.TypeBit1_DT1_Multi[1] = high_data
-                            
-                        case 51: # Voice parameter ($53 = Op4 Keyboard level scaling type bit #1, DT1, and Multiple)
-                            sysex_data += [0x53]
-                            low_data = NewVoice.Op4.TypeBit1_DT1_Multi[0]
-                            high_data |= NewVoice.Op4.TypeBit1_DT1_Multi[1] & 0b1000
-                            if high_data != NewVoice.Op4.TypeBit1_DT1_Multi[1]:
-                                NewVoice.Op4.TypeBit1_DT1_Multi[1] = high_data
-                
-                # Op Multi and DT2 (Fine) -- PART ONE of two separate sysex messages
-                if control == 39 + i:
-                    if 0 <= value <= 63:
-                        low_data, _ = freq_table[value]
-                    match i:
-                        case 0: # Voice parameter ($6B = Op1 Keyboard level scaling type Bit 1, DT1, and Multiple)
-                            sysex_data += [0x6B]
-                            high_data = NewVoice.Op1.TypeBit1_DT1_Multi[1]
-                            if NewVoice.Op1.TypeBit1_DT1_Multi[0] != low_data:
-                                NewVoice.Op1.TypeBit1_DT1_Multi[0] = low_data
-                        case 16: # Voice parameter ($63 = Op2 Keyboard level scaling type Bit 1, DT1, and Multiple)
-                            sysex_data += [0x63]
-                            high_data = NewVoice.Op2.TypeBit1_DT1_Multi[1]
-                            if NewVoice.Op2.TypeBit1_DT1_Multi[0] != low_data:
-                                NewVoice.Op2.TypeBit1_DT1_Multi[0] = low_data
-                        case 35: # Voice parameter ($5B = Op3 Keyboard level scaling type Bit 1, DT1, and Multiple)
-                            sysex_data += [0x5B]
-                            high_data = NewVoice.Op3.TypeBit1_DT1_Multi[1]
-                            if NewVoice.Op3.TypeBit1_DT1_Multi[0] != low_data:
-                                NewVoice.Op3.TypeBit1_DT1_Multi[0] = low_data
-                        case 51: # Voice parameter ($53 = Op4 Keyboard level scaling type Bit 1, DT1, and Multiple)
-                            sysex_data += [0x53]
-                            high_data = NewVoice.Op4.TypeBit1_DT1_Multi[1]
-                            if NewVoice.Op4.TypeBit1_DT1_Multi[0] != low_data:
-                                NewVoice.Op4.TypeBit1_DT1_Multi[0] = low_data
-                
-                # Op KeyEnvRt
-                if control == 40 + i:
-                    match i:
-                        case 0: # Voice parameter ($6C = Op1 Keyboard rate scaling depth and AR)
-                            sysex_data += [0x6C]
-                            low_data = NewVoice.Op1.KeyEnvRt_AR[0]
-                            high_data = NewVoice.Op1.KeyEnvRt_AR[1]
-                            if 0 <= value <= 3 and NewVoice.Op1.KeyEnvRt_AR[1] & 0b1100 != (value << 2):
-                                high_data = (value << 2) | (high_data & 0b0001)
-                                NewVoice.Op1.KeyEnvRt_AR[1] = high_data
-                        case 16: # Voice parameter ($64 = Op2 Keyboard rate scaling depth and AR)
-                            sysex_data += [0x64]
-                            low_data = NewVoice.Op2.KeyEnvRt_AR[0]
-                            high_data = NewVoice.Op2.KeyEnvRt_AR[1]
-                            if 0 <= value <= 3 and NewVoice.Op2.KeyEnvRt_AR[1] & 0b1100 != (value << 2):
-                                high_data = (value << 2) | (high_data & 0b0001)
-                                NewVoice.Op1.KeyEnvRt_AR[1] = high_data
-                        case 35: # Voice parameter ($5C = Op3 Keyboard rate scaling depth and AR)
-                            sysex_data += [0x5C]
-                            low_data = NewVoice.Op3.KeyEnvRt_AR[0]
-                            high_data = NewVoice.Op3.KeyEnvRt_AR[1]
-                            if 0 <= value <= 3 and NewVoice.Op3.KeyEnvRt_AR[1] & 0b1100 != (value << 2):
-                                high_data = (value << 2) | (high_data & 0b0001)
-                                NewVoice.Op1.KeyEnvRt_AR[1] = high_data
-                        case 51: # Voice parameter ($54 = Op4 Keyboard rate scaling depth and AR)
-                            sysex_data += [0x54]
-                            low_data = NewVoice.Op4.KeyEnvRt_AR[0]
-                            high_data = NewVoice.Op4.KeyEnvRt_AR[1]
-                            if 0 <= value <= 3 and NewVoice.Op4.KeyEnvRt_AR[1] & 0b1100 != (value << 2):
-                                high_data = (value << 2) | (high_data & 0b0001)
-                                NewVoice.Op1.KeyEnvRt_AR[1] = high_data
-                
-                # Op AR
-                if control == 41 + i:
-                    match i:
-                        case 0: # Voice parameter ($6C = Op1 Keyboard rate scaling depth and AR)
-                            sysex_data += [0x6C]
-                            low_data = NewVoice.Op1.KeyEnvRt_AR[0]
-                            high_data = NewVoice.Op1.KeyEnvRt_AR[1]
-                            if 0 <= value <= 31:
-                                low_data = value & 0x0F
-                                if value > 15:
-                                    high_data |= 1
-                                elif value <= 15:
-                                    high_data &= 0b1110
-                                if NewVoice.Op1.KeyEnvRt_AR[0] != low_data:
-                                    NewVoice.Op1.KeyEnvRt_AR[0] = low_data
-                                if NewVoice.Op1.KeyEnvRt_AR[1] != high_data:
-                                    NewVoice.Op1.KeyEnvRt_AR[1] = high_data
-                        case 16: # Voice parameter ($64 = Op2 Keyboard rate scaling depth and AR)
-                            sysex_data += [0x64]
-                            low_data = NewVoice.Op2.KeyEnvRt_AR[0]
-                            high_data = NewVoice.Op2.KeyEnvRt_AR[1]
-                            if 0 <= value <= 31:
-                                low_data = value & 0x0F
-                                if value > 15:
-                                    high_data |= 1
-                                elif value <= 15:
-                                    high_data &= 0b1110
-                                if NewVoice.Op2.KeyEnvRt_AR[0] != low_data:
-                                    NewVoice.Op2.KeyEnvRt_AR[0] = low_data
-                                if NewVoice.Op2.KeyEnvRt_AR[1] != high_data:
-                                    NewVoice.Op2.KeyEnvRt_AR[1] = high_data
-                        case 35: # Voice parameter ($5C = Op3 Keyboard rate scaling depth and AR)
-                            sysex_data += [0x5C]
-                            low_data = NewVoice.Op3.KeyEnvRt_AR[0]
-                            high_data = NewVoice.Op3.KeyEnvRt_AR[1]
-                            if 0 <= value <= 31:
-                                low_data = value & 0x0F
-                                if value > 15:
-                                    high_data |= 1
-                                elif value <= 15:
-                                    high_data &= 0b1110
-                                if NewVoice.Op3.KeyEnvRt_AR[0] != low_data:
-                                    NewVoice.Op3.KeyEnvRt_AR[0] = low_data
-                                if NewVoice.Op3.KeyEnvRt_AR[1] != high_data:
-                                    NewVoice.Op3.KeyEnvRt_AR[1] = high_data
-                        case 51: # Voice parameter ($54 = Op4 Keyboard rate scaling depth and AR)
-                            sysex_data += [0x54]
-                            low_data = NewVoice.Op4.KeyEnvRt_AR[0]
-                            high_data = NewVoice.Op4.KeyEnvRt_AR[1]
-                            if 0 <= value <= 31:
-                                low_data = value & 0x0F
-                                if value > 15:
-                                    high_data |= 1
-                                elif value <= 15:
-                                    high_data &= 0b1110
-                                if NewVoice.Op4.KeyEnvRt_AR[0] != low_data:
-                                    NewVoice.Op4.KeyEnvRt_AR[0] = low_data
-                                if NewVoice.Op4.KeyEnvRt_AR[1] != high_data:
-                                    NewVoice.Op4.KeyEnvRt_AR[1] = high_data
-                
-                # Op AM
-                if control == 42 + i:
-                    match i:
-                        case 0: # Voice parameter ($6D = Op1 AM, Velocity sensitivity (AR), and D1R)
-                            sysex_data += [0x6D]
-                            low_data = NewVoice.Op1.AM_ARVel_D1R[0]
-                            high_data = NewVoice.Op1.AM_ARVel_D1R[1]
-                            if value == 0 and NewVoice.Op1.AM_ARVel_D1R[1] & 0b1000 != 0:
-                                high_data &= 0b0111
-                                NewVoice.Op1.AM_ARVel_D1R[1] = high_data
-                            if value == 127 and NewVoice.Op1.AM_ARVel_D1R[1] & 0b1000 != 8:
-                                high_data |= 8
-                                NewVoice.Op1.AM_ARVel_D1R[1] = high_data
-                        case 16: # Voice parameter ($65 = Op2 AM, Velocity sensitivity (AR), and D1R)
-                            sysex_data += [0x65]
-                            low_data = NewVoice.Op2.AM_ARVel_D1R[0]
-                            high_data = NewVoice.Op2.AM_ARVel_D1R[1]
-                            if value == 0 and NewVoice.Op2.AM_ARVel_D1R[1] & 0b1000 != 0:
-                                high_data &= 0b0111
-                                NewVoice.Op2.AM_ARVel_D1R[1] = high_data
-                            if value == 127 and NewVoice.Op2.AM_ARVel_D1R[1] & 0b1000 != 8:
-                                high_data |= 8
-                                NewVoice.Op2.AM_ARVel_D1R[1] = high_data
-                        case 35: # Voice parameter ($5D = Op3 AM, Velocity sensitivity (AR), and D1R)
-                            sysex_data += [0x5D]
-                            low_data = NewVoice.Op3.AM_ARVel_D1R[0]
-                            high_data = NewVoice.Op3.AM_ARVel_D1R[1]
-                            if value == 0 and NewVoice.Op3.AM_ARVel_D1R[1] & 0b1000 != 0:
-                                high_data &= 0b0111
-                                NewVoice.Op3.AM_ARVel_D1R[1] = high_data
-                            if value == 127 and NewVoice.Op3.AM_ARVel_D1R[1] & 0b1000 != 8:
-                                high_data |= 8
-                                NewVoice.Op3.AM_ARVel_D1R[1] = high_data
-                        case 51: # Voice parameter ($55 = Op4 AM, Velocity sensitivity (AR), and D1R)
-                            sysex_data += [0x55]
-                            low_data = NewVoice.Op4.AM_ARVel_D1R[0]
-                            high_data = NewVoice.Op4.AM_ARVel_D1R[1]
-                            if value == 0 and NewVoice.Op4.AM_ARVel_D1R[1] & 0b1000 != 0:
-                                high_data &= 0b0111
-                                NewVoice.Op4.AM_ARVel_D1R[1] = high_data
-                            if value == 127 and NewVoice.Op4.AM_ARVel_D1R[1] & 0b1000 != 8:
-                                high_data |= 8
-                                NewVoice.Op4.AM_ARVel_D1R[1] = high_data
-                
-                # Op ARVel
-                if control == 43 + i:
-                    match i:
-                        case 0: # Voice parameter ($6D = Op1 AM, Velocity sensitivity (AR), and D1R)
-                            sysex_data += [0x6D]
-                            low_data = NewVoice.Op1.AM_ARVel_D1R[0]
-                            high_data = NewVoice.Op1.AM_ARVel_D1R[1]
-                            if 0 <= value <= 3 and NewVoice.Op1.AM_ARVel_D1R[1] != value << 1:
-                                high_data |= value << 1
-                                NewVoice.Op1.AM_ARVel_D1R[1] = high_data
-                        case 16: # Voice parameter ($65 = Op2 AM, Velocity sensitivity (AR), and D1R)
-                            sysex_data += [0x65]
-                            low_data = NewVoice.Op2.AM_ARVel_D1R[0]
-                            high_data = NewVoice.Op2.AM_ARVel_D1R[1]
-                            if 0 <= value <= 3 and NewVoice.Op2.AM_ARVel_D1R[1] != value << 1:
-                                high_data |= value << 1
-                                NewVoice.Op2.AM_ARVel_D1R[1] = high_data
-                        case 35: # Voice parameter ($5D = Op3 AM, Velocity sensitivity (AR), and D1R)
-                            sysex_data += [0x5D]
-                            low_data = NewVoice.Op3.AM_ARVel_D1R[0]
-                            high_data = NewVoice.Op3.AM_ARVel_D1R[1]
-                            if 0 <= value <= 3 and NewVoice.Op3.AM_ARVel_D1R[1] != value << 1:
-                                high_data |= value << 1
-                                NewVoice.Op3.AM_ARVel_D1R[1] = high_data
-                        case 51: # Voice parameter ($55 = Op4 AM, Velocity sensitivity (AR), and D1R)
-                            sysex_data += [0x55]
-                            low_data = NewVoice.Op4.AM_ARVel_D1R[0]
-                            high_data = NewVoice.Op4.AM_ARVel_D1R[1]
-                            if 0 <= value <= 3 and NewVoice.Op4.AM_ARVel_D1R[1] != value << 1:
-                                high_data |= value << 1
-                                NewVoice.Op4.AM_ARVel_D1R[1] = high_data
-                
-                # Op D1R
-                if control == 44 + i:
-                    match i:
-                        case 0: # Voice parameter ($6D = Op1 AM, Velocity sensitivity (AR), and D1R)
-                            sysex_data += [0x6D]
-                            low_data = NewVoice.Op1.AM_ARVel_D1R[0]
-                            high_data = NewVoice.Op1.AM_ARVel_D1R[1]
-                            if 0 <= value <= 31:
-                                low_data = value & 0x0F
-                                if value > 15:
-                                    high_data |= 1
-                                elif value <= 15:
-                                    high_data &= 0b1110
-                                if NewVoice.Op1.AM_ARVel_D1R[0] != low_data:
-                                    NewVoice.Op1.AM_ARVel_D1R[0] = low_data
-                                if NewVoice.Op1.AM_ARVel_D1R[1] != high_data:
-                                    NewVoice.Op1.AM_ARVel_D1R[1] = high_data
-                        case 16: # Voice parameter ($65 = Op2 AM, Velocity sensitivity (AR), and D1R)
-                            sysex_data += [0x65]
-                            low_data = NewVoice.Op2.AM_ARVel_D1R[0]
-                            high_data = NewVoice.Op2.AM_ARVel_D1R[1]
-                            if 0 <= value <= 31:
-                                low_data = value & 0x0F
-                                if value > 15:
-                                    high_data |= 1
-                                elif value <= 15:
-                                    high_data &= 0b1110
-                                if NewVoice.Op2.AM_ARVel_D1R[0] != low_data:
-                                    NewVoice.Op2.AM_ARVel_D1R[0] = low_data
-                                if NewVoice.Op2.AM_ARVel_D1R[1] != high_data:
-                                    NewVoice.Op2.AM_ARVel_D1R[1] = high_data
-                        case 35: # Voice parameter ($5D = Op3 AM, Velocity sensitivity (AR), and D1R)
-                            sysex_data += [0x5D]
-                            low_data = NewVoice.Op3.AM_ARVel_D1R[0]
-                            high_data = NewVoice.Op3.AM_ARVel_D1R[1]
-                            if 0 <= value <= 31:
-                                low_data = value & 0x0F
-                                if value > 15:
-                                    high_data |= 1
-                                elif value <= 15:
-                                    high_data &= 0b1110
-                                if NewVoice.Op3.AM_ARVel_D1R[0] != low_data:
-                                    NewVoice.Op3.AM_ARVel_D1R[0] = low_data
-                                if NewVoice.Op3.AM_ARVel_D1R[1] != high_data:
-                                    NewVoice.Op3.AM_ARVel_D1R[1] = high_data
-                        case 51: # Voice parameter ($55 = Op4 AM, Velocity sensitivity (AR), and D1R)
-                            sysex_data += [0x55]
-                            if 0 <= value <= 31:
-                                low_data = value & 0x0F
-                                if value > 15:
-                                    high_data |= 1
-                                elif value <= 15:
-                                    high_data &= 0b1110
-                                if NewVoice.Op4.AM_ARVel_D1R[0] != low_data:
-                                    NewVoice.Op4.AM_ARVel_D1R[0] = low_data
-                                if NewVoice.Op4.AM_ARVel_D1R[1] != high_data:
-                                    NewVoice.Op4.AM_ARVel_D1R[1] = high_data
-                
-                # Op D2R
-                if control == 45 + i:
-                    match i:
-                        case 0: # Voice parameter ($6E = Op1 DT2 and D2R)
-                            sysex_data += [0x6E]
-                            low_data = NewVoice.Op1.DT2_D2R[0]
-                            high_data = NewVoice.Op1.DT2_D2R[1]
-                            if 0 <= value <= 31:
-                                low_data = value & 0x0F
-                                if value > 15:
-                                    high_data |= 1
-                                elif value <= 15:
-                                    high_data &= 0b1110
-                                if NewVoice.Op1.DT2_D2R[0] != low_data:
-                                    NewVoice.Op1.DT2_D2R[0] = low_data
-                                if NewVoice.Op1.DT2_D2R[1] != high_data:
-                                    NewVoice.Op1.DT2_D2R[1] = high_data
-                        case 16: # Voice parameter ($66 = Op2 DT2 and D2R)
-                            sysex_data += [0x66]
-                            low_data = NewVoice.Op2.DT2_D2R[0]
-                            high_data = NewVoice.Op2.DT2_D2R[1]
-                            if 0 <= value <= 31:
-                                low_data = value & 0x0F
-                                if value > 15:
-                                    high_data |= 1
-                                elif value <= 15:
-                                    high_data &= 0b1110
-                                if NewVoice.Op2.DT2_D2R[0] != low_data:
-                                    NewVoice.Op2.DT2_D2R[0] = low_data
-                                if NewVoice.Op2.DT2_D2R[1] != high_data:
-                                    NewVoice.Op2.DT2_D2R[1] = high_data
-                        case 35: # Voice parameter ($5E = Op3 DT2 and D2R)
-                            sysex_data += [0x5E]
-                            low_data = NewVoice.Op3.DT2_D2R[0]
-                            high_data = NewVoice.Op3.DT2_D2R[1]
-                            if 0 <= value <= 31:
-                                low_data = value & 0x0F
-                                if value > 15:
-                                    high_data |= 1
-                                elif value <= 15:
-                                    high_data &= 0b1110
-                                if NewVoice.Op3.DT2_D2R[0] != low_data:
-                                    NewVoice.Op3.DT2_D2R[0] = low_data
-                                if NewVoice.Op3.DT2_D2R[1] != high_data:
-                                    NewVoice.Op3.DT2_D2R[1] = high_data
-                        case 51: # Voice parameter ($56 = Op4 DT2 and D2R)
-                            sysex_data += [0x56]
-                            low_data = NewVoice.Op4.DT2_D2R[0]
-                            high_data = NewVoice.Op4.DT2_D2R[1]
-                            if 0 <= value <= 31:
-                                low_data = value & 0x0F
-                                if value > 15:
-                                    high_data |= 1
-                                elif value <= 15:
-                                    high_data &= 0b1110
-                                if NewVoice.Op4.DT2_D2R[0] != low_data:
-                                    NewVoice.Op4.DT2_D2R[0] = low_data
-                                if NewVoice.Op4.DT2_D2R[1] != high_data:
-                                    NewVoice.Op4.DT2_D2R[1] = high_data
-                
-                # Op SL
-                if control == 46 + i:
-                    match i:
-                        case 0: # Voice parameter ($6F = Op1 SL and RR)
-                            sysex_data += [0x6F]
-                            low_data = NewVoice.Op1.SL_RR[0]
-                            high_data = NewVoice.Op1.SL_RR[1]
-                            if 0 <= value <= 15 and NewVoice.Op1.SL_RR[1] != value:
-                                high_data = value
-                                NewVoice.Op1.SL_RR[1] = high_data
-                        case 16: # Voice parameter ($67 = Op2 SL and RR)
-                            sysex_data += [0x67]
-                            low_data = NewVoice.Op2.SL_RR[0]
-                            high_data = NewVoice.Op2.SL_RR[1]
-                            if 0 <= value <= 15 and NewVoice.Op2.SL_RR[1] != value:
-                                high_data = value
-                                NewVoice.Op2.SL_RR[1] = high_data
-                        case 35: # Voice parameter ($5F = Op3 SL and RR)
-                            sysex_data += [0x5F]
-                            low_data = NewVoice.Op3.SL_RR[0]
-                            high_data = NewVoice.Op3.SL_RR[1]
-                            if 0 <= value <= 15 and NewVoice.Op3.SL_RR[1] != value:
-                                high_data = value
-                                NewVoice.Op3.SL_RR[1] = high_data
-                        case 51: # Voice parameter ($57 = Op4 SL and RR)
-                            sysex_data += [0x57]
-                            low_data = NewVoice.Op4.SL_RR[0]
-                            high_data = NewVoice.Op4.SL_RR[1]
-                            if 0 <= value <= 15 and NewVoice.Op4.SL_RR[1] != value:
-                                high_data = value
-                                NewVoice.Op4.SL_RR[1] = high_data
-                
-                # Op RR
-                if control == 47 + i:
-                    match i:
-                        case 0: # Voice parameter ($6F = Op1 SL and RR)
-                            sysex_data += [0x6F]
-                            low_data = NewVoice.Op1.SL_RR[0]
-                            high_data = NewVoice.Op1.SL_RR[1]
-                            if 0 <= value <= 15 and NewVoice.Op1.SL_RR[0] != value:
-                                low_data = value
-                                NewVoice.Op1.SL_RR[0] = low_data
-                        case 16: # Voice parameter ($67 = Op2 SL and RR)
-                            sysex_data += [0x67]
-                            low_data = NewVoice.Op2.SL_RR[0]
-                            high_data = NewVoice.Op2.SL_RR[1]
-                            if 0 <= value <= 15 and NewVoice.Op2.SL_RR[0] != value:
-                                low_data = value
-                                NewVoice.Op2.SL_RR[0] = low_data
-                        case 35: # Voice parameter ($5F = Op3 SL and RR)
-                            sysex_data += [0x5F]
-                            low_data = NewVoice.Op3.SL_RR[0]
-                            high_data = NewVoice.Op3.SL_RR[1]
-                            if 0 <= value <= 15 and NewVoice.Op3.SL_RR[0] != value:
-                                low_data = value
-                                NewVoice.Op3.SL_RR[0] = low_data
-                        case 51: # Voice parameter ($57 = Op4 SL and RR)
-                            sysex_data += [0x57]
-                            low_data = NewVoice.Op4.SL_RR[0]
-                            high_data = NewVoice.Op4.SL_RR[1]
-                            if 0 <= value <= 15 and NewVoice.Op4.SL_RR[0] != value:
-                                low_data = value
-                                NewVoice.Op4.SL_RR[0] = low_data
-    
-    # Inject low and high data values taken from CC initial value
-    match control:
-        case 6 | 8 | 9 | 11 | 12 | 13 | 14 | 15 | 99 | 100 | 101 | 102 | 103 | 104 | 105 | 106 | 107 | 108 | 109 | 110:
-            sysex_data += [low_data] # For System, Config, and Inst sysex messages we only need one data byte
-        case _:        
-            sysex_data += [low_data, high_data] # 2 nibblized data bytes for Voice param sysex messages
-    
-    f_control = str(control).zfill(3)
-    f_value = str(value).zfill(3)
-    hex_sysex_data = ' '.join(f'{byte:02X}' for byte in sysex_data)
-    print(Style.BRIGHT + Fore.GREEN + f"{f_control}" + Fore.RESET + "/" + Fore.RED + f"{f_value}" + Fore.RESET + " | " + Style.RESET_ALL + Fore.RED + "F0 " + Fore.RESET + Style.BRIGHT + f"{hex_sysex_data} " + Style.RESET_ALL + Fore.RED + "F7" + Style.RESET_ALL)
-    #print(f"sysex_data = {sysex_data}")
-
-    return Message('sysex', data=sysex_data)
-
-def cc_2nd_sysex(control, value, channel):
-    high_data = 0
-    low_data = 0
-    
-    # Convert CC value to separate byte-split-and-swapped values
-    #print(f"CC#, Value: {control},{value}")
-
-    sysex_data = [0x43]                     # Yamaha FB-01 manufacturer ID
-    sysex_data += [0x75]                    # Sub-status
-    sysex_data += [System.Channel]          # System channel number (1 by default)
-    
-    match channel:
-        case 0 | 8 | 9 | 10 | 11 | 12 | 13 | 14 | 15:
-            sysex_data += [0x18]                    # Instrument number (1)
-        case 1:
-            sysex_data += [0x19]                    # Instrument number (2)
-        case 2:
-            sysex_data += [0x1A]                    # Instrument number (3)
-        case 3:
-            sysex_data += [0x1B]                    # Instrument number (4)
-        case 4:
-            sysex_data += [0x1C]                    # Instrument number (5)
-        case 5:
-            sysex_data += [0x1D]                    # Instrument number (6)
-        case 6:
-            sysex_data += [0x1E]                    # Instrument number (7)
-        case 7:
-            sysex_data += [0x1F]                    # Instrument number (8)
-    
-    opOffset = [0,16,35,51]
-    
-    for i in opOffset:
-        # Op Multi and DT2 (Fine) -- PART TWO of two separate sysex messages
-        if control == 39 + i:
-            if 0 <= value <= 63:
-                _, high_data = freq_table[value]
-            match i:
-                case 0: # Voice parameter ($6E = Op1 DT2 and D2R)
-                    sysex_data += [0x6E]
-                    high_data |= NewVoice.Op1.DT2_D2R[1] & 0b0001
-                    low_data = NewVoice.Op1.DT2_D2R[0]
-                    if NewVoice.Op1.DT2_D2R[1] != high_data:
-                        NewVoice.Op1.DT2_D2R[1] = high_data
-                case 16: # Voice parameter ($66 = Op2 DT2 and D2R)
-                    sysex_data += [0x66]
-                    high_data |= NewVoice.Op2.DT2_D2R[1] & 0b0001
-                    low_data = NewVoice.Op2.DT2_D2R[0]
-                    if NewVoice.Op2.DT2_D2R[1] != high_data:
-                        NewVoice.Op2.DT2_D2R[1] = high_data
-                case 35: # Voice parameter ($5E = Op3 DT2 and D2R)
-                    sysex_data += [0x5E]
-                    high_data |= NewVoice.Op3.DT2_D2R[1] & 0b0001
-                    low_data = NewVoice.Op3.DT2_D2R[0]
-                    if NewVoice.Op3.DT2_D2R[1] != high_data:
-                        NewVoice.Op3.DT2_D2R[1] = high_data
-                case 51: # Voice parameter ($56 = Op4 DT2 and D2R)
-                    sysex_data += [0x56]
-                    high_data |= NewVoice.Op4.DT2_D2R[1] & 0b0001
-                    low_data = NewVoice.Op4.DT2_D2R[0]
-                    if NewVoice.Op4.DT2_D2R[1] != high_data:
-                        NewVoice.Op4.DT2_D2R[1] = high_data
-    
-    sysex_data += [low_data, high_data]
-    
-    f_control = str(control).zfill(3)
-    f_value = str(value).zfill(3)
-    hex_sysex_data = ' '.join(f'{byte:02X}' for byte in sysex_data)
-    print(Style.BRIGHT + Fore.BLUE + "2nd sysex:" + Style.RESET_ALL + Fore.RED + "F0 " + Fore.RESET + Style.BRIGHT + f"{hex_sysex_data} " + Style.RESET_ALL + Fore.RED + "F7" + Style.RESET_ALL)
-    
-    return Message('sysex', data=sysex_data)
-
-try:
-    #voicebuffer = get_voice()
-    #print(f"voicebuffer ({len(voicebuffer)}) = {voicebuffer}")
-    #VoiceData.LFOLoad = voicebuffer[2] >> 3
-    #VoiceData.AMD = ((voicebuffer[2] << 4) & 0x70) | voicebuffer[1]
-    
-    print("Listening for MIDI messages. Press Ctrl+C to quit.\n\n CC/Val | Sysex String\n=======================")
-
-    while True:
-    # Listen for control change messages
-        for msg in input_port.iter_pending():
-            if msg.type == 'control_change':
-                match msg.control:
-                    # Pre-implemented controller events
-                    case 1 | 2 | 4 | 5 | 7 | 10 | 64 | 65 | 66 | 123 | 126 | 127:
-                        output_port.send(msg)
-                        print(f"Passing through already implemented CC: {msg}")
-                    # Multi-sysex controlled events
-                    case 39 | 55 | 74 | 90:
-                        sysex_msg = cc_to_sysex(msg.control, msg.value, msg.channel)
-                        sysex_msg2 = cc_2nd_sysex(msg.control, msg.value, msg.channel)
-                        if len(sysex_msg.data) == 7:
-                            output_port.send(sysex_msg)
-                            #print(f"Translated CC {msg.control} with value {msg.value} to Sysex: {sysex_msg}")
-                        else:
-                            print("Invalid sysex length.")
-                        if len(sysex_msg2.data) == 7:
-                            output_port.send(sysex_msg2)
-                            #print(f"Translated CC {msg.control} with value {msg.value} to Sysex: {sysex_msg2}")
-                        else:
-                            print("Invalid sysex length.")
-                    # Normal single-sysex controlled events
-                    case _:
-                        sysex_msg = cc_to_sysex(msg.control, msg.value, msg.channel)
-                        #print(f"{len(sysex_msg.data)}")
-                        if 6 <= len(sysex_msg.data) <= 7:
-                            output_port.send(sysex_msg)
-                            #print(f"Translated CC {msg.control} with value {msg.value} to SysEx: {sysex_msg}")
-                            #time.sleep(1)
-                            #voicebuffer = get_voice()
-                        else:
-                            print("Invalid sysex length.")
-            else:
-                output_port.send(msg)
-                print(f"Passing through: {msg}")
-
-        time.sleep(0.01)  # Small delay to prevent 100% CPU usage
-
-except KeyboardInterrupt:
-    print("Script interrupted by user.")
-
-finally:
-    output_port.send(mido.Message('control_change', control=123, value=0))
-    print("All Notes Off message sent.")
-    input_port.close()
-    output_port.close()
-    return_port.close()
-    print("MIDI ports closed.")
+# Yamaha FB-01 CC to SysEx conversion script
+# Version 1.0
+# by Brandon Blume, Nov 13, 2024
+# shine62 _AT= gmail )DOT{ calm
+#
+# This script reads MIDI message from an input port and passes them through to an output port. If CC
+# messages are sent through that correspond to the (currently hardcoded) mapped CCs for setting voice,
+# instrument, config, or system data parameters on the FB-01 it will convert the values of those
+# intercepted CC messages into the proper sysex messages.
+#
+# CURRENT STATE:
+#
+# This script is currently still unfinished. Its basic functions work (please report any bugs if you run 
+# into any!) but further plans include sending an initial dump request for the currently selected voice
+# on the FB-01 so that you can modify any voice you currently have already. Right now it will start with a
+# default blank slate "INIT" voice but there isn't currently any implementation to let the FB-01 know that 
+# either. Which means any modifications to parameters will be done in context with the "INIT" voice and you 
+# could see parameters reset to zero (or whatever I set the defaults to) that share sysex messages with 
+# other parameters that you modify. Meaning you'll have to set those again. Implementing a voice dump 
+# request from the FB-01 means that there would need to be two MIDI input ports; one for the MIDI controller 
+# and one to act as the return port for dumps from the FB-01.
+#
+# I also want to dedicate a MIDI CC# to manually triggering a dump from the FB-01 at any time and another
+# CC# for sending the default blank slate "INIT" instrument to the FB-01 to guarantee that everything is
+# in sync. There's no checking for any of this currently.
+#
+# The default map for CC numbers to FB-01 parameter change sysex messages is listed below. It is read from
+# fb01_mapping.json at startup; use --mapping to load your own assignments instead.
+# CC's that the FB-01 already understands are marked with square brackets "[]". They are not converted and
+# are passed "thru" without any additional processing directly to the FB-01. Notes and other MIDI messages 
+# are also sent "thru" unchanged.
+#
+# CC #     |        FB-01 Parameter Sysex Message          |     Value range
+# CC   0      System: Memory Protect (toggle)                  0 / 127 (0=off, 127=on)
+# CC  [1]     [Mod Wheel]                                      0 ~ 127
+# CC  [2]     [Breath]                                         0 ~ 127
+# CC   3      Config: Combine Mode (toggle)                    0 / 127 (0=off, 127=on)
+# CC  [4]     [Foot Controller]                                0 ~ 127
+# CC  [5]     [Portamento Time]                                0 ~ 127
+# CC   6      Config: Name (Char #1)                           0 ~ 127
+# CC  [7]     [Channel Volume]                                 0 ~ 127
+# CC   8      Config: Name (Char #2)                           0 ~ 127 (--library: save voice to the library, 127)
+# CC   9      Config: Name (Char #3)                           0 ~ 127 (--library: recall patch # on the page)
+# CC [10]     [Pan]                                            0 / 63 / 127 (0=L, 64=LR, 127=R)
+# CC  11      Config: Name (Char #4)                           0 ~ 127 (--library: patch page)
+# CC  12      Undo (the last knob turn)                        127
+# CC  13      Redo                                             127
+# CC  14      Voice: Sync voice to the FB-01                   127 (parameter changes or one dump, fewer bytes)
+# CC  15      Config: Name (Char #8)                           0 ~ 127
+# CC  16      Voice: Load LFO                                  0 / 127 (0=off, 127=on)
+# CC  17      Voice: AMD                                       0 ~ 127
+# CC  18      Voice: LFO Sync to Note On (toggle)              0 / 127 (0=off, 127=on)
+# CC  19      Voice: PMD                                       0 ~ 127
+# CC  20      Voice: Toggle Operator 1                         0 / 127 (0=off, 127=on)
+# CC  21      Voice: Toggle Operator 2                         0 / 127 (0=off, 127=on)
+# CC  22      Voice: Toggle Operator 3                         0 / 127 (0=off, 127=on)
+# CC  23      Voice: Toggle Operator 4                         0 / 127 (0=off, 127=on)
+# CC  24      Voice: Set Algorithm                             0 ~ 7
+#                                                                     0 = 4 -> 3 -> 2 -> 1
+#                                                                     1 = (4+3) -> 2 -> 1
+#                                                                     2 = (4+(3 -> 2)) -> 1
+#                                                                     3 = ((4 -> 3) +2) ->1
+#                                                                     4 = (4 -> 3) + (2 -> 1)
+#                                                                     5 = 4 -> (3+2+1)
+#                                                                     6 = (4 -> 3)+2+1
+#                                                                     7 = 4+3+2+1
+# CC  25      Voice: Feedback Level                            0 ~ 7
+# CC  26      Voice: PMS                                       0 ~ 7
+# CC  27      Voice: AMS                                       0 ~ 3
+# CC  28      Voice: Set LFO Waveform                          0 ~ 3 (0=Saw, 1=Sqr, 2=Tri, 3=Noise)
+# CC  29      Voice: PMD Assign                                0 ~ 4 (0=None, 1=Aftertouch, 2=Mod Wheel, 3=Breath, 4=Foot Controller)
+# CC  30      Voice: Transpose                                 -128 ~ +127 (signed, technically the values can be 0 ~ 255 but since CC values onyl go to 127 this script is programmed to interpret CC values 0 ~ 24 as "-24 ~ -1" and 25 ~ 49 as "0 ~ +24")
+# CC  31      Voice: Pitch Bend Range                          0 ~ 12
+# CC  32      Op1: TL (Total Level)                            0 ~ 127
+# CC  33      Op1: Key Height/TL scaling type (-/+)            0 / 127 (0=off, 127=on)
+# CC  34      Op1: Key Height/TL scaling type (Lin/Exp)        0 / 127 (0=off, 127=on)
+# CC  35      Op1: Key Velocity/TL sensitivity                 0 ~ 7
+# CC  36      Op1: Key Height/Envelope Lvl scaling dpth        0 ~ 15
+# CC  37      Op1: TL Fine Adjust                              0 ~ 15
+# CC  38      Op1: Detune 1 (Coarse)                           0 ~ 7 (0 & 4=0, 1~3 = -3 ~ -1, 5~7 = +1 ~ +3)
+# CC  39      Op1: Freq Multiplier/Detune 2 (Fine)             0 ~ 63 (see Multi/DT2 Tuple table below for CC value/freq multiple reference)
+# CC  40      Op1: Key Height/Envelope Rt scaling dpth         0 ~ 3
+# CC  41      Op1: AR (Attack Rate)                            0 ~ 31
+# CC  42      Op1: Toggle AM (Amplitude Modulation)            0 / 127 (0=off, 127=on)
+# CC  43      Op1: Key Velocity/Attack Rate sensitivity        0 ~ 3
+# CC  44      Op1: D1R (Decay 1 Rate)                          0 ~ 31
+# CC  45      Op1: D2R (Decay 2 Rate)                          0 ~ 31
+# CC  46      Op1: SL (Sustain Level)                          0 ~ 15
+# CC  47      Op1: RR (Release Rate)                           0 ~ 15
+# CC  48      Op2: TL (Total Level)                            0 ~ 127
+# CC  49      Op2: Key Height/TL scaling type (-/+)            0 / 127 (0=off, 127=on)
+# CC  50      Op2: Key Height/TL scaling type (Lin/Exp)        0 / 127 (0=off, 127=on)
+# CC  51      Op2: Key Velocity/TL sensitivity                 0 ~ 7
+# CC  52      Op2: Key Height/Envelope Lvl scaling dpth        0 ~ 15
+# CC  53      Op2: TL Fine Adjust                              0 ~ 15
+# CC  54      Op2: Detune 1 (Coarse)                           0 ~ 7
+# CC  55      Op2: Freq Multi/Detune 2 (Fine)                  0 ~ 63 (see Multi/DT2 Tuple table below for CC value/freq multiple reference)
+# CC  56      Op2: Key Height/Envelope Rt scaling dpth         0 ~ 15
+# CC  57      Op2: AR (Attack Rate)                            0 ~ 31
+# CC  58      Op2: Toggle AM (Amplitude Modulation)            0 / 127 (0=off, 127=on)
+# CC  59      Op2: Key Velocity/Attack Rate sensitivity        0 ~ 3
+# CC  60      Op2: D1R (Decay 1 Rate)                          0 ~ 31
+# CC  61      Op2: D2R (Decay 2 Rate)                          0 ~ 31
+# CC  62      Op2: SL (Sustain Level)                          0 ~ 15
+# CC  63      Op2: RR (Release Rate)                           0 ~ 15
+# CC [64]     [Damper Pedal on/off (Sustain)]                  0 / 127 (0=off, 127=on)
+# CC [65]     [Portamento on/off              ]                0 / 127 (0=off, 127=on)
+# CC [66]     [Sostenuto on/off]                               0 / 127 (0=off, 127=on)
+# CC  67      Op3: TL (Total Level)                            0 ~ 127
+# CC  68      Op3: Key Height/TL scaling type (-/+)            0 / 127 (0=off, 127=on)
+# CC  69      Op3: Key Height/TL scaling type (Lin/Exp)        0 / 127 (0=off, 127=on)
+# CC  70      Op3: Key Velocity/TL sensitivity                 0 ~ 7
+# CC  71      Op3: Key Height/Envelope Lvl scaling dpth        0 ~ 15
+# CC  72      Op3: TL Fine Adjust                              0 ~ 15
+# CC  73      Op3: Detune 1 (Coarse)                           0 ~ 7
+# CC  74      Op3: Freq Multiplier/Detune 2 (Fine)             0 ~ 63
+# CC  75      Op3: Key Height/Envelope Rt scaling dpth         0 ~ 15
+# CC  76      Op3: AR (Attack Rate)                            0 ~ 31
+# CC  77      Op3: Toggle AM (Amplitude Modulation)            0 / 127 (0=off, 127=on)
+# CC  78      Op3: Key Velocity/Attack Rate sensitivity        0 ~ 3
+# CC  79      Op3: D1R (Decay 1 Rate)                          0 ~ 31
+# CC  80      Op3: D2R (Decay 2 Rate)                          0 ~ 31
+# CC  81      Op3: SL (Sustain Level)                          0 ~ 15
+# CC  82      Op3: RR (Release Rate)                           0 ~ 15
+# CC  83      Op4: TL (Total Level)                            0 ~ 127
+# CC  84      Op4: Key Height/TL scaling type (-/+)            0 / 127 (0=off, 127=on)
+# CC  85      Op4: Key Height/TL scaling type (Lin/Exp)        0 / 127 (0=off, 127=on)
+# CC  86      Op4: Key Velocity/TL sensitivity                 0 ~ 7
+# CC  87      Op4: Key Height/Envelope Lvl scaling dpth        0 ~ 15
+# CC  88      Op4: TL Fine Adjust                              0 ~ 15
+# CC  89      Op4: Detune 1 (Coarse)                           0 ~ 7
+# CC  90      Op4: Freq Multiplier/Detune 2 (Fine)             0 ~ 63
+# CC  91      Op4: Key Height/Envelope Rt scaling dpth         0 ~ 15
+# CC  92      Op4: AR (Attack Rate)                            0 ~ 31
+# CC  93      Op4: Toggle AM (Amplitude Modulation)            0 / 127 (0=off, 127=on)
+# CC  94      Op4: Key Velocity/Attack Rate sensitivity        0 ~ 3
+# CC  95      Op4: D1R (Decay 1 Rate)                          0 ~ 31
+# CC  96      Op4: D2R (Decay 2 Rate)                          0 ~ 31
+# CC  97      Op4: SL (Sustain Level)                          0 ~ 15
+# CC  98      Op4: RR (Release Rate)                           0 ~ 15
+# CC  99      Inst: # of notes                                 0 ~ 8
+# CC 100      Inst: MIDI Channel                               0 ~ 15
+# CC 101      Inst: KC Limit/L                                 0 ~ 127
+# CC 102      Inst: KC Limit/H                                 0 ~ 127
+# CC 103      Inst: Voice Bank                                 0 ~ 6
+# CC 104      Inst: Voice #                                    0 ~ 47
+# CC 105      Inst: Detune                                     0 ~ 127
+# CC 106      Inst: Octave Transpose                           0 ~ 4 (-2 ~ +2)
+# CC 107      Inst: Output Level                               0 ~ 127
+# CC 108      Inst: Pan (L, L+R, R)                            0 ~ 127 (0=L, 64=LR, 127=R)
+# CC 109      Inst: LFO Enable                                 0 / 127 (0=off, 127=on)
+# CC 110      Inst: Pitch Bend Range                           0 ~ 12
+# CC 111      System: Config Number                            0 ~ 19
+# CC 112      System: Channel Number                           0 ~ 15
+# CC 113      System: Master Detune                            0 ~ 127 (0~63 = 0~63, 64~127 = -64 ~ -1)
+# CC 114      Voice: Send voice data to the FB-01 (bulk)       127 (sends the channel's instrument voice)
+# CC 115      Voice: LFO Speed                                 Relative Binary Offset (64 = 0, 64 + x = +x, 64 -x = -x)
+# CC 116      Voice: Name (Char #1)                            0 ~ 127
+# CC 117      Voice: Name (Char #2)                            0 ~ 127
+# CC 118      Voice: Name (Char #3)                            0 ~ 127
+# CC 119      Voice: Name (Char #4)                            0 ~ 127
+# CC 120      Voice: Name (Char #5)                            0 ~ 127
+# CC 121      Voice: Name (Char #6)                            0 ~ 127
+# CC 122      Voice: Name (Char #7)                            0 ~ 127
+# CC[123]     [All Notes Off]                                  0 / 127 (0=off, 127=on)
+# CC 124      Voice: User Code                                 Relative Binary Offset (64 = 0, 64 + x = +x, 64 -x = -x)
+# CC 125      System: Master Output Level                      0 ~ 127
+# CC[126]     [Mono Mode on/Poly off/All Notes Off]            1
+# CC[127]     [Poly Mode on/Mono off/All Notes Off]            0
+
+import time
+Started = time.perf_counter()               # Startup reference for the time-to-first-message report
+import mido
+from mido import Message
+import argparse
+import collections
+import hashlib
+import json
+import os
+import queue
+import signal
+import struct
+import sys
+import re
+import threading
+import zlib
+
+rtmidi = None                               # python-rtmidi, imported for --raw only
+
+# Tuple lookup table to determine linear consecutive frequencies for Multi/DT2 combined sysex messages (16 x 4)
+freq_table = [
+# Multi/DT2 Bytes   CC Value   Resulting Freq Multiple
+    (0x00, 0x00),    #  0        x0.50
+    (0x00, 0x04),    #  1        x0.71
+    (0x00, 0x08),    #  2        x0.78
+    (0x00, 0x0C),    #  3        x0.87
+    (0x01, 0x00),    #  4        x1.00
+    (0x01, 0x04),    #  5        x1.41
+    (0x01, 0x08),    #  6        x1.57
+    (0x01, 0x0C),    #  7        x1.73
+    (0x02, 0x00),    #  8        x2.00
+    (0x02, 0x04),    #  9        x2.82
+    (0x03, 0x00),    # 10        x3.00
+    (0x02, 0x08),    # 11        x3.14
+    (0x02, 0x0C),    # 12        x3.46
+    (0x04, 0x00),    # 13        x4.00
+    (0x03, 0x04),    # 14        x4.24
+    (0x03, 0x08),    # 15        x4.71
+    (0x05, 0x00),    # 16        x5.00
+    (0x03, 0x0C),    # 17        x5.19
+    (0x04, 0x04),    # 18        x5.65
+    (0x06, 0x00),    # 19        x6.00
+    (0x04, 0x08),    # 20        x6.28
+    (0x04, 0x0C),    # 21        x6.92
+    (0x07, 0x00),    # 22        x7.00
+    (0x05, 0x04),    # 23        x7.07
+    (0x05, 0x08),    # 24        x7.85
+    (0x08, 0x00),    # 25        x8.00
+    (0x06, 0x04),    # 26        x8.48
+    (0x05, 0x0C),    # 27        x8.65
+    (0x09, 0x00),    # 28        x9.00
+    (0x06, 0x08),    # 29        x9.42
+    (0x07, 0x04),    # 30        x9.89
+    (0x0A, 0x00),    # 31        x10.00
+    (0x06, 0x0C),    # 32        x10.38
+    (0x07, 0x08),    # 33        x10.99
+    (0x0B, 0x00),    # 34        x11.00
+    (0x08, 0x04),    # 35        x11.30
+    (0x0C, 0x00),    # 36        x12.00
+    (0x07, 0x0C),    # 37        x12.11
+    (0x08, 0x08),    # 38        x12.56
+    (0x09, 0x04),    # 39        x12.72
+    (0x0D, 0x00),    # 40        x13.00
+    (0x08, 0x0C),    # 41        x13.84
+    (0x0E, 0x00),    # 42        x14.00
+    (0x0A, 0x04),    # 43        x14.10
+    (0x09, 0x08),    # 44        x14.13
+    (0x0F, 0x00),    # 45        x15.00
+    (0x0B, 0x04),    # 46        x15.55
+    (0x09, 0x0C),    # 47        x15.57
+    (0x0A, 0x08),    # 48        x15.70
+    (0x0C, 0x04),    # 49        x16.96
+    (0x0B, 0x08),    # 50        x17.27
+    (0x0A, 0x0C),    # 51        x17.30
+    (0x0D, 0x04),    # 52        x18.37
+    (0x0C, 0x08),    # 53        x18.84
+    (0x0B, 0x0C),    # 54        x19.03
+    (0x0E, 0x04),    # 55        x19.78
+    (0x0D, 0x08),    # 56        x20.41
+    (0x0C, 0x0C),    # 57        x20.76
+    (0x0F, 0x04),    # 58        x21.20
+    (0x0E, 0x08),    # 59        x21.98
+    (0x0D, 0x0C),    # 60        x22.49
+    (0x0F, 0x08),    # 61        x23.55
+    (0x0E, 0x0C),    # 62        x24.22
+    (0x0F, 0x0C),    # 63        x25.95
+]
+
+class SystemData: # System Functions
+    # Sysex parameter number -> attribute
+    Params = {0x20: 'Channel', 0x21: 'MemProtect', 0x22: 'ConfigNum', 0x23: 'Detune', 0x24: 'TL'}
+
+    def __init__(self):
+        self.Channel = 0
+        self.MemProtect = 0
+        self.ConfigNum = 0 # 0 ~ 19
+        self.Detune = 0 # Master detune (not documented), 0 ~ 63 = 0 ~ +63, 64 ~ 127 = -64 ~ -1
+        self.TL = 127
+
+        self.Config = self.ConfigData()
+
+    def get_byte(self, address):
+        return getattr(self, self.Params[address])
+
+    def set_byte(self, address, data):
+        setattr(self, self.Params[address], data)
+
+    class ConfigData: # Configuration block
+        def __init__(self):
+            namestring = "InitConf"
+            self.Name = bytearray(namestring, "ascii")
+            self.Combine = 0 # When on, Global config for last selected voice replaces Inst configuration
+            self.LFOSpeed = 100
+            self.AMD = 0
+            self.PMD = 39
+            self.Waveform = 2 # 0 = Saw, 1 = Square, 2 = Triangle, 3 = Noise
+            self.KeyReceive = 0 # 0 = ALL, 1 = EVEN, 2 = ODD
+
+        # Parameters $00 ~ $07 are the name characters, $08 is Combine Mode
+        def get_byte(self, address):
+            if address < 8:
+                return self.Name[address]
+            return self.Combine
+
+        def set_byte(self, address, data):
+            if address < 8:
+                self.Name[address] = data
+            else:
+                self.Combine = data
+
+class InstData: # Init inst parameters
+    # Sysex parameter number -> attribute
+    Params = {0x00: 'Notes', 0x01: 'Channel', 0x02: 'KCLimitH', 0x03: 'KCLimitL', 0x04: 'Bank', 0x05: 'Voice',
+              0x06: 'Detune', 0x07: 'Octave', 0x08: 'Output', 0x09: 'Pan', 0x0A: 'LFOEnable', 0x0B: 'PortTime',
+              0x0C: 'BendRange', 0x0D: 'Poly', 0x0E: 'PMDAssign'}
+
+    def __init__(self, inst=0):
+        self.Notes = 8 # 8 notes default (max)
+        self.Channel = inst # Inst 1 on channel 1, inst 2 on channel 2, ...
+        self.KCLimitL = 0
+        self.KCLimitH = 127
+        self.Bank = 0 # max 7 (0 ~ 6)
+        self.Voice = 0 # max 48 (0 ~ 47)
+        self.Detune = 0 # 0 ~ 63 = positive, 64 ~ 127 = negative
+        self.Octave = 2 # 0 ~ 4 (0 = -2, 1 = -1, 2 = 0, 3 = +1, 4 = +2)
+        self.Output = 127
+        self.Pan = 64 # 0 = L, 64 = C, 127 = R
+        self.LFOEnable = 1 # 0 = PMS and AMS disabled, 1 = Use PMS and AMS from Voice Data
+        self.PortTime = 0
+        self.BendRange = 2 # 0 ~ 12 (semitones)
+        self.Poly = 1
+        self.PMDAssign = 0 # 0 ~ 4 (None, Aftertouch, Mod Wheel, Breath, Foot)
+
+    def get_byte(self, address):
+        return getattr(self, self.Params[address])
+
+    def set_byte(self, address, data):
+        setattr(self, self.Params[address], data)
+
+# Init voice parameters, laid out like the FB-01 voice data block (byte n = voice parameter $40 + n)
+VOICE_SIZE = 64
+operator_init = bytes([
+    0x7F,   # TL set to 127 (min) by default
+    0x00,   # KeyLvlType bit #0 (positive/negative) and TLVel
+    0x00,   # KeyLvlDepth and TLFine
+    0x01,   # Multi set to 1 by default, KeyLvlType bit #1 (lin/exp) set to 0, and DT1 set to 0
+    0x1F,   # AR set to 31 by default (fastest), KeyEnvRt set to 0
+    0x00,   # AM, ARVel, and D1R
+    0x00,   # DT2 set to 0 by default (no modifying), D2R set to 0 by default (longest)
+    0x0F,   # SL set to 0 by default (longest/constant), RR set to 15 by default (fastest)
+])
+init_voice = bytes(
+    b"init   "                      # $40 ~ $46: Name
+    + bytes([
+        0x00,                       # $47: User code
+        0xC8,                       # $48: LFO Speed, 200 by default
+        0x00,                       # $49: LFO Load and AMD
+        0x00,                       # $4A: LFO Sync and PMD
+        0x40,                       # $4B: Operator enable, Op1 enabled by default
+        0x00,                       # $4C: Feedback and Algorithm
+        0x30,                       # $4D: PMS and AMS
+        0x00,                       # $4E: LFO waveform
+        0x00,                       # $4F: Transpose
+    ])
+    + operator_init                 # $50 ~ $57: Op4
+    + operator_init                 # $58 ~ $5F: Op3
+    + operator_init                 # $60 ~ $67: Op2
+    + bytes([0x00]) + operator_init[1:]     # $68 ~ $6F: Op1, TL set to 0 (max) by default
+    + bytes(10)                     # $70 ~ $79: Unused
+    + bytes([
+        0x00,                       # $7A: Poly mode and Portamento time
+        0x00,                       # $7B: PMD controller assign and Pitch bend range
+    ])
+    + bytes(4)                      # $7C ~ $7F: Unused
+)
+
+class VoiceData: # One instrument's voice data (a 64 byte view into the VoiceBank buffer)
+    def __init__(self, data):
+        self.Data = data
+        self.Op1 = self.Operator(data, 0x28)
+        self.Op2 = self.Operator(data, 0x20)
+        self.Op3 = self.Operator(data, 0x18)
+        self.Op4 = self.Operator(data, 0x10)
+
+    def get_byte(self, address):
+        return self.Data[address - 0x40]
+
+    def set_byte(self, address, data):
+        self.Data[address - 0x40] = data
+
+    # Typed field accessors (Algorithm, AMD, ...) are added from the parameter table below
+
+    @property
+    def Name(self):
+        return bytes(self.Data[0:7]).decode("ascii", "replace")
+
+    @Name.setter
+    def Name(self, name):
+        self.Data[0:7] = name.encode("ascii", "replace")[:7].ljust(7)
+
+    def dump(self): # The voice image itself, ready to be nibblized or stored
+        return self.Data
+
+    def load(self, image):
+        self.Data[:] = image
+
+    def digest(self):
+        return zlib.crc32(self.Data)
+
+    def diff(self, other): # Voice parameter numbers ($40 ~ $7F) whose bytes differ from another voice image
+        mine = self.Data
+        theirs = other.Data if isinstance(other, VoiceData) else other
+        if mine == theirs:
+            return
+        for n in range(VOICE_SIZE):
+            if mine[n] != theirs[n]:
+                yield 0x40 + n
+
+    class Operator: # One operator's 8 bytes inside the voice image
+        def __init__(self, data, offset):
+            self.Data = data
+            self.Offset = offset
+
+class VoiceBank: # Voice data for all 8 instruments in one preallocated buffer
+    def __init__(self):
+        self.Buffer = bytearray(init_voice * 8)
+        view = memoryview(self.Buffer)
+        self.Voices = [VoiceData(view[n * VOICE_SIZE:(n + 1) * VOICE_SIZE]) for n in range(8)]
+
+    def __getitem__(self, inst):
+        return self.Voices[inst]
+
+class Device: # One FB-01 (or other MIDI output): its parameter state, its output and its queued work
+    def __init__(self, name="FB-01", translate=True):
+        self.Name = name
+        self.Translate = translate          # False = plain MIDI output, CCs are passed on instead of translated
+        self.System = SystemData()
+        self.Insts = [InstData(n) for n in range(8)]
+        self.Voices = VoiceBank()
+        self.Believed = VoiceBank()         # What the FB-01 has, as far as what was sent and received tells
+        self.Known = [False] * 8            # Believed voice is certain (after a voice dump either way)
+        self.Syncs = 0
+        self.SyncBytes = 0                  # Bytes the voice syncs sent
+        self.DumpBytes = 0                  # ... and what full dumps would have taken
+        self.Port = None                    # Where its messages go (output port, or the OutputLanes in front of it)
+        self.Lanes = None                   # OutputLanes in front of the output port (--no-lanes = None)
+        self.Coalescer = None
+        self.Fetcher = None
+        self.ReturnPort = None
+        self.Output = None                  # Output port name
+        self.ReturnPattern = None           # Name or pattern of the return port for --fetch-voices
+
+    def attach(self, port, window=0):
+        self.Port = port
+        self.Coalescer = SysexCoalescer(port, window)
+        self.Coalescer.Believed = self.Believed
+        self.Coalescer.VoiceChanged = self.voice_changed
+        self.Fetcher = VoiceFetcher(self)
+
+    def voice_changed(self, inst): # The FB-01 loaded another voice into the instrument ($18 ~ $1F)
+        self.Coalescer.forget(inst) # Its voice bytes are new, the values sent last no longer say what it has
+        self.Known[inst & 0x07] = False     # ... and neither does the believed voice, the next sync is a dump
+
+    def reset(self): # Back to the power-on INIT state, keeping the objects the routing tables point at
+        config = self.System.Config
+        self.System.__init__()
+        config.__init__()
+        self.System.Config = config
+        for inst, data in enumerate(self.Insts):
+            data.__init__(inst)
+        self.Voices.Buffer[:] = init_voice * 8
+        self.Believed.Buffer[:] = init_voice * 8
+        self.Known[:] = [False] * 8
+
+    def timeout(self): # Seconds until the next queued sysex, coalescer flush or dump request is due (None = idle)
+        timeouts = [self.Coalescer.timeout()]
+        if self.Fetcher.Pending:
+            timeouts.append(self.Fetcher.timeout())
+        if self.Lanes is not None and self.Lanes.Editing:
+            timeouts.append(self.Lanes.timeout())
+        timeouts = [timeout for timeout in timeouts if timeout is not None]
+        return min(timeouts) if timeouts else None
+
+    def service(self): # Run whatever of the above is due
+        if self.Coalescer.timeout() == 0:
+            self.Coalescer.flush()
+        if self.Fetcher.Pending and self.Fetcher.timeout() == 0:
+            self.Fetcher.check()
+        if self.Lanes is not None and self.Lanes.Editing:
+            self.Lanes.pump()
+
+    def __str__(self):
+        return self.Name
+
+Devices = [Device()]
+
+# State of the first device, which is the only one unless --route adds more
+System = Devices[0].System
+Insts = Devices[0].Insts
+Voices = Devices[0].Voices
+
+# Parameter change targets. System and Configuration parameters are addressed with $10, Instrument and
+# Voice parameters with the instrument number ($18 ~ $1F).
+SYSTEM = 0
+CONFIG = 1
+INST = 2
+VOICE = 3
+
+# Routing: for each MIDI channel the device it goes to and the instrument it plays there (see route()).
+# By default channels 1~8 = insts 1~8 and channels 9~16 = inst 1 of the first device.
+channel_device = [Devices[0]] * 16
+inst_index = [0, 1, 2, 3, 4, 5, 6, 7] + [0] * 8
+inst_num = [0x18 + inst for inst in inst_index]
+
+# State objects that hold each target's parameters, for each MIDI channel
+owners = [(System, System.Config, Insts[inst], Voices[inst]) for inst in inst_index]
+
+def reset_state():
+    for device in Devices:
+        device.reset()
+
+class Param: # FB-01 parameter: its sysex parameter number and the bit field it occupies in that byte
+    def __init__(self, target, address, shift=0, bits=7, hi=None):
+        self.Target = target
+        self.Address = address                      # Sysex parameter number
+        self.Shift = shift                          # Position of the field's lowest bit
+        self.Mask = (1 << bits) - 1                 # Field mask (unshifted)
+        self.Clear = 0xFF ^ (self.Mask << shift)    # Byte mask that clears the field
+        self.Lo = 0
+        self.Hi = self.Mask if hi is None else hi   # Highest value the FB-01 accepts
+        self.Nibbles = target == VOICE              # Voice parameters are sent as 2 nibblized data bytes
+
+# Every FB-01 parameter by name. Several parameters can share one sysex parameter number (and byte).
+params = {
+    'System.Channel':       Param(SYSTEM, 0x20, hi=15),
+    'System.MemProtect':    Param(SYSTEM, 0x21, bits=1),
+    'System.ConfigNum':     Param(SYSTEM, 0x22, hi=19),
+    'System.Detune':        Param(SYSTEM, 0x23),
+    'System.TL':            Param(SYSTEM, 0x24),
+    'Config.Combine':       Param(CONFIG, 0x08, bits=1),
+    'Inst.Notes':           Param(INST, 0x00, hi=8),
+    'Inst.Channel':         Param(INST, 0x01, hi=15),
+    'Inst.KCLimitH':        Param(INST, 0x02),
+    'Inst.KCLimitL':        Param(INST, 0x03),
+    'Inst.Bank':            Param(INST, 0x04, hi=6),
+    'Inst.Voice':           Param(INST, 0x05, hi=47),
+    'Inst.Detune':          Param(INST, 0x06),
+    'Inst.Octave':          Param(INST, 0x07, hi=4),
+    'Inst.Output':          Param(INST, 0x08),
+    'Inst.Pan':             Param(INST, 0x09),
+    'Inst.LFOEnable':       Param(INST, 0x0A, bits=1),
+    'Inst.PortTime':        Param(INST, 0x0B),
+    'Inst.BendRange':       Param(INST, 0x0C, hi=12),
+    'Inst.Poly':            Param(INST, 0x0D, bits=1),
+    'Inst.PMDAssign':       Param(INST, 0x0E, hi=4),
+    'Voice.UserCode':       Param(VOICE, 0x47, bits=8),
+    'Voice.LFOSpeed':       Param(VOICE, 0x48, bits=8),
+    'Voice.LFOLoad':        Param(VOICE, 0x49, shift=7, bits=1),
+    'Voice.AMD':            Param(VOICE, 0x49),
+    'Voice.LFOSync':        Param(VOICE, 0x4A, shift=7, bits=1),
+    'Voice.PMD':            Param(VOICE, 0x4A),
+    'Voice.Op1Enable':      Param(VOICE, 0x4B, shift=6, bits=1),
+    'Voice.Op2Enable':      Param(VOICE, 0x4B, shift=5, bits=1),
+    'Voice.Op3Enable':      Param(VOICE, 0x4B, shift=4, bits=1),
+    'Voice.Op4Enable':      Param(VOICE, 0x4B, shift=3, bits=1),
+    'Voice.Feedback':       Param(VOICE, 0x4C, shift=3, bits=3),
+    'Voice.Algorithm':      Param(VOICE, 0x4C, bits=3),
+    'Voice.PMS':            Param(VOICE, 0x4D, shift=4, bits=3),
+    'Voice.AMS':            Param(VOICE, 0x4D, bits=2),
+    'Voice.Waveform':       Param(VOICE, 0x4E, shift=5, bits=2),
+    'Voice.Transpose':      Param(VOICE, 0x4F, bits=8),
+    'Voice.Poly':           Param(VOICE, 0x7A, shift=7, bits=1),
+    'Voice.PortTime':       Param(VOICE, 0x7A),
+    'Voice.PMDAssign':      Param(VOICE, 0x7B, shift=4, bits=3, hi=4),
+    'Voice.BendRange':      Param(VOICE, 0x7B, bits=4, hi=12),
+}
+for n in range(8):
+    params[f'Config.Name{n + 1}'] = Param(CONFIG, 0x00 + n, hi=127)
+for n in range(7):
+    params[f'Voice.Name{n + 1}'] = Param(VOICE, 0x40 + n, hi=127)
+for op, base in ((1, 0x68), (2, 0x60), (3, 0x58), (4, 0x50)):
+    params[f'Op{op}.TL'] =              Param(VOICE, base + 0)
+    params[f'Op{op}.KeyLvlType0'] =     Param(VOICE, base + 1, shift=7, bits=1)  # Key Height/TL scaling type (-/+)
+    params[f'Op{op}.TLVel'] =           Param(VOICE, base + 1, shift=4, bits=3)
+    params[f'Op{op}.KeyLvlDepth'] =     Param(VOICE, base + 2, shift=4, bits=4)
+    params[f'Op{op}.TLFine'] =          Param(VOICE, base + 2, bits=4)
+    params[f'Op{op}.KeyLvlType1'] =     Param(VOICE, base + 3, shift=7, bits=1)  # Key Height/TL scaling type (Lin/Exp)
+    params[f'Op{op}.DT1'] =             Param(VOICE, base + 3, shift=4, bits=3)
+    params[f'Op{op}.Multi'] =           Param(VOICE, base + 3, bits=4)
+    params[f'Op{op}.KeyEnvRt'] =        Param(VOICE, base + 4, shift=6, bits=2)
+    params[f'Op{op}.AR'] =              Param(VOICE, base + 4, bits=5)
+    params[f'Op{op}.AM'] =              Param(VOICE, base + 5, shift=7, bits=1)
+    params[f'Op{op}.ARVel'] =           Param(VOICE, base + 5, shift=5, bits=2)
+    params[f'Op{op}.D1R'] =             Param(VOICE, base + 5, bits=5)
+    params[f'Op{op}.DT2'] =             Param(VOICE, base + 6, shift=6, bits=2)
+    params[f'Op{op}.D2R'] =             Param(VOICE, base + 6, bits=5)
+    params[f'Op{op}.SL'] =              Param(VOICE, base + 7, shift=4, bits=4)
+    params[f'Op{op}.RR'] =              Param(VOICE, base + 7, bits=4)
+
+def voice_field(index, param): # Property reading/writing a parameter's bit field at voice image byte [index]
+    shift, mask, clear = param.Shift, param.Mask, param.Clear
+
+    def get(self):
+        return (self.Data[index] >> shift) & mask
+
+    def set(self, value):
+        self.Data[index] = (self.Data[index] & clear) | ((value & mask) << shift)
+
+    return property(get, set)
+
+def operator_field(offset, param): # Same for operator fields, relative to the operator's first byte
+    shift, mask, clear = param.Shift, param.Mask, param.Clear
+
+    def get(self):
+        return (self.Data[self.Offset + offset] >> shift) & mask
+
+    def set(self, value):
+        index = self.Offset + offset
+        self.Data[index] = (self.Data[index] & clear) | ((value & mask) << shift)
+
+    return property(get, set)
+
+for name, param in params.items():
+    group, field = name.split('.')
+    if group == 'Voice' and not field.startswith('Name'):
+        setattr(VoiceData, field, voice_field(param.Address - 0x40, param))
+    elif group == 'Op1':
+        setattr(VoiceData.Operator, field, operator_field(param.Address - 0x68, param))
+
+# CC value -> parameter field value lookup tables (-1 = out of range, parameter is left unchanged)
+def lut_range(param):
+    return [value if param.Lo <= value <= param.Hi else -1 for value in range(128)]
+
+def lut_toggle(param): # 0 = off, 127 = on
+    lut = [-1] * 128
+    lut[0] = 0
+    lut[127] = param.Hi
+    return lut
+
+def lut_invert(param): # Op TL: 0 = min level, 127 = max level
+    return [param.Hi - value for value in range(128)]
+
+def lut_signed(param): # 0 ~ 63 = -64 ~ -1, 64 ~ 127 = 0 ~ +63
+    return [value ^ 0x40 for value in range(128)]
+
+def lut_transpose(param): # 0 ~ 24 = -24 ~ -1 (231 ~ 255), 25 ~ 49 = 0 ~ +24
+    return [value + 231 if value <= 24 else value - 25 if value <= 49 else -1 for value in range(128)]
+
+def lut_dt1(param): # 0 ~ 2 = -3 ~ -1 (7 ~ 5), 3 = 0, 4 ~ 6 = +1 ~ +3, 7 = 0
+    return [(7 - value if value < 3 else value - 3 if 3 < value < 7 else 0) if value <= 7 else -1 for value in range(128)]
+
+def lut_multi(param): # Multi half of the linear frequency multiple (see freq_table)
+    return [freq_table[value][0] if value < 64 else -1 for value in range(128)]
+
+def lut_dt2(param): # DT2 half of the linear frequency multiple (see freq_table)
+    return [freq_table[value][1] >> 2 if value < 64 else -1 for value in range(128)]
+
+scalings = {'range': lut_range, 'invert': lut_invert, 'signed': lut_signed, 'transpose': lut_transpose,
+            'dt1': lut_dt1, 'multi': lut_multi, 'dt2': lut_dt2}
+
+class CCBinding: # What a mapped CC does: the parameter it sets and how its value is converted
+    def __init__(self, param, relative, lut, lo, hi):
+        self.Param = param
+        self.Relative = relative                # Relative Binary Offset (64 = 0, 64 + x = +x, 64 - x = -x)
+        self.Lut = lut                          # CC value -> field value (None for relative CCs)
+        self.Lo = lo                            # Field range this CC may set
+        self.Hi = hi
+        self.Second = None                      # Binding for the 2nd sysex of double-message CCs (Multi/DT2)
+        self.Cache = None                       # Prebuilt messages by inst/value when the CC's output is stateless
+
+# (target, sysex parameter number) of the bytes that hold more than one parameter
+shared_bytes = set()
+for param in params.values():
+    if sum(other.Target == param.Target and other.Address == param.Address for other in params.values()) > 1:
+        shared_bytes.add((param.Target, param.Address))
+
+class SysexCache: # Ready-made parameter change messages for absolute CCs whose parameter has its byte to itself
+    # When no other parameter shares the byte, the message only depends on (MIDI channel, field value) and the
+    # system channel of the device the MIDI channel is routed to, so it is built once and reused. The bits of the
+    # byte outside the field are normally 0; when a voice dump set some of them, cc_to_sysex takes the slow path.
+    # Every entry remembers the system channel it was built with and is rebuilt when that changed (CC 112).
+    def __init__(self):
+        self.Tables = []
+
+    def table(self, binding):
+        param = binding.Param
+        if binding.Relative or (param.Target, param.Address) in shared_bytes:
+            return None
+        table = [None] * (16 * 256)             # (MIDI channel << 8) | field value -> (system channel, Message)
+        self.Tables.append(table)
+        return table
+
+    def clear(self): # After the routing or the kind of messages changed
+        for table in self.Tables:
+            table[:] = [None] * len(table)
+
+Prebuilt = SysexCache()
+
+def route(routes): # [(first channel, last channel, device)]; the channels play insts 1~8 in order, then inst 1
+    for first, last, device in routes:
+        for channel in range(first, last + 1):
+            inst = channel - first if channel - first < 8 else 0
+            channel_device[channel] = device
+            inst_index[channel] = inst
+            inst_num[channel] = 0x18 + inst
+            owners[channel] = (device.System, device.System.Config, device.Insts[inst], device.Voices[inst])
+    Prebuilt.clear()
+
+# CCs the FB-01 already understands, passed "thru" unchanged
+cc_passthru = [False] * 128
+
+# CC number -> CCBinding (None = not mapped)
+cc_map = [None] * 128
+
+# The CC assignments are read from a JSON mapping file (fb01_mapping.json next to this script by default):
+#
+#   "thru": [1, 2, ...]                                           CCs passed "thru" unchanged
+#   "cc": {"17": {"param": "Voice.AMD"}, ...}                     CC number -> what it does
+#
+# A CC either sets a parameter ("param", any name in params) or triggers an action ("action", see actions).
+# Parameter CCs take these optional keys:
+#   "mode":    "absolute" (default), "toggle" (0 = off, 127 = on) or "relative" (64 = 0, 64 + x = +x, 64 - x = -x)
+#   "scaling": how absolute CC values become field values, one of scalings (default "range")
+#   "range":   [lo, hi], narrows the field values the CC may set
+#   "second":  another parameter ("param", "mode", "scaling", "range") sent after the first (Op Multi/DT2)
+#
+# Validating the file and building the lookup tables is cached in ~/.cache/fb01_cc2sysex, keyed by the hash
+# of the file and of this script (params, scalings and the compiler live here), so the tables are only built
+# once for every version of a mapping file. The cache is plain JSON: nothing in it gets to run code.
+MAPPING = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fb01_mapping.json")
+MAPPING_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "fb01_cc2sysex")
+MAPPING_FORMAT = b"2"                           # Bump when the compiled tables change shape
+MappingHash = None                              # Hash of the mapping file in use
+with open(__file__, 'rb') as file:
+    COMPILER_HASH = hashlib.sha256(file.read()).digest()
+
+def compile_binding(entry, where):
+    if not isinstance(entry, dict):
+        raise ValueError(f"{where}: expected an object")
+    unknown = set(entry) - {'param', 'mode', 'scaling', 'range', 'second'}
+    if unknown:
+        raise ValueError(f"{where}: unknown keys {', '.join(sorted(unknown))}")
+    name = entry.get('param')
+    if name not in params:
+        raise ValueError(f"{where}: unknown parameter {name!r}")
+    param = params[name]
+    mode = entry.get('mode', 'absolute')
+    if mode not in ('absolute', 'toggle', 'relative'):
+        raise ValueError(f"{where}: unknown mode {mode!r}")
+    scaling = entry.get('scaling', 'range')
+    if scaling not in scalings:
+        raise ValueError(f"{where}: unknown scaling {scaling!r}")
+    if mode != 'absolute' and 'scaling' in entry:
+        raise ValueError(f"{where}: scaling only applies to absolute mode")
+    lo, hi = entry.get('range', (param.Lo, param.Hi))
+    if not param.Lo <= lo <= hi <= param.Hi:
+        raise ValueError(f"{where}: range must be within {param.Lo} ~ {param.Hi}")
+
+    if mode == 'relative':
+        lut = None
+    else:
+        lut = lut_toggle(param) if mode == 'toggle' else scalings[scaling](param)
+        lut = [field if lo <= field <= hi else -1 for field in lut]
+    second = None
+    if 'second' in entry:
+        second = compile_binding(entry['second'], where + " second")
+        if second[3] is not None:
+            raise ValueError(f"{where}: a second parameter can't have a second parameter itself")
+    return (name, mode == 'relative', lut, second, lo, hi)
+
+def compile_mapping(mapping): # Validated mapping -> plain lookup tables (cacheable)
+    if not isinstance(mapping, dict):
+        raise ValueError("expected an object with \"thru\" and \"cc\"")
+    thru = [False] * 128
+    bindings = [None] * 128
+    actions_by_cc = [None] * 128
+    for control in mapping.get('thru', ()):
+        if not (isinstance(control, int) and 0 <= control <= 127):
+            raise ValueError(f"thru: {control!r} is not a CC number")
+        thru[control] = True
+    for key, entry in mapping.get('cc', {}).items():
+        if not (key.isdigit() and 0 <= int(key) <= 127):
+            raise ValueError(f"cc: {key!r} is not a CC number")
+        control = int(key)
+        where = f"CC {control}"
+        if thru[control]:
+            raise ValueError(f"{where}: is also listed as a thru CC")
+        if isinstance(entry, dict) and 'action' in entry:
+            if set(entry) != {'action'} or entry['action'] not in actions:
+                raise ValueError(f"{where}: unknown action {entry.get('action')!r}")
+            actions_by_cc[control] = entry['action']
+        else:
+            bindings[control] = compile_binding(entry, where)
+    return thru, bindings, actions_by_cc
+
+def make_binding(compiled):
+    name, relative, lut, second, lo, hi = compiled
+    binding = CCBinding(params[name], relative, lut, lo, hi)
+    binding.Cache = Prebuilt.table(binding)
+    if second is not None:
+        binding.Second = make_binding(second)
+    return binding
+
+def make_tables(compiled): # compile_mapping() result -> cc_passthru, cc_map and cc_actions contents
+    thru, bindings, actions_by_cc = compiled
+    if not len(thru) == len(bindings) == len(actions_by_cc) == 128:
+        raise ValueError("compiled mapping doesn't cover 128 CCs")
+    Prebuilt.Tables.clear()
+    return ([flag is True for flag in thru], [None if entry is None else make_binding(entry) for entry in bindings],
+            [None if name is None else actions[name] for name in actions_by_cc])
+
+def load_mapping(path=MAPPING, write_cache=True): # Fills cc_passthru, cc_map and cc_actions in place
+    global MappingHash
+    with open(path, 'rb') as file:
+        source = file.read()
+    digest = hashlib.sha256(MAPPING_FORMAT + source).hexdigest()
+    cache = os.path.join(MAPPING_CACHE, hashlib.sha256(COMPILER_HASH + MAPPING_FORMAT + source).hexdigest() + ".json")
+    try:
+        with open(cache, 'rb') as file:
+            tables = make_tables(json.load(file))
+    except (OSError, ValueError, TypeError, KeyError, IndexError): # Missing, or not what this script writes
+        try:
+            compiled = compile_mapping(json.loads(source))
+        except (ValueError, AttributeError, TypeError) as error:
+            raise ValueError(f"{path}: {error}") from None
+        tables = make_tables(compiled)
+        if write_cache:
+            try:
+                os.makedirs(MAPPING_CACHE, exist_ok=True)
+                with open(cache + ".tmp", 'w') as file:
+                    json.dump(compiled, file, separators=(',', ':'))
+                os.replace(cache + ".tmp", cache)
+            except OSError:
+                pass # Read-only home (SD card mounted ro, ...), just compile again next time
+
+    cc_passthru[:], cc_map[:], cc_actions[:] = tables
+    MappingHash = digest
+
+# Log verbosity
+LOG_OFF = 0
+LOG_SUMMARY = 1                             # Counts every few seconds plus status lines
+LOG_MESSAGES = 2                            # Every message
+
+# Log record kinds
+LOG_CC = 0                                  # (control, value, sysex_data)
+LOG_CC2 = 1                                 # (sysex_data,) -- 2nd sysex of a double-message CC
+LOG_THRU_CC = 2                             # (msg,)
+LOG_THRU = 3                                # (msg,)
+LOG_UNMAPPED = 4                            # (msg,)
+LOG_TEXT = 5                                # (text,) -- status lines, also shown in summary mode
+LOG_NRPN = 6                                # (number, field, sysex_data) -- NRPN/RPN data entry
+
+class Plain: # Stands in for colorama's Fore/Style until (or if) it is loaded
+    def __getattr__(self, name):
+        return ""
+
+Fore = Style = Plain()
+
+def load_colors(): # colorama is only imported once the message log actually needs it
+    global Fore, Style
+    try:
+        from colorama import init, Fore, Style
+    except ImportError:
+        return
+    init()
+
+class Logger: # Console log written by a background thread so the MIDI path never waits on the terminal
+    def __init__(self, level=LOG_OFF, size=1024, interval=5.0):
+        self.Level = level
+        self.Size = size                    # Ring buffer capacity (records)
+        self.Interval = interval            # Seconds between summary lines
+        self.Records = collections.deque()  # Raw record tuples, formatted by the writer thread
+        self.Counts = [0] * 7               # Records per kind, only ever incremented by the MIDI thread
+        self.Reported = [0] * 7             # Counts as of the last summary line, only the writer thread uses them
+        self.Dropped = 0
+        self.Wake = threading.Event()
+        self.Running = False
+        self.Thread = threading.Thread(target=self.run, daemon=True)
+
+    def put(self, kind, *fields):
+        level = self.Level
+        if level == LOG_OFF:
+            return
+        if level == LOG_SUMMARY and kind != LOG_TEXT:
+            self.Counts[kind] += 1
+            return
+        if len(self.Records) >= self.Size:
+            self.Dropped += 1               # Never make MIDI wait for the log
+            return
+        self.Records.append((kind, fields))
+        if not self.Wake.is_set():
+            self.Wake.set()
+
+    def text(self, text):
+        self.put(LOG_TEXT, text)
+
+    def start(self):
+        if self.Level == LOG_MESSAGES:
+            load_colors()
+        self.Running = True
+        self.Thread.start()
+
+    def close(self):
+        if self.Running:
+            self.Running = False
+            self.Wake.set()
+            self.Thread.join()
+        if self.Dropped:
+            print(f"Log: {self.Dropped} records dropped (buffer full)")
+
+    def run(self):
+        next_summary = time.monotonic() + self.Interval
+        while self.Running:
+            self.Wake.wait(self.Interval if self.Level == LOG_SUMMARY else None)
+            self.Wake.clear()
+            self.drain()
+            if self.Level == LOG_SUMMARY and time.monotonic() >= next_summary:
+                self.summary()
+                next_summary = time.monotonic() + self.Interval
+        self.drain()
+
+    def drain(self):
+        lines = []
+        while self.Records:
+            kind, fields = self.Records.popleft()
+            lines.append(format_record(kind, fields))
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+
+    def summary(self):
+        totals = list(self.Counts)          # Later increments show up in the next line, none are lost
+        counts = [total - reported for total, reported in zip(totals, self.Reported)]
+        if any(counts):
+            self.Reported = totals
+            print(f"{counts[LOG_CC]} CCs translated ({counts[LOG_CC2]} double), {counts[LOG_NRPN]} NRPN, "
+                  f"{counts[LOG_THRU_CC] + counts[LOG_THRU]} passed through, {counts[LOG_UNMAPPED]} unmapped")
+
+def format_record(kind, fields):
+    if kind == LOG_CC:
+        control, value, sysex_data = fields
+        f_control = str(control).zfill(3)
+        f_value = str(value).zfill(3)
+        hex_sysex_data = ' '.join(f'{byte:02X}' for byte in sysex_data)
+        return Style.BRIGHT + Fore.GREEN + f"{f_control}" + Fore.RESET + "/" + Fore.RED + f"{f_value}" + Fore.RESET + " | " + Style.RESET_ALL + Fore.RED + "F0 " + Fore.RESET + Style.BRIGHT + f"{hex_sysex_data} " + Style.RESET_ALL + Fore.RED + "F7" + Style.RESET_ALL
+    if kind == LOG_CC2:
+        hex_sysex_data = ' '.join(f'{byte:02X}' for byte in fields[0])
+        return Style.BRIGHT + Fore.BLUE + "2nd sysex:" + Style.RESET_ALL + Fore.RED + "F0 " + Fore.RESET + Style.BRIGHT + f"{hex_sysex_data} " + Style.RESET_ALL + Fore.RED + "F7" + Style.RESET_ALL
+    if kind == LOG_THRU_CC:
+        return f"Passing through already implemented CC: {fields[0]}"
+    if kind == LOG_THRU:
+        return f"Passing through: {fields[0]}"
+    if kind == LOG_UNMAPPED:
+        return f"Unmapped CC: {fields[0]}"
+    if kind == LOG_NRPN:
+        number, field, sysex_data = fields
+        hex_sysex_data = ' '.join(f'{byte:02X}' for byte in sysex_data)
+        return Style.BRIGHT + Fore.GREEN + f"{number}" + Fore.RESET + "=" + Fore.RED + f"{field}" + Fore.RESET + " | " + Style.RESET_ALL + Fore.RED + "F0 " + Fore.RESET + Style.BRIGHT + f"{hex_sysex_data} " + Style.RESET_ALL + Fore.RED + "F7" + Style.RESET_ALL
+    return fields[0]
+
+Log = Logger()
+
+# Raw mode (--raw): messages stay the bytes python-rtmidi delivers and takes, with no mido parsing, validation
+# or encoding in between
+raw_types = {0x80: 'note_off', 0x90: 'note_on', 0xA0: 'polytouch', 0xB0: 'control_change', 0xC0: 'program_change',
+             0xD0: 'aftertouch', 0xE0: 'pitchwheel'}
+
+class RawMessage: # Just enough of mido's Message interface for handle_message, the coalescer and the log
+    __slots__ = ('Bytes', 'type', 'channel', 'control', 'value', 'data')
+
+    def __init__(self, data):
+        self.Bytes = data
+        status = data[0]
+        if status < 0xF0:
+            self.type = raw_types[status & 0xF0]
+            self.channel = status & 0x0F
+            if self.type == 'control_change':
+                self.control = data[1]
+                self.value = data[2]
+        elif status == 0xF0:
+            self.type = 'sysex'
+            self.data = data[1:-1]
+        else:
+            self.type = 'system'
+
+    def bytes(self):
+        return self.Bytes
+
+    def copy(self, control): # Only CC remapping needs a changed copy
+        return RawMessage(bytes((self.Bytes[0], control, self.Bytes[2])))
+
+    def __str__(self):
+        return f"{self.type} " + ' '.join(f'{byte:02X}' for byte in self.Bytes)
+
+def mido_sysex(data):
+    return Message('sysex', data=data)
+
+def raw_sysex(data):
+    return RawMessage(b'\xF0' + bytes(data) + b'\xF7')
+
+make_sysex = mido_sysex                     # Parameter change messages are built with this
+
+def use_raw_messages(raw=True):
+    global make_sysex
+    make_sysex = raw_sysex if raw else mido_sysex
+    Prebuilt.clear()                        # Rebuild the cached messages as the new kind
+
+class RawPort: # python-rtmidi port in place of a mido port
+    def __init__(self, port, name):
+        self.Port = port
+        self.Name = name
+
+    def send(self, msg): # RawMessage or mido Message (All Notes Off, dump requests)
+        self.Port.send_message(msg.bytes())
+
+    def close(self):
+        self.Port.close_port()
+
+    def __str__(self):
+        return f"{self.Name} (raw)"
+
+def open_raw_input(index, name, callback):
+    port = rtmidi.MidiIn()
+    port.open_port(index)
+    port.ignore_types(False, False, True)   # Same as mido: keep sysex and timing, drop active sensing
+    port.set_callback(lambda event, data: callback(RawMessage(bytes(event[0]))))
+    return RawPort(port, name)
+
+def open_raw_output(index, name):
+    port = rtmidi.MidiOut()
+    port.open_port(index)
+    return RawPort(port, name)
+
+def param_sysex(param, data, sys_channel, channel):
+    if param.Nibbles:
+        # 2 nibblized data bytes for Voice param sysex messages
+        return [0x43, 0x75, sys_channel, inst_num[channel], param.Address, data & 0x0F, data >> 4]
+    # For System, Config, and Inst sysex messages we only need one data byte
+    return [0x43, 0x75, sys_channel, 0x10 if param.Target <= CONFIG else inst_num[channel], param.Address, data]
+
+# Undo/redo history (--history): every parameter byte edit as a 4 byte delta in a preallocated ring buffer.
+# Entry = [channel | target << 4 | STEP_START, parameter #, old byte, new byte]. Repeated edits of one byte
+# by the same CC (or NRPN) in quick succession update the step's entry instead of adding new ones, so a whole
+# knob turn is one undo step of one or two entries.
+STEP_START = 0x40
+STEP_GAP = 1.0                              # Seconds without edits after which the same knob starts a new step
+
+class EditHistory:
+    def __init__(self, size=4096):
+        self.Size = size                    # Entries kept
+        self.Data = bytearray(4 * size)
+        self.Start = 0                      # Entry numbers (ever increasing, stored at number % Size):
+        self.Cursor = 0                     # oldest kept, one past the newest applied,
+        self.End = 0                        # and one past the newest that can be redone
+        self.StepStart = 0                  # First entry of the step edits are being added to
+        self.LastKey = None                 # CC/NRPN and channel of the last edit, None = next edit starts a step
+        self.LastTime = 0.0
+        self.Undone = 0
+        self.Redone = 0
+        self.Clock = time.perf_counter      # Edit times for the step grouping (fb01_replay.py uses the journal's)
+
+    def edit(self, key, channel, target, address, old, new): # key: CC number, or 128 + NRPN/RPN number
+        if old == new:
+            return
+        now = self.Clock()
+        data = self.Data
+        key = (key << 4) | channel
+        if self.Cursor < self.End: # Editing after an undo drops what could have been redone
+            self.End = self.Cursor
+            self.LastKey = None
+        if key == self.LastKey and now - self.LastTime < STEP_GAP and self.StepStart >= self.Start:
+            head = channel | (target << 4)
+            for entry in range(self.StepStart, self.End):
+                index = (entry % self.Size) * 4
+                if data[index] & ~STEP_START == head and data[index + 1] == address:
+                    data[index + 3] = new
+                    self.LastTime = now
+                    return
+            self.append(channel | (target << 4), address, old, new)
+        else:
+            self.StepStart = self.End
+            self.append(channel | (target << 4) | STEP_START, address, old, new)
+        self.LastKey = key
+        self.LastTime = now
+
+    def append(self, head, address, old, new):
+        index = (self.End % self.Size) * 4
+        self.Data[index:index + 4] = bytes((head, address, old, new))
+        self.End += 1
+        self.Cursor = self.End
+        if self.End - self.Start > self.Size: # Overwrote the oldest entry, drop the rest of its step too
+            self.Start = self.End - self.Size
+            while self.Start < self.End and not self.Data[(self.Start % self.Size) * 4] & STEP_START:
+                self.Start += 1
+
+    def changes(self, first, last, column): # {(channel, target, address): byte} for entries first..last-1
+        data = self.Data
+        entries = range(first, last) if column == 3 else range(last - 1, first - 1, -1)
+        bytes_by_key = {}
+        for entry in entries: # The last one written wins: the oldest 'old' byte, or the newest 'new' byte
+            index = (entry % self.Size) * 4
+            bytes_by_key[(data[index] & 0x0F, (data[index] >> 4) & 0x03, data[index + 1])] = data[index + column]
+        return bytes_by_key
+
+    def undo(self): # -> changes that restore the state before the newest applied step
+        if self.Cursor <= self.Start:
+            return {}
+        first = self.Cursor - 1
+        while first > self.Start and not self.Data[(first % self.Size) * 4] & STEP_START:
+            first -= 1
+        changes = self.changes(first, self.Cursor, 2)
+        self.Cursor = first
+        self.LastKey = None
+        self.Undone += 1
+        return changes
+
+    def redo(self): # -> changes that apply the step after the newest applied one again
+        if self.Cursor >= self.End:
+            return {}
+        last = self.Cursor + 1
+        while last < self.End and not self.Data[(last % self.Size) * 4] & STEP_START:
+            last += 1
+        changes = self.changes(self.Cursor, last, 3)
+        self.Cursor = last
+        self.LastKey = None
+        self.Redone += 1
+        return changes
+
+    def __str__(self):
+        return f"Edit history: {self.Cursor - self.Start} edits kept, {self.Undone} undone, {self.Redone} redone"
+
+History = None                              # EditHistory with --history
+
+# A parameter on each (target, sysex parameter number), to build the messages that restore whole bytes
+byte_params = {(param.Target, param.Address): param for param in params.values()}
+
+def binding_to_sysex(binding, value, channel, control):
+    param = binding.Param
+    owner = owners[channel][param.Target]
+    sys_channel = owners[channel][SYSTEM].Channel # Read before applying so a CC 112 change is sent on the old channel
+
+    # Apply the CC value to the parameter's bit field
+    data = owner.get_byte(param.Address)
+    if binding.Relative:
+        field = ((data >> param.Shift) & param.Mask) + value - 64
+        if not binding.Lo <= field <= binding.Hi:
+            field = -1
+    else:
+        field = binding.Lut[value]
+    if field >= 0:
+        old = data
+        data = (data & param.Clear) | (field << param.Shift)
+        owner.set_byte(param.Address, data)
+        if History is not None:
+            History.edit(control, channel, param.Target, param.Address, old, data)
+
+    return param_sysex(param, data, sys_channel, channel)
+
+def cc_to_sysex(control, value, channel):
+    binding = cc_map[control]
+    if binding is None:
+        return None
+
+    cache = binding.Cache
+    if cache is not None and binding.Lut[value] >= 0:
+        # Parameter with a byte to itself: unless a dump set bits outside the field, the byte is just the field
+        param = binding.Param
+        owner = owners[channel]
+        target = owner[param.Target]
+        old = target.get_byte(param.Address)
+        if not old & param.Clear:
+            field = binding.Lut[value]
+            data = field << param.Shift
+            sys_channel = owner[SYSTEM].Channel
+            key = (channel << 8) | field
+            entry = cache[key]
+            if entry is None or entry[0] != sys_channel:
+                entry = cache[key] = (sys_channel, make_sysex(param_sysex(param, data, sys_channel, channel)))
+            if History is not None:
+                History.edit(control, channel, param.Target, param.Address, old, data)
+            target.set_byte(param.Address, data)
+            Log.put(LOG_CC, control, value, entry[1].data)
+            return entry[1]
+
+    sysex_data = binding_to_sysex(binding, value, channel, control)
+    Log.put(LOG_CC, control, value, sysex_data)
+
+    return make_sysex(sysex_data)
+
+# Second sysex message for CCs that change two parameter bytes (Op Multi/DT2 -- PART TWO)
+def cc_2nd_sysex(control, value, channel):
+    binding = cc_map[control]
+    if binding is None or binding.Second is None:
+        return None
+
+    sysex_data = binding_to_sysex(binding.Second, value, channel, control)
+    Log.put(LOG_CC2, sysex_data)
+
+    return make_sysex(sysex_data)
+
+# NRPN mode (--nrpn): every parameter in the catalog gets a 14-bit NRPN number, so the ones without a CC can be
+# reached too. NRPN MSB = group (0 System, 1 Config, 2 Inst, 3 Voice, 4~7 Op1~Op4), LSB = the parameter's place
+# in its group's list below. Data entry MSB (CC 6) is the parameter value; the LSB (CC 38) only adds the low bit
+# of the 8-bit parameters (User Code, LFO Speed). Their MSB is held in the coalescer until the LSB replaces it
+# (or SysexCoalescer.Hold runs out), so an MSB/LSB pair makes one sysex.
+# The numbers are what controllers and mappingchart.md refer to: never reorder these lists, only append.
+nrpn_op = ['TL', 'KeyLvlType0', 'TLVel', 'KeyLvlDepth', 'TLFine', 'KeyLvlType1', 'DT1', 'Multi', 'KeyEnvRt', 'AR',
+           'AM', 'ARVel', 'D1R', 'DT2', 'D2R', 'SL', 'RR']
+nrpn_groups = [
+    ('System', ['Channel', 'MemProtect', 'ConfigNum', 'Detune', 'TL']),
+    ('Config', ['Combine', 'Name1', 'Name2', 'Name3', 'Name4', 'Name5', 'Name6', 'Name7', 'Name8']),
+    ('Inst', ['Notes', 'Channel', 'KCLimitH', 'KCLimitL', 'Bank', 'Voice', 'Detune', 'Octave', 'Output', 'Pan',
+              'LFOEnable', 'PortTime', 'BendRange', 'Poly', 'PMDAssign']),
+    ('Voice', ['UserCode', 'LFOSpeed', 'LFOLoad', 'AMD', 'LFOSync', 'PMD', 'Op1Enable', 'Op2Enable', 'Op3Enable',
+               'Op4Enable', 'Feedback', 'Algorithm', 'PMS', 'AMS', 'Waveform', 'Transpose', 'Poly', 'PortTime',
+               'PMDAssign', 'BendRange', 'Name1', 'Name2', 'Name3', 'Name4', 'Name5', 'Name6', 'Name7']),
+    ('Op1', nrpn_op), ('Op2', nrpn_op), ('Op3', nrpn_op), ('Op4', nrpn_op)]
+nrpn_params = [None] * 16384                # NRPN number -> Param
+nrpn_names = {}                             # NRPN number -> parameter name, for the chart
+for group, (prefix, names) in enumerate(nrpn_groups):
+    for index, name in enumerate(names):
+        nrpn_params[(group << 7) | index] = params[prefix + '.' + name]
+        nrpn_names[(group << 7) | index] = prefix + '.' + name
+assert sorted(nrpn_names.values()) == sorted(params), "every parameter needs exactly one NRPN number"
+
+# RPN number -> Param (RPN 0 is the standard pitch bend sensitivity)
+rpn_params = {0x0000: params['Inst.BendRange']}
+
+class ParamSelect: # NRPN/RPN parameter number selected on one MIDI channel
+    def __init__(self):
+        self.MSB = 127
+        self.LSB = 127
+        self.Registered = False             # RPN (CC 101/100) rather than NRPN (CC 99/98)
+        self.Param = None                   # Selected parameter, None = nothing (or a number with no parameter)
+        self.Data = 0                       # Data entry MSB of the last value
+
+    def select(self):
+        number = (self.MSB << 7) | self.LSB
+        self.Param = rpn_params.get(number) if self.Registered else nrpn_params[number]
+
+    def number(self):
+        return f"{'RPN' if self.Registered else 'NRPN'} {self.MSB}/{self.LSB}"
+
+selects = [ParamSelect() for channel in range(16)]
+
+def nrpn_field(param, data_msb, data_lsb):
+    if param.Hi > 127:
+        return min((data_msb << 1) | (data_lsb >> 6), param.Hi)
+    return min(data_msb, param.Hi)
+
+def nrpn_sysex(select, field, channel, hold=False): # Set the selected parameter to field and send it, if it changed
+    param = select.Param
+    owner = owners[channel][param.Target]
+    data = owner.get_byte(param.Address)
+    if (data >> param.Shift) & param.Mask == field:
+        return
+    sys_channel = owners[channel][SYSTEM].Channel
+    old = data
+    data = (data & param.Clear) | (field << param.Shift)
+    owner.set_byte(param.Address, data)
+    if History is not None:
+        History.edit(128 + (select.Registered << 14) + ((select.MSB << 7) | select.LSB), channel, param.Target,
+                     param.Address, old, data)
+    sysex_data = param_sysex(param, data, sys_channel, channel)
+    Log.put(LOG_NRPN, select.number(), field, sysex_data)
+    channel_device[channel].Coalescer.send(make_sysex(sysex_data), hold)
+
+def nrpn_msb_cc(value, channel):
+    select = selects[channel]
+    select.MSB = value
+    select.Registered = False
+    select.select()
+
+def nrpn_lsb_cc(value, channel):
+    select = selects[channel]
+    select.LSB = value
+    select.Registered = False
+    select.select()
+
+def rpn_msb_cc(value, channel):
+    select = selects[channel]
+    select.MSB = value
+    select.Registered = True
+    select.select()
+
+def rpn_lsb_cc(value, channel):
+    select = selects[channel]
+    select.LSB = value
+    select.Registered = True
+    select.select()
+
+def data_msb_cc(value, channel):
+    select = selects[channel]
+    if select.Param is not None:
+        select.Data = value
+        # The LSB of an 8-bit value usually follows right away, held back the two go out as one message
+        nrpn_sysex(select, nrpn_field(select.Param, value, 0), channel, select.Param.Hi > 127)
+
+def data_lsb_cc(value, channel):
+    select = selects[channel]
+    if select.Param is not None:
+        nrpn_sysex(select, nrpn_field(select.Param, select.Data, value), channel)
+
+def data_step(channel, step):
+    select = selects[channel]
+    param = select.Param
+    if param is not None:
+        field = (owners[channel][param.Target].get_byte(param.Address) >> param.Shift) & param.Mask
+        if param.Lo <= field + step <= param.Hi:
+            nrpn_sysex(select, field + step, channel)
+
+def data_increment_cc(value, channel):
+    data_step(channel, 1)
+
+def data_decrement_cc(value, channel):
+    data_step(channel, -1)
+
+# Standard CC numbers of the NRPN/RPN controllers, which --nrpn takes over from the mapping
+nrpn_ccs = {6: 'data_msb', 38: 'data_lsb', 96: 'data_increment', 97: 'data_decrement', 98: 'nrpn_lsb', 99: 'nrpn_msb',
+            100: 'rpn_lsb', 101: 'rpn_msb'}
+
+def use_nrpn():
+    for control, name in nrpn_ccs.items():
+        cc_passthru[control] = False
+        cc_map[control] = None
+        cc_actions[control] = actions[name]
+
+
+# Nibble split tables for bulk data (each voice byte is sent as low nibble, high nibble)
+low_nibble = bytes(n & 0x0F for n in range(256))
+high_nibble = bytes(n >> 4 for n in range(256))
+
+def voice_dump(device, inst):
+    # Instrument voice data: 43 75 0s 08+i 00 00, byte count 01 00 (128), 128 nibblized data bytes, checksum
+    sysex_data = bytearray(137)
+    sysex_data[0:8] = bytes([0x43, 0x75, device.System.Channel, 0x08 + inst, 0x00, 0x00, 0x01, 0x00])
+    image = device.Voices[inst].dump().tobytes()
+    sysex_data[8:136:2] = image.translate(low_nibble)
+    sysex_data[9:136:2] = image.translate(high_nibble)
+    sysex_data[136] = -sum(sysex_data[8:136]) & 0x7F
+    return make_sysex(sysex_data)
+
+class VoiceReply: # Instrument voice data received from the FB-01 (handed to the main thread like a message)
+    type = 'voice_data'
+
+    def __init__(self, inst, image, valid):
+        self.Inst = inst
+        self.Image = image
+        self.Valid = valid                  # Checksum matched
+        self.Fetcher = None                 # VoiceFetcher of the device it came from
+
+def parse_voice_dump(sysex_data):
+    # Same layout voice_dump() sends: 43 75 0s 08+i 00 00 01 00, 128 nibbles, checksum
+    if len(sysex_data) != 137 or sysex_data[0] != 0x43 or sysex_data[1] != 0x75 or sysex_data[3] & 0xF8 != 0x08:
+        return None
+    valid = sum(sysex_data[8:137]) & 0x7F == 0
+    image = bytes(low | (high << 4) for low, high in zip(sysex_data[8:136:2], sysex_data[9:136:2]))
+    return VoiceReply(sysex_data[3] & 0x07, image, valid)
+
+class LatencyStats: # Time from a message arriving at the input port to its output having been sent
+    def __init__(self):
+        self.Count = 0
+        self.Total = 0.0
+        self.Max = 0.0
+
+    def add(self, latency):
+        self.Count += 1
+        self.Total += latency
+        if latency > self.Max:
+            self.Max = latency
+
+    def __str__(self):
+        if self.Count == 0:
+            return "Latency: no messages handled"
+        return f"Latency: {self.Count} messages, avg {self.Total / self.Count * 1000:.3f} ms, max {self.Max * 1000:.3f} ms"
+
+Latency = LatencyStats()
+
+# Inst parameters that make the FB-01 load another voice into the instrument
+VOICE_SELECT = (params['Inst.Bank'].Address, params['Inst.Voice'].Address)
+
+class SysexCoalescer: # Last-value-wins window for parameter change sysex (knob sweeps)
+    def __init__(self, port, window):
+        self.Port = port
+        self.Window = window        # Flush window in seconds (0 = send right away)
+        self.Hold = 0.01            # Seconds a held message (8-bit NRPN data entry MSB) waits for its LSB at least
+        self.Pending = {}           # (sys channel, inst, param #) -> newest Message waiting for the flush
+        self.LastSent = {}          # (sys channel, inst, param #) -> data of the last Message sent
+        self.Deadline = None        # When the pending messages are due
+        self.In = 0
+        self.Out = 0
+        self.Suppressed = 0
+        self.Timing = None          # Histogram for time spent waiting here (set when metrics are on)
+        self.Record = None          # Called with every message handed in (set when --record is on)
+        self.Believed = None        # VoiceBank the voice parameter changes are applied to once sent
+        self.VoiceChanged = None    # Called with the inst ($18 ~ $1F) after an Inst Voice/Bank change went out
+        self.Stamps = {}            # key -> when its pending message arrived (only kept with Timing)
+
+    # Parameters that share one sysex byte (LFOLoad/AMD on $49, ...) share a key, and since every message
+    # carries the whole byte the newest one already holds all of their values.
+    def send(self, msg, hold=False): # hold: keep it pending even without a window, its successor may replace it
+        self.In += 1
+        if self.Record is not None:
+            self.Record(msg)
+        key = msg.data[2:5]
+        if key in self.Pending:
+            self.Suppressed += 1
+        elif self.Deadline is None:
+            self.Deadline = time.perf_counter() + (max(self.Window, self.Hold) if hold else self.Window)
+        self.Pending[key] = msg
+        if self.Timing is not None:
+            self.Stamps[key] = time.perf_counter()
+        if self.Window <= 0 and not hold:
+            self.flush()
+
+    def timeout(self): # Seconds until the pending messages are due (None = nothing pending)
+        if self.Deadline is None:
+            return None
+        return max(0.0, self.Deadline - time.perf_counter())
+
+    def flush(self):
+        changed = []                # Instruments the FB-01 loads another voice into
+        for key, msg in self.Pending.items():
+            if self.LastSent.get(key) == msg.data:
+                self.Suppressed += 1        # Same value again (jittery pot), the FB-01 already has it
+                continue
+            if self.Timing is not None:
+                self.Timing.record(time.perf_counter() - self.Stamps.pop(key))
+            self.Port.send(msg)
+            self.LastSent[key] = msg.data
+            self.Out += 1
+            data = msg.data
+            if self.Believed is not None and len(data) == 7 and data[4] >= 0x40: # 43 75 0s 18+i pp dl dh
+                self.Believed[data[3] & 0x07].Data[data[4] - 0x40] = data[5] | (data[6] << 4)
+            elif len(data) == 6 and data[3] >= 0x18 and data[4] in VOICE_SELECT: # 43 75 0s 18+i 04/05 dd
+                changed.append(data[3])
+        self.Pending.clear()
+        self.Deadline = None
+        if self.VoiceChanged is not None:
+            for inst in changed:
+                self.VoiceChanged(inst)
+
+    def forget(self, inst): # Drop what is pending/known for an instrument ($18 ~ $1F) after its voice changed
+        for table in (self.Pending, self.LastSent):
+            for key in [key for key in table if key[1] == inst]:
+                del table[key]
+        if not self.Pending:
+            self.Deadline = None
+
+    def __str__(self):
+        return f"Sysex coalescer: {self.In} in, {self.Out} out, {self.Suppressed} suppressed"
+
+class OutputLanes: # Output scheduler: real-time messages go out first, sysex is paced to what the FB-01 can take
+    def __init__(self, port, baud=31250, param_gap=0.001, dump_gap=0.05):
+        self.Port = port
+        self.ByteTime = 10 / baud if baud else 0.0  # Seconds per byte on the link (10 bits per byte on DIN MIDI)
+        self.ParamGap = param_gap           # Time the FB-01 needs after a parameter change before the next sysex
+        self.DumpGap = dump_gap             # ... and after a bulk voice dump
+        self.Editing = collections.deque()  # (queued at, msg) for sysex (parameter changes, dumps, requests), in order
+        self.LinkFree = 0.0                 # When the link will have finished sending what was sent so far
+        self.DeviceReady = 0.0              # When the FB-01 will have processed the last sysex
+        self.Realtime = 0
+        self.Edits = 0
+        self.MaxDepth = 0
+        self.Delay = 0.0                    # Total time sysex spent waiting here
+        self.MaxDelay = 0.0
+        self.Timing = None                  # Histogram for the pacing delay of each sysex (set when metrics are on)
+
+    # Notes, pitch bend and the pass-through CCs are sent at once. They can only wait for the one sysex
+    # already on the link, because editing sysex is only released while the link is idle.
+    def send(self, msg):
+        if msg.type == 'sysex':
+            self.Editing.append((time.perf_counter(), msg))
+            if len(self.Editing) > self.MaxDepth:
+                self.MaxDepth = len(self.Editing)
+            self.pump()
+            return
+        self.Port.send(msg)
+        self.Realtime += 1
+        self.LinkFree = max(self.LinkFree, time.perf_counter()) + 3 * self.ByteTime
+
+    def ready(self): # When the next sysex may go: the link is idle and the FB-01 has caught up
+        return max(self.LinkFree, self.DeviceReady)
+
+    def pump(self): # Send queued sysex while the link and the FB-01 can take it (messages are never split)
+        now = time.perf_counter()
+        while self.Editing and self.ready() <= now:
+            queued, msg = self.Editing.popleft()
+            self.Port.send(msg)
+            self.Edits += 1
+            delay = now - queued
+            self.Delay += delay
+            if delay > self.MaxDelay:
+                self.MaxDelay = delay
+            if self.Timing is not None:
+                self.Timing.record(delay)
+            size = len(msg.data) + 2
+            self.LinkFree = now + size * self.ByteTime
+            self.DeviceReady = self.LinkFree + (self.DumpGap if size > 10 else self.ParamGap)
+
+    def timeout(self): # Seconds until the next sysex can go (None = nothing waiting)
+        if not self.Editing:
+            return None
+        return max(0.0, self.ready() - time.perf_counter())
+
+    def drain(self): # Shutdown: wait for the queued sysex instead of dropping it
+        while self.Editing:
+            time.sleep(self.timeout())
+            self.pump()
+
+    def close(self):
+        self.Port.close()
+
+    def __str__(self):
+        average = self.Delay / self.Edits * 1000 if self.Edits else 0.0
+        return (f"Output lanes: {self.Realtime} real-time, {self.Edits} sysex, sysex queue {len(self.Editing)} now,"
+                f" up to {self.MaxDepth}, pacing delay avg {average:.2f} ms, max {self.MaxDelay * 1000:.2f} ms")
+
+class Histogram: # HDR-style log-linear histogram of durations (16 sub-buckets per power of two, ~6% resolution)
+    Buckets = 16 * 40
+
+    def __init__(self, name):
+        self.Name = name
+        self.Counts = [0] * self.Buckets
+        self.Count = 0
+        self.Max = 0
+
+    def record(self, seconds):
+        ns = int(seconds * 1e9)
+        if ns < 32:
+            index = max(ns, 0)
+        else:
+            shift = ns.bit_length() - 5
+            index = min((shift << 4) + (ns >> shift), self.Buckets - 1)
+        self.Counts[index] += 1
+        self.Count += 1
+        if ns > self.Max:
+            self.Max = ns
+
+    def percentile(self, percent): # Lower bound of the bucket holding the percentile, in ns
+        rank = self.Count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.Counts):
+            seen += count
+            if count and seen >= rank:
+                if index < 32:
+                    return index
+                shift = (index >> 4) - 1
+                return (index - (shift << 4)) << shift
+        return self.Max
+
+    def __str__(self):
+        if self.Count == 0:
+            return f"{self.Name:<10} {0:>9}"
+        return (f"{self.Name:<10} {self.Count:>9} {self.percentile(50) / 1000:>10.1f} {self.percentile(99) / 1000:>10.1f}"
+                f" {self.Max / 1000:>10.1f}")
+
+class PipelineMetrics: # Per-stage timing and message counts, only created with --metrics
+    def __init__(self):
+        self.Queue = Histogram("queue")             # Input callback -> picked up by the main loop
+        self.Translate = Histogram("translate")     # cc_to_sysex / cc_2nd_sysex
+        self.Coalesce = Histogram("coalesce")       # Waiting in the sysex coalescer
+        self.Send = Histogram("send")               # output_port.send
+        self.Pacing = Histogram("pacing")           # Sysex waiting in the output lanes for the link/FB-01
+        self.Total = Histogram("total")             # Input callback -> handled
+        self.CCs = [0] * 128
+        self.Types = collections.Counter()
+
+    def received(self, received, msg):
+        self.Queue.record(time.perf_counter() - received)
+        self.Types[msg.type] += 1
+        if msg.type == 'control_change':
+            self.CCs[msg.control] += 1
+
+    def report(self):
+        lines = [f"{'stage':<10} {'count':>9} {'p50 us':>10} {'p99 us':>10} {'max us':>10}"]
+        for histogram in (self.Queue, self.Translate, self.Coalesce, self.Pacing, self.Send, self.Total):
+            lines.append(str(histogram))
+        for device in Devices:
+            if device.Lanes is not None:
+                lines.append(f"{device.Name}: {device.Lanes}")
+        for controller in Inputs:
+            lines.append(str(controller))
+        lines.append("Messages: " + ", ".join(f"{kind} {count}" for kind, count in self.Types.most_common()))
+        lines.append("CCs: " + ", ".join(f"{control}: {count}" for control, count in enumerate(self.CCs) if count))
+        return "\n".join(lines)
+
+class TimedPort: # Output port stand-in that times every send
+    def __init__(self, port, histogram):
+        self.Port = port
+        self.Histogram = histogram
+
+    def send(self, msg):
+        start = time.perf_counter()
+        self.Port.send(msg)
+        self.Histogram.record(time.perf_counter() - start)
+
+    def close(self):
+        self.Port.close()
+
+def timed(function, histogram): # Wraps a translation function when metrics are on, so it costs nothing when off
+    def timed_function(*args):
+        start = time.perf_counter()
+        result = function(*args)
+        histogram.record(time.perf_counter() - start)
+        return result
+    return timed_function
+
+Metrics = None
+
+# Session journal (--record): what came in and what the translation sent out, for fb01_replay.py.
+# File = JOURNAL_MAGIC, header length (u32) and a JSON header describing the session setup, then records of
+# (seconds since the start (f64), kind, source, length (u16)) followed by the bytes. IN = a MIDI message from
+# the inputs, OUT = a message handed to device [source]'s output (parameter sysex before coalescing),
+# RETURN = a voice dump from device [source]'s return port (inst, valid, 64 byte image).
+JOURNAL_MAGIC = b"FB01J\x01"
+JOURNAL_RECORD = struct.Struct('<dBBH')
+JOURNAL_IN = 0
+JOURNAL_OUT = 1
+JOURNAL_RETURN = 2
+
+class SessionJournal: # Appends records from a background thread; the MIDI path only queues message references
+    def __init__(self, path, header, interval=0.1):
+        self.File = open(path, 'wb', buffering=1 << 16)
+        data = json.dumps(header).encode()
+        self.File.write(JOURNAL_MAGIC + struct.pack('<I', len(data)) + data)
+        self.Interval = interval            # Seconds between writes
+        self.Start = time.perf_counter()
+        self.Records = collections.deque()  # (time, kind, source, message), encoded by the writer thread
+        self.Written = 0
+        self.Running = True
+        self.Stop = threading.Event()
+        self.Thread = threading.Thread(target=self.run, daemon=True)
+        self.Thread.start()
+
+    def put(self, kind, source, msg, stamp=None):
+        self.Records.append((time.perf_counter() if stamp is None else stamp, kind, source, msg))
+
+    def run(self):
+        while not self.Stop.wait(self.Interval):
+            self.write()
+        self.write()
+
+    def write(self):
+        records = self.Records
+        chunks = []
+        while records:
+            stamp, kind, source, msg = records.popleft()
+            if kind == JOURNAL_RETURN:
+                data = bytes((msg.Inst, msg.Valid)) + bytes(msg.Image)
+            else:
+                data = bytes(msg.bytes())
+            chunks.append(JOURNAL_RECORD.pack(stamp - self.Start, kind, source, len(data)) + data)
+        if chunks:
+            self.File.write(b"".join(chunks))
+            self.Written += len(chunks)
+
+    def close(self):
+        self.Stop.set()
+        self.Thread.join()
+        self.File.close()
+
+    def __str__(self):
+        return f"Session journal: {self.Written} records written to {self.File.name}"
+
+class JournalPort: # Output port stand-in that records what it is given for one device
+    def __init__(self, port, journal, source):
+        self.Port = port
+        self.Journal = journal
+        self.Source = source
+
+    def record(self, msg):
+        self.Journal.put(JOURNAL_OUT, self.Source, msg)
+
+    def send(self, msg):
+        self.Journal.put(JOURNAL_OUT, self.Source, msg)
+        self.Port.send(msg)
+
+    def close(self):
+        self.Port.close()
+
+Journal = None                              # SessionJournal with --record
+
+def session_header(args): # What fb01_replay.py needs to set up the same translation
+    return {'mapping': MappingHash, 'mapping_file': os.path.abspath(args.mapping), 'nrpn': args.nrpn,
+            'history': args.history, 'library': args.library and os.path.abspath(args.library),
+            'send_voices': args.send_voices, 'fetch_voices': args.fetch_voices, 'started': time.time(),
+            'remaps': [controller.Remap for controller in Inputs],
+            'devices': [{'name': device.Name, 'translate': device.Translate, 'system': device.System.Channel,
+                         'channels': [channel for channel in range(16) if channel_device[channel] is device]}
+                        for device in Devices]}
+
+# Messages from all controller inputs, queued in arrival order as (arrival time, input number, message) by the
+# port callbacks (voice data replies have no input number). Only the main thread takes them out, remaps them
+# and touches the voice/instrument state, so nothing needs a lock.
+inbox = queue.SimpleQueue()
+
+class ControllerInput: # One controller input port with its own optional CC remap
+    def __init__(self, name, remap=None, number=0):
+        self.Name = name
+        self.Remap = remap                  # CC number -> CC number the translation sees (None = as is)
+        self.Number = number                # Place in Inputs, the journal records it with every message
+        self.Port = None
+        self.Messages = 0                   # Written by this port's backend thread only
+        self.CCs = 0
+        self.Remapped = 0                   # Written by the main thread only
+
+    def on_input(self, msg): # Runs on the MIDI backend's thread, so only count and hand the message over
+        self.Messages += 1
+        if msg.type == 'control_change':
+            self.CCs += 1
+        inbox.put((time.perf_counter(), self.Number, msg))
+
+    def remap(self, msg): # On the main thread, after the message as received went into the journal
+        if self.Remap is not None and msg.type == 'control_change' and self.Remap[msg.control] != msg.control:
+            self.Remapped += 1
+            return msg.copy(control=self.Remap[msg.control])
+        return msg
+
+    def close(self):
+        self.Port.close()
+
+    def __str__(self):
+        return f"Input {self.Name}: {self.Messages} messages, {self.CCs} CCs ({self.Remapped} remapped)"
+
+def parse_remap(spec): # "20:32,21:48" -> 128 entry CC lookup table
+    remap = list(range(128))
+    for pair in spec.split(','):
+        source, target = (int(control) for control in pair.split(':'))
+        if not (0 <= source <= 127 and 0 <= target <= 127):
+            raise ValueError(f"CC {pair} is out of range")
+        remap[source] = target
+    return remap
+
+# "1-8=FB-01 A,system=2,name=Left" -> (first channel, last channel, port pattern, options); the options are
+# name=..., system=N (the FB-01's system channel), return=PATTERN (its return port) and thru (plain MIDI device)
+def parse_route(spec):
+    channels, _, rest = spec.partition('=')
+    pattern, *fields = rest.split(',')
+    first, _, last = channels.partition('-')
+    first = int(first) - 1
+    last = int(last) - 1 if last else first
+    if not (0 <= first <= last <= 15):
+        raise ValueError(f"channels {channels} are out of range")
+    if not pattern:
+        raise ValueError("no output port")
+    options = {}
+    for field in fields:
+        key, _, value = field.partition('=')
+        if key not in ('name', 'system', 'return', 'thru'):
+            raise ValueError(f"unknown option {key!r}")
+        options[key] = value
+    if 'system' in options and not 1 <= int(options['system']) <= 16:
+        raise ValueError(f"system channel {options['system']} is out of range")
+    return first, last, pattern, options
+
+Inputs = []                                 # ControllerInput for every open controller port
+
+def send_voice(device, inst): # Bring the FB-01's instrument voice in line with the script's in one bulk transfer
+    device.Coalescer.forget(0x18 + inst)
+    device.Port.send(voice_dump(device, inst))
+    device.Believed[inst].load(device.Voices[inst].Data)
+    device.Known[inst] = True
+    Log.text(f"Voice data sent: {device.Name} Inst {inst + 1} \"{device.Voices[inst].Name}\"")
+
+# Voice parameter numbers the FB-01 takes parameter changes for ($70 ~ $79 and $7C ~ $7F are unused)
+voice_param_numbers = frozenset(range(0x40, 0x70)) | {0x7A, 0x7B}
+
+# Bytes on the wire: a voice parameter change (F0 43 75 0s 18+i pp dl dh F7) and an instrument voice dump
+PARAM_CHANGE_BYTES = 9
+VOICE_DUMP_BYTES = 139
+
+def sync_voice(device, inst): # Make the FB-01's voice match the script's with whatever takes fewer bytes
+    start = time.perf_counter()
+    voice = device.Voices[inst]
+    changed = list(voice.diff(device.Believed[inst])) if device.Known[inst] else None
+    device.Syncs += 1
+    device.DumpBytes += VOICE_DUMP_BYTES
+    if changed is not None and not voice_param_numbers.issuperset(changed):
+        changed = None                      # Unused bytes differ, only a dump reaches them
+    if changed is None or len(changed) * PARAM_CHANGE_BYTES >= VOICE_DUMP_BYTES:
+        send_voice(device, inst)
+        sent = VOICE_DUMP_BYTES
+        how = "voice dump" if changed is None else f"voice dump for {len(changed)} parameters"
+    else:
+        sys_channel = device.System.Channel
+        for address in changed:
+            data = voice.get_byte(address)
+            device.Coalescer.send(make_sysex([0x43, 0x75, sys_channel, 0x18 + inst, address, data & 0x0F, data >> 4]))
+        sent = len(changed) * PARAM_CHANGE_BYTES
+        how = f"{len(changed)} parameter changes"
+    device.SyncBytes += sent
+    Log.text(f"Voice sync {device.Name} Inst {inst + 1}: {how}, {sent} bytes ({sent * 0.32:.1f} ms at 31.25 kbaud),"
+             f" {(time.perf_counter() - start) * 1e6:.0f} us")
+    return sent
+
+class VoiceFetcher: # Voice data dump requests that don't block; the replies arrive on the FB-01 return port
+    def __init__(self, device, timeout=1.0, retries=2):
+        self.Device = device
+        self.Timeout = timeout              # Seconds to wait for a reply before asking again
+        self.Retries = retries
+        self.Pending = {}                   # Inst -> [deadline, retries left]
+        self.Received = 0
+        self.BadChecksum = 0
+        self.Failed = 0
+
+    def request(self, inst, retries=None):
+        self.Device.Port.send(Message('sysex', data=[0x43, 0x75, self.Device.System.Channel, 0x28 + inst, 0x00, 0x00]))
+        self.Pending[inst] = [time.perf_counter() + self.Timeout, self.Retries if retries is None else retries]
+
+    def request_all(self): # All 8 requests go out back to back, the FB-01 answers them in order
+        for inst in range(8):
+            self.request(inst)
+
+    def on_return(self, msg): # Return port callback (backend thread): parse here, apply on the main thread
+        if msg.type == 'sysex':
+            reply = parse_voice_dump(msg.data)
+            if reply is not None:
+                reply.Fetcher = self
+                inbox.put((time.perf_counter(), None, reply))
+
+    def receive(self, reply):
+        pending = self.Pending.get(reply.Inst)
+        if not reply.Valid:
+            self.BadChecksum += 1
+            Log.text(f"Voice data for {self.Device.Name} Inst {reply.Inst + 1} failed its checksum")
+            if pending is not None:
+                self.retry(reply.Inst, pending)
+            return
+        self.Pending.pop(reply.Inst, None)
+        self.Device.Voices[reply.Inst].load(reply.Image)
+        self.Device.Believed[reply.Inst].load(reply.Image)
+        self.Device.Known[reply.Inst] = True
+        self.Device.Coalescer.forget(0x18 + reply.Inst)
+        self.Received += 1
+        Log.text(f"Voice data received: {self.Device.Name} Inst {reply.Inst + 1} \"{self.Device.Voices[reply.Inst].Name}\"")
+
+    def retry(self, inst, pending):
+        if pending[1] > 0:
+            self.request(inst, pending[1] - 1)
+        else:
+            del self.Pending[inst]
+            self.Failed += 1
+            Log.text(f"No voice data from {self.Device.Name} for Inst {inst + 1}, keeping the script's voice")
+
+    def timeout(self): # Seconds until the next request times out (None = nothing pending)
+        if not self.Pending:
+            return None
+        return max(0.0, min(pending[0] for pending in self.Pending.values()) - time.perf_counter())
+
+    def check(self):
+        now = time.perf_counter()
+        for inst, pending in list(self.Pending.items()):
+            if pending[0] <= now:
+                self.retry(inst, pending)
+
+    def __str__(self):
+        return f"Voice dumps: {self.Received} received, {self.BadChecksum} bad checksums, {self.Failed} failed"
+
+def restore(changes): # Bring the changed bytes back and send one parameter change for each that differs
+    for (channel, target, address), data in changes.items():
+        owner = owners[channel][target]
+        if owner.get_byte(address) == data:
+            continue
+        sys_channel = owners[channel][SYSTEM].Channel
+        owner.set_byte(address, data)
+        channel_device[channel].Coalescer.send(make_sysex(param_sysex(byte_params[(target, address)], data,
+                                                                      sys_channel, channel)))
+
+def undo_cc(value, channel):
+    if value == 127 and History is not None:
+        changes = History.undo()
+        restore(changes)
+        Log.text(f"Undo: {len(changes)} parameters" if changes else "Nothing to undo")
+
+def redo_cc(value, channel):
+    if value == 127 and History is not None:
+        changes = History.redo()
+        restore(changes)
+        Log.text(f"Redo: {len(changes)} parameters" if changes else "Nothing to redo")
+
+class PatchLibrary: # Voice images kept in an SQLite file (--library), indexed for quick lookup and recall
+    PAGE = 128                              # Patches a recall CC can reach, the page CC picks which ones
+
+    def __init__(self, path):
+        import sqlite3                      # Only loaded when a library is used
+        self.Path = path
+        self.Db = sqlite3.connect(path)
+        self.Db.executescript('''
+            CREATE TABLE IF NOT EXISTS patches (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                algorithm INTEGER NOT NULL,
+                feedback INTEGER NOT NULL,
+                hash BLOB NOT NULL,
+                image BLOB NOT NULL,
+                saved REAL NOT NULL);
+            CREATE UNIQUE INDEX IF NOT EXISTS patches_hash ON patches (hash);
+            CREATE INDEX IF NOT EXISTS patches_name ON patches (name);
+            CREATE INDEX IF NOT EXISTS patches_algorithm ON patches (algorithm);
+            CREATE INDEX IF NOT EXISTS patches_feedback ON patches (feedback);''')
+        self.Page = 0
+        self.Saved = 0
+        self.Recalled = 0
+
+    def save(self, voice, commit=True): # -> True if stored, False if the same image is already there
+        image = bytes(voice.Data)
+        cursor = self.Db.execute("INSERT OR IGNORE INTO patches (name, algorithm, feedback, hash, image, saved)"
+                                 " VALUES (?, ?, ?, ?, ?, ?)", (voice.Name.rstrip(), voice.Algorithm, voice.Feedback,
+                                                                hashlib.sha256(image).digest(), image, time.time()))
+        if commit:
+            self.Db.commit()
+        self.Saved += cursor.rowcount
+        return cursor.rowcount == 1
+
+    def at(self, position): # -> (name, image) of the patch at this position in name order, or None
+        return self.Db.execute("SELECT name, image FROM patches ORDER BY name, id LIMIT 1 OFFSET ?",
+                               (position,)).fetchone()
+
+    def find(self, name=None, algorithm=None, feedback=None): # -> [(id, name, algorithm, feedback)] in name order
+        where = []
+        values = []
+        if name is not None:
+            where.append("name LIKE ?")
+            values.append(name)
+        if algorithm is not None:
+            where.append("algorithm = ?")
+            values.append(algorithm)
+        if feedback is not None:
+            where.append("feedback = ?")
+            values.append(feedback)
+        query = "SELECT id, name, algorithm, feedback FROM patches"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        return self.Db.execute(query + " ORDER BY name, id", values).fetchall()
+
+    def image(self, patch_id):
+        row = self.Db.execute("SELECT image FROM patches WHERE id = ?", (patch_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def count(self):
+        return self.Db.execute("SELECT COUNT(*) FROM patches").fetchone()[0]
+
+    def close(self):
+        self.Db.close()
+
+    def __str__(self):
+        return f"Patch library {self.Path}: {self.Saved} saved, {self.Recalled} recalled"
+
+Library = None                              # PatchLibrary with --library
+
+def send_voice_cc(value, channel):
+    if value == 127:
+        send_voice(channel_device[channel], inst_index[channel])
+
+def sync_voice_cc(value, channel): # Send only what the FB-01's voice is missing
+    if value == 127:
+        sync_voice(channel_device[channel], inst_index[channel])
+
+def save_voice_cc(value, channel): # Store the channel's instrument voice in the library
+    if value != 127 or Library is None:
+        return
+    voice = channel_device[channel].Voices[inst_index[channel]]
+    if Library.save(voice):
+        Log.text(f"Voice saved to the library: \"{voice.Name}\"")
+    else:
+        Log.text(f"Voice \"{voice.Name}\" is already in the library")
+
+def patch_page_cc(value, channel): # Which 128 library patches the recall CC reaches
+    if Library is not None:
+        Library.Page = value
+
+def recall_voice_cc(value, channel): # Load a library patch into the channel's instrument and sync it
+    if Library is None:
+        return
+    patch = Library.at(Library.Page * PatchLibrary.PAGE + value)
+    if patch is None:
+        Log.text(f"No library patch {Library.Page * PatchLibrary.PAGE + value + 1}")
+        return
+    device = channel_device[channel]
+    inst = inst_index[channel]
+    device.Voices[inst].load(patch[1])
+    Library.Recalled += 1
+    sync_voice(device, inst)
+
+# CCs the patch library actions take over with --library (the Config name characters stay on NRPN 1/2 ~ 1/4)
+library_ccs = {8: 'save_voice', 9: 'recall_voice', 11: 'patch_page'}
+
+# Actions that can be assigned to CCs in the mapping file ("action": name)
+actions = {'send_voice': send_voice_cc, 'sync_voice': sync_voice_cc, 'undo': undo_cc, 'redo': redo_cc, 'save_voice': save_voice_cc, 'recall_voice': recall_voice_cc,
+           'patch_page': patch_page_cc, 'nrpn_msb': nrpn_msb_cc, 'nrpn_lsb': nrpn_lsb_cc, 'rpn_msb': rpn_msb_cc,
+           'rpn_lsb': rpn_lsb_cc, 'data_msb': data_msb_cc, 'data_lsb': data_lsb_cc,
+           'data_increment': data_increment_cc, 'data_decrement': data_decrement_cc}
+
+def use_library(): # Unless the mapping already gives the library actions CCs of their own
+    taken = [actions[name] for name in library_ccs.values()]
+    if any(action in taken for action in cc_actions):
+        return
+    for control, name in library_ccs.items():
+        cc_passthru[control] = False
+        cc_map[control] = None
+        cc_actions[control] = actions[name]
+
+# CC number -> action for CCs that trigger something instead of changing a parameter
+cc_actions = [None] * 128
+
+load_mapping(write_cache=__name__ == "__main__") # Importing the module (tools, pool workers) only reads the cache
+
+# Messages that belong to a MIDI channel (everything else goes to every device)
+channel_types = {'note_off', 'note_on', 'polytouch', 'control_change', 'program_change', 'aftertouch', 'pitchwheel'}
+
+def handle_message(msg):
+    if msg.type == 'control_change':
+        device = channel_device[msg.channel]
+        # Pre-implemented controller events
+        if cc_passthru[msg.control] or not device.Translate:
+            device.Port.send(msg)
+            Log.put(LOG_THRU_CC, msg)
+            return
+
+        sysex_msg = cc_to_sysex(msg.control, msg.value, msg.channel)
+        if sysex_msg is None:
+            action = cc_actions[msg.control]
+            if action is None:
+                Log.put(LOG_UNMAPPED, msg)
+            else:
+                action(msg.value, msg.channel)
+            return
+        device.Coalescer.send(sysex_msg)
+        # Multi-sysex controlled events
+        sysex_msg2 = cc_2nd_sysex(msg.control, msg.value, msg.channel)
+        if sysex_msg2 is not None:
+            device.Coalescer.send(sysex_msg2)
+    elif msg.type == 'voice_data':
+        msg.Fetcher.receive(msg)
+    else:
+        if msg.type in channel_types:
+            device = channel_device[msg.channel]
+            if msg.type == 'program_change':
+                device.Coalescer.flush() # Edits queued for the old voice go out first
+                device.voice_changed(inst_num[msg.channel])
+            device.Port.send(msg)
+        else:
+            for device in Devices:
+                device.Port.send(msg)
+        Log.put(LOG_THRU, msg)
+
+def match_port(names, pattern): # Exact name first, then the first name the regular expression matches
+    if pattern in names:
+        return names.index(pattern)
+    try:
+        expression = re.compile(pattern)
+    except re.error:
+        return None
+    for index, name in enumerate(names):
+        if expression.search(name):
+            return index
+    return None
+
+def choose_port(kind, pattern, list_names, wait): # -> (index, name)
+    names = list_names()
+    if pattern is None:
+        if not sys.stdin.isatty():
+            sys.exit(f"No {kind} port given (use the command line options or environment variables)")
+        print(f"\nMIDI {'Outputs' if kind == 'Output' else 'Inputs'}:\n{names}\n")
+        index = int(input(f"Select {kind}: "))
+        return index, names[index]
+
+    # USB MIDI interfaces can show up a while after boot, so keep looking for a bit
+    deadline = None if wait < 0 else time.monotonic() + wait
+    while True:
+        index = match_port(names, pattern)
+        if index is not None:
+            return index, names[index]
+        if deadline is not None and time.monotonic() >= deadline:
+            sys.exit(f"No {kind} port matches {pattern!r}, ports: {names}")
+        time.sleep(0.5)
+        names = list_names()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yamaha FB-01 CC to SysEx conversion")
+    parser.add_argument('--input', action='append', metavar='NAME',
+                        help="controller input port, exact name or regular expression; repeat it to merge several"
+                             " controllers (env FB01_INPUT, separated by ;)")
+    parser.add_argument('--remap', action='append', default=[], metavar='N=FROM:TO,...',
+                        help="CC remap for the Nth --input, e.g. 2=20:32,21:48 (that controller's CC 20 acts as CC 32)")
+    parser.add_argument('--output', default=os.environ.get('FB01_OUTPUT'), metavar='NAME',
+                        help="output port to the FB-01, exact name or regular expression (env FB01_OUTPUT)")
+    parser.add_argument('--return-port', default=os.environ.get('FB01_RETURN'), metavar='NAME',
+                        help="FB-01 return port for --fetch-voices, exact name or regular expression (env FB01_RETURN)")
+    parser.add_argument('--route', action='append', metavar='CHANNELS=NAME[,OPTION...]',
+                        help="send MIDI channels to their own FB-01 instead of --output, e.g. 1-8=FB-01 A and"
+                             " 9-16=FB-01 B,system=2,return=FB-01 B; options name=, system=, return= and thru"
+                             " (plain MIDI device, CCs are passed on); repeat it for every device")
+    parser.add_argument('--wait', type=float, default=float(os.environ.get('FB01_WAIT', 0)), metavar='SECONDS',
+                        help="wait this long for named ports to show up, -1 = forever (env FB01_WAIT, default 0)")
+    parser.add_argument('--coalesce', type=float, default=3, metavar='MS',
+                        help="parameter sysex flush window in milliseconds, newest value wins (0 = off, default 3)")
+    parser.add_argument('--send-voices', action='store_true',
+                        help="send the script's voice data (INIT voice) to all 8 instruments at startup")
+    parser.add_argument('--fetch-voices', action='store_true',
+                        help="request all 8 instrument voices from the FB-01 at startup (asks for the FB-01 return port)")
+    parser.add_argument('--log', choices=('off', 'summary', 'messages'), default='messages',
+                        help="console log: nothing, counts every few seconds, or every message (default)")
+    parser.add_argument('--log-buffer', type=int, default=1024, metavar='N',
+                        help="log records to buffer before dropping them (default 1024)")
+    parser.add_argument('--mapping', default=MAPPING, metavar='FILE',
+                        help="CC mapping file (default fb01_mapping.json next to this script)")
+    parser.add_argument('--library', default=os.environ.get('FB01_LIBRARY'), metavar='FILE',
+                        help="patch library (SQLite file, created if needed) for the save_voice, recall_voice and"
+                             " patch_page CC actions (env FB01_LIBRARY)")
+    parser.add_argument('--history', type=int, default=4096, metavar='N',
+                        help="parameter edits kept for the undo and redo CC actions (default 4096, 0 = off)")
+    parser.add_argument('--record', metavar='FILE',
+                        help="write a session journal of everything received and sent, for fb01_replay.py")
+    parser.add_argument('--nrpn', action='store_true',
+                        help="decode NRPN/RPN (CC 99/98, 101/100 with data entry CC 6/38, 96/97) to reach every"
+                             " FB-01 parameter; those CCs lose their mapped parameters")
+    parser.add_argument('--no-lanes', action='store_true',
+                        help="send everything in arrival order, without putting notes first or pacing sysex")
+    parser.add_argument('--baud', type=int, default=31250,
+                        help="link speed the sysex pacing assumes (default 31250, DIN MIDI; 0 = don't model the link)")
+    parser.add_argument('--sysex-gap', type=float, default=1, metavar='MS',
+                        help="time the FB-01 gets after each parameter change sysex (default 1)")
+    parser.add_argument('--dump-gap', type=float, default=50, metavar='MS',
+                        help="time the FB-01 gets after each bulk voice dump (default 50)")
+    parser.add_argument('--raw', action='store_true',
+                        help="talk to python-rtmidi directly, passing MIDI bytes through without mido messages")
+    parser.add_argument('--metrics', action='store_true',
+                        help="time every pipeline stage; the summary is printed on exit and on SIGUSR1")
+    args = parser.parse_args()
+    if args.input is None and os.environ.get('FB01_INPUT'):
+        args.input = os.environ['FB01_INPUT'].split(';')
+    if args.mapping != MAPPING:
+        try:
+            load_mapping(args.mapping)
+        except (OSError, ValueError) as error:
+            sys.exit(f"Can't load the CC mapping: {error}")
+    if args.nrpn:
+        use_nrpn()
+    if args.history > 0:
+        History = EditHistory(args.history)
+    if args.library:
+        import sqlite3
+        try:
+            Library = PatchLibrary(args.library)
+        except sqlite3.Error as error:
+            sys.exit(f"Can't open the patch library: {error}")
+        use_library()
+
+    if args.raw:
+        try:
+            import rtmidi
+        except ImportError:
+            sys.exit("--raw needs python-rtmidi (pip install python-rtmidi)")
+        list_inputs = lambda: rtmidi.MidiIn().get_ports()
+        list_outputs = lambda: rtmidi.MidiOut().get_ports()
+    else:
+        list_inputs = mido.get_input_names
+        list_outputs = mido.get_output_names
+
+    remaps = {}
+    for spec in args.remap:
+        number, _, pairs = spec.partition('=')
+        try:
+            remaps[int(number) - 1] = parse_remap(pairs)
+        except ValueError as error:
+            sys.exit(f"Bad --remap {spec!r}: {error}")
+
+    for number, pattern in enumerate(args.input or [None]):
+        index, name = choose_port("Controller Input", pattern, list_inputs, args.wait)
+        controller = ControllerInput(name, remaps.get(number), number)
+        if args.raw:
+            controller.Port = open_raw_input(index, name, controller.on_input)
+        else:
+            controller.Port = mido.open_input(name, callback=controller.on_input)
+        Inputs.append(controller)
+
+    # Without --route, everything goes to the one FB-01 on --output
+    routes = []
+    for spec in args.route or []:
+        try:
+            routes.append(parse_route(spec))
+        except ValueError as error:
+            sys.exit(f"Bad --route {spec!r}: {error}")
+    if not routes:
+        routes = [(0, 15, args.output, {'return': args.return_port})]
+
+    if args.raw:
+        use_raw_messages()
+    if args.metrics:
+        Metrics = PipelineMetrics()
+        cc_to_sysex = timed(cc_to_sysex, Metrics.Translate)
+        cc_2nd_sysex = timed(cc_2nd_sysex, Metrics.Translate)
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: print(Metrics.report()))
+
+    for number, (first, last, pattern, options) in enumerate(routes):
+        index, output_name = choose_port("Output", pattern, list_outputs, args.wait)
+        if number == 0: # The first device is the one created at import time
+            device = Devices[0]
+        else:
+            device = Device()
+            Devices.append(device)
+        if args.route:
+            device.Name = options.get('name') or output_name
+            device.Translate = 'thru' not in options
+        if 'system' in options:
+            device.System.Channel = int(options['system']) - 1
+        device.Output = output_name
+        device.ReturnPattern = options.get('return')
+        if args.raw:
+            port = open_raw_output(index, output_name)
+        else:
+            port = mido.open_output(output_name)
+        if Metrics is not None:
+            port = TimedPort(port, Metrics.Send)
+        if not args.no_lanes:
+            device.Lanes = OutputLanes(port, args.baud, args.sysex_gap / 1000, args.dump_gap / 1000)
+            port = device.Lanes
+            if Metrics is not None:
+                device.Lanes.Timing = Metrics.Pacing
+        device.attach(port, args.coalesce / 1000)
+        if Metrics is not None:
+            device.Coalescer.Timing = Metrics.Coalesce
+    route([(first, last, device) for (first, last, pattern, options), device in zip(routes, Devices)])
+    fb01s = [device for device in Devices if device.Translate]
+
+    if args.record:
+        try:
+            Journal = SessionJournal(args.record, session_header(args))
+        except OSError as error:
+            sys.exit(f"Can't write the session journal: {error}")
+        for number, device in enumerate(Devices):
+            device.Port = JournalPort(device.Port, Journal, number)
+            device.Coalescer.Record = device.Port.record
+
+    Log = Logger(('off', 'summary', 'messages').index(args.log), args.log_buffer)
+    Log.start()
+
+    if args.fetch_voices:
+        for device in fb01s:
+            index, name = choose_port(f"{device.Name} Return", device.ReturnPattern, list_inputs, args.wait)
+            if args.raw:
+                device.ReturnPort = open_raw_input(index, name, device.Fetcher.on_return)
+            else:
+                device.ReturnPort = mido.open_input(name, callback=device.Fetcher.on_return)
+    print(f"\nPorts open {(time.perf_counter() - Started) * 1000:.0f} ms after startup")
+    print("Controller Input Ports: " + ", ".join(controller.Name for controller in Inputs))
+    for device in Devices:
+        channels = [channel + 1 for channel in range(16) if channel_device[channel] is device]
+        print(f"{device.Name}: Output Port {device.Output}, Return Port {device.ReturnPort},"
+              f" channels {channels[0]}-{channels[-1]}{'' if device.Translate else ' (thru)'}")
+    print()
+
+    try:
+        for device in fb01s:
+            if args.send_voices:
+                for inst in range(8):
+                    send_voice(device, inst)
+            if args.fetch_voices:
+                device.Fetcher.request_all()
+
+        print("Listening for MIDI messages. Press Ctrl+C to quit.\n\n CC/Val | Sysex String\n=======================")
+
+        while True:
+            # Block until an input callback hands over a message (no polling, no CPU use while idle), or
+            # until pending parameter sysex, queued sysex output or voice dump requests are due on any device
+            timeouts = [timeout for timeout in (device.timeout() for device in Devices) if timeout is not None]
+            try:
+                received, source, msg = inbox.get(timeout=min(timeouts) if timeouts else None)
+            except queue.Empty:
+                pass
+            else:
+                if Metrics is not None:
+                    Metrics.received(received, msg)
+                if Journal is not None:
+                    if msg.type == 'voice_data':
+                        Journal.put(JOURNAL_RETURN, Devices.index(msg.Fetcher.Device), msg, received)
+                    else:
+                        Journal.put(JOURNAL_IN, source, msg, received)
+                if source is not None:
+                    msg = Inputs[source].remap(msg)
+                handle_message(msg)
+                done = time.perf_counter()
+                if Latency.Count == 0:
+                    print(f"First message forwarded {(done - Started) * 1000:.0f} ms after startup")
+                Latency.add(done - received)
+                if Metrics is not None:
+                    Metrics.Total.record(done - received)
+            for device in Devices:
+                device.service()
+
+    except KeyboardInterrupt:
+        print("Script interrupted by user.")
+
+    finally:
+        for device in Devices:
+            device.Coalescer.flush()
+            if device.Lanes is not None:
+                device.Lanes.drain()
+            device.Port.send(mido.Message('control_change', control=123, value=0))
+        Log.close()                         # After the last sends, so their records are still written out
+        print("All Notes Off message sent.")
+        print(Latency)
+        for device in Devices:
+            if len(Devices) > 1:
+                print(f"{device.Name}:")
+            print(device.Coalescer)
+            if device.Translate:
+                print(device.Fetcher)
+            if device.Lanes is not None:
+                print(device.Lanes)
+            if device.Syncs:
+                print(f"Voice syncs: {device.Syncs}, {device.SyncBytes} bytes sent instead of {device.DumpBytes}")
+        if Metrics is not None:
+            print(Metrics.report())
+        if History is not None:
+            print(History)
+        if Journal is not None:
+            Journal.close()
+            print(Journal)
+        if Library is not None:
+            print(Library)
+            Library.close()
+        for controller in Inputs:
+            print(controller)
+            controller.close()
+        for device in Devices:
+            device.Port.close()
+            if device.ReturnPort is not None:
+                device.ReturnPort.close()
+        print("MIDI ports closed.")
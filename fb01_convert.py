@@ -0,0 +1,349 @@
+# Offline conversion: renders a Standard MIDI File through the same translation as the live script, so the mapped
+# CCs come out as FB-01 sysex at the same ticks. The tracks are read side by side and merged by tick, so every
+# event is translated against the state at its own time, as the live loop would. Events are read and written one
+# at a time (each track through a small read buffer and its own temporary file), so memory use doesn't grow with
+# the file size. No MIDI port is ever opened.
+#
+# python fb01_convert.py song.mid song_fb01.mid
+# python fb01_convert.py soundtrack/ converted/     every .mid below soundtrack/, spread over all CPU cores
+
+import argparse
+import concurrent.futures
+import hashlib
+import heapq
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+from mido import Message
+
+import fb01_cc2sysex as fb01
+
+# Data bytes following each channel message status (by high nibble)
+data_length = {0x80: 2, 0x90: 2, 0xA0: 2, 0xB0: 2, 0xC0: 1, 0xD0: 1, 0xE0: 2}
+
+def encode_varlen(value):
+    data = [value & 0x7F]
+    value >>= 7
+    while value:
+        data.append(0x80 | (value & 0x7F))
+        value >>= 7
+    return bytes(reversed(data))
+
+READ_BLOCK = 4096                           # Bytes each track reader buffers
+
+class TrackReader: # Events of one MTrk chunk, read straight from the file (several readers can share it)
+    def __init__(self, file, offset, length):
+        self.File = file
+        self.Offset = offset                # Where the next block of this track starts in the file
+        self.Remaining = length             # Bytes of the track not consumed yet
+        self.Buffer = b''
+        self.Position = 0
+
+    def read(self, count):
+        if count > self.Remaining:
+            raise ValueError("MIDI track event runs past the end of its chunk")
+        if len(self.Buffer) - self.Position < count:
+            left = self.Buffer[self.Position:]
+            self.File.seek(self.Offset)
+            data = self.File.read(min(max(count - len(left), READ_BLOCK), self.Remaining - len(left)))
+            self.Offset += len(data)
+            self.Buffer = left + data
+            self.Position = 0
+            if len(self.Buffer) < count:
+                raise ValueError("MIDI file ends in the middle of a track")
+        data = self.Buffer[self.Position:self.Position + count]
+        self.Position += count
+        self.Remaining -= count
+        return data
+
+    def varlen(self):
+        value = 0
+        while True:
+            byte = self.read(1)[0]
+            value = (value << 7) | (byte & 0x7F)
+            if byte < 0x80:
+                return value
+
+    # Yields (delta, status, data): status 0xFF = meta event (data = type + length + payload as stored),
+    # 0xF0/0xF7 = sysex (data = payload as stored), otherwise a channel message (data = its data bytes).
+    def __iter__(self):
+        running = None
+        while self.Remaining > 0:
+            delta = self.varlen()
+            status = self.read(1)[0]
+            if status == 0xFF:
+                kind = self.read(1)
+                length = self.varlen()
+                yield delta, status, kind + encode_varlen(length) + self.read(length)
+            elif status in (0xF0, 0xF7):
+                running = None
+                yield delta, status, self.read(self.varlen())
+            elif status > 0xF0: # System common/real time bytes don't belong in a MIDI file
+                raise ValueError(f"unsupported status byte {status:02X}")
+            else:
+                if status < 0x80: # Running status, this was already the first data byte
+                    if running is None:
+                        raise ValueError("MIDI file uses running status without a status byte")
+                    data = bytes([status]) + self.read(data_length[running & 0xF0] - 1)
+                    status = running
+                else:
+                    running = status
+                    data = self.read(data_length[status & 0xF0])
+                yield delta, status, data
+
+def track_events(reader, track): # (absolute tick, track, status, data) up to and including the end of track
+    tick = 0
+    for delta, status, data in reader:
+        tick += delta
+        yield tick, track, status, data
+        if status == 0xFF and data[0] == 0x2F:
+            return
+
+class TrackWriter: # Stands in for the output port of the track whose event is being converted
+    def __init__(self, file):
+        self.File = file
+        self.Now = 0        # Tick of the event being converted, what is sent goes out at this tick
+        self.Tick = 0       # Tick of the last event written (dropped events pass their delta on)
+        self.Events = 0
+        self.Ended = False
+
+    def write(self, status, data):
+        self.File.write(encode_varlen(self.Now - self.Tick) + bytes([status]) + data)
+        self.Tick = self.Now
+        self.Events += 1
+
+    def send(self, msg):
+        if msg.type == 'sysex':
+            data = bytes(msg.data) + b'\xF7'
+            self.write(0xF0, encode_varlen(len(data)) + data)
+        else:
+            data = msg.bytes()
+            self.write(data[0], bytes(data[1:]))
+
+class SongClock: # Seconds into the song at the tick being converted, so undo steps are grouped as when played live
+    def __init__(self, division):
+        self.Beat = 0 if division & 0x8000 else max(division, 1) # Ticks per beat, 0 = SMPTE time (no tempo)
+        if self.Beat:
+            self.TickTime = 0.5 / self.Beat # Seconds per tick, 120 BPM until a tempo is set
+        else: # Frames per second (negated) times ticks per frame
+            self.TickTime = 1 / max((256 - (division >> 8)) * (division & 0xFF), 1)
+        self.Now = 0
+        self.Tick = 0                       # Tick of the last tempo change
+        self.Base = 0.0                     # and its time
+
+    def tempo(self, tempo): # Microseconds per beat from tick Now on
+        if self.Beat:
+            self.Base = self()
+            self.Tick = self.Now
+            self.TickTime = tempo / 1000000 / self.Beat
+
+    def __call__(self):
+        return self.Base + (self.Now - self.Tick) * self.TickTime
+
+def convert_stream(source, destination): # Binary file objects; the source has to be seekable
+    fb01.reset_state()
+    fb01.Log = fb01.Logger(fb01.LOG_OFF)
+    device = fb01.Devices[0]
+    device.attach(None)
+    stats = {'events': 0, 'written': 0}
+
+    chunk, length = struct.unpack('>4sL', source.read(8))
+    if chunk != b'MThd':
+        raise ValueError("not a Standard MIDI File")
+    header = source.read(length)
+    destination.write(struct.pack('>4sL', chunk, length) + header)
+    if len(header) < 6:
+        raise ValueError("MIDI file header is too short")
+    clock = SongClock(struct.unpack('>H', header[4:6])[0])
+    fb01.History = fb01.EditHistory()       # Undo/redo CCs work as in the live script, with a fresh history per file
+    fb01.History.Clock = clock
+
+    # Find the chunks first, then read all tracks side by side
+    chunks = []                             # (chunk id, offset of its data, length)
+    offset = 8 + length
+    while True:
+        source.seek(offset)
+        head = source.read(8)
+        if len(head) < 8:
+            break
+        chunk, length = struct.unpack('>4sL', head)
+        chunks.append((chunk, offset + 8, length))
+        offset += 8 + length
+
+    tracks = [(offset, length) for chunk, offset, length in chunks if chunk == b'MTrk']
+    writers = [TrackWriter(tempfile.TemporaryFile()) for track in tracks]
+    try:
+        events = heapq.merge(*(track_events(TrackReader(source, offset, length), track)
+                               for track, (offset, length) in enumerate(tracks)),
+                             key=lambda event: (event[0], event[1]))
+        held = None                         # (track, status) of the CC whose message the coalescer may hold back
+        for tick, track, status, data in events: # Ties keep the track order
+            stats['events'] += 1
+            if device.Coalescer.Pending and (track, status) != held:
+                device.Coalescer.flush()    # Only a CC on the same channel and track can replace it (data LSB)
+            writer = writers[track]
+            writer.Now = tick
+            clock.Now = tick
+            if status == 0xFF:
+                if data[:2] == b'\x51\x03': # Set tempo
+                    clock.tempo(int.from_bytes(data[2:5], 'big'))
+                writer.write(status, data)
+                if data[0] == 0x2F: # End of track
+                    writer.Ended = True
+            elif status == 0xF7: # Escaped raw bytes, not a message of their own
+                writer.write(status, encode_varlen(len(data)) + data)
+            else:
+                device.Port = writer
+                device.Coalescer.Port = writer
+                held = (track, status) if status & 0xF0 == 0xB0 else None
+                if status == 0xF0:
+                    fb01.handle_message(Message('sysex', data=data[:-1] if data[-1:] == b'\xF7' else data))
+                else:
+                    fb01.handle_message(Message.from_bytes(bytes([status]) + data))
+        device.Coalescer.flush()
+
+        track = 0
+        for chunk, offset, length in chunks:
+            if chunk != b'MTrk': # Unknown chunk, copy it as is
+                destination.write(struct.pack('>4sL', chunk, length))
+                source.seek(offset)
+                while length:
+                    data = source.read(min(length, 65536))
+                    if not data:
+                        raise ValueError("MIDI file ends in the middle of a chunk")
+                    destination.write(data)
+                    length -= len(data)
+                continue
+            writer = writers[track]
+            track += 1
+            if not writer.Ended:
+                writer.write(0xFF, b'\x2F\x00')
+            destination.write(struct.pack('>4sL', b'MTrk', writer.File.tell()))
+            writer.File.seek(0)
+            shutil.copyfileobj(writer.File, destination)
+            stats['written'] += writer.Events
+    finally:
+        for writer in writers:
+            writer.File.close()
+    return stats
+
+def convert_file(source_path, destination_path):
+    with open(source_path, 'rb') as source, open(destination_path, 'wb') as destination:
+        return convert_stream(source, destination)
+
+MANIFEST = ".fb01_convert.json" # Input hashes of the files already converted into a batch output folder
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def translator_hash(): # Converted files are only current while the translation code and mapping are the same
+    digest = hashlib.sha256(fb01.MappingHash.encode())
+    for module in (fb01, sys.modules[__name__]):
+        with open(module.__file__, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+def convert_job(source_path, destination_path, mapping): # Runs in a pool worker, each of which has its own state
+    start = time.perf_counter()
+    try:
+        if mapping != fb01.MAPPING:
+            fb01.load_mapping(mapping, write_cache=False) # Cheap, the parent process cached the compiled tables
+        stats = convert_file(source_path, destination_path)
+    except (OSError, ValueError) as error:
+        return None, str(error), time.perf_counter() - start
+    return stats, None, time.perf_counter() - start
+
+# Yields (relative, source, digest, result) as the files finish; jobs=1 converts them in this process
+def run_jobs(work, jobs, mapping):
+    if jobs == 1:
+        for relative, source, destination, digest in work:
+            yield relative, source, digest, convert_job(source, destination, mapping)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(convert_job, source, destination, mapping): (relative, source, digest)
+                   for relative, source, destination, digest in work}
+        for future in concurrent.futures.as_completed(futures):
+            yield futures[future] + (future.result(),)
+
+def convert_folder(source_dir, destination_dir, jobs=None, force=False, mapping=fb01.MAPPING):
+    manifest_path = os.path.join(destination_dir, MANIFEST)
+    manifest = {'translator': translator_hash(), 'files': {}}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as file:
+            previous = json.load(file)
+        if previous.get('translator') == manifest['translator']:
+            manifest['files'] = previous['files']
+
+    work = []
+    skipped = 0
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(('.mid', '.midi', '.smf')):
+                continue
+            source = os.path.join(root, name)
+            relative = os.path.relpath(source, source_dir)
+            destination = os.path.join(destination_dir, relative)
+            digest = file_hash(source)
+            if manifest['files'].get(relative) == digest and os.path.exists(destination):
+                skipped += 1
+                continue
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            work.append((relative, source, destination, digest))
+
+    start = time.perf_counter()
+    events = 0
+    size = 0
+    failed = 0
+    done = 0
+    for relative, source, digest, (stats, error, seconds) in run_jobs(work, jobs, mapping):
+        done += 1
+        if error is not None:
+            failed += 1
+            manifest['files'].pop(relative, None)
+            print(f"[{done}/{len(work)}] {relative}: {error}")
+            continue
+        manifest['files'][relative] = digest
+        events += stats['events']
+        size += os.path.getsize(source)
+        print(f"[{done}/{len(work)}] {relative}: {stats['events']} events in, {stats['written']} out"
+              f" ({seconds * 1000:.0f} ms)")
+    elapsed = time.perf_counter() - start
+
+    os.makedirs(destination_dir, exist_ok=True)
+    with open(manifest_path, 'w') as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    print(f"{len(work) - failed} converted, {skipped} unchanged, {failed} failed in {elapsed:.2f} s"
+          f" ({events / max(elapsed, 1e-9):.0f} events/s, {size / 1e6 / max(elapsed, 1e-9):.2f} MB/s)")
+    return failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a MIDI file's mapped CCs as FB-01 sysex.")
+    parser.add_argument('source', help="Standard MIDI File to read, or a folder to convert all MIDI files in")
+    parser.add_argument('destination', help="MIDI file to write (a folder when the source is one)")
+    parser.add_argument('--jobs', type=int, default=None, help="worker processes for folders (default: CPU count)")
+    parser.add_argument('--mapping', default=fb01.MAPPING, metavar='FILE',
+                        help="CC mapping file (default fb01_mapping.json)")
+    parser.add_argument('--force', action='store_true', help="convert files even if they haven't changed")
+    args = parser.parse_args()
+    try:
+        fb01.load_mapping(args.mapping)
+    except (OSError, ValueError) as error:
+        sys.exit(f"Can't load the CC mapping: {error}")
+
+    if os.path.isdir(args.source):
+        sys.exit(1 if convert_folder(args.source, args.destination, args.jobs, args.force, args.mapping) else 0)
+
+    start = time.perf_counter()
+    stats = convert_file(args.source, args.destination)
+    print(f"{args.source}: {stats['events']} events in, {stats['written']} out"
+          f" ({time.perf_counter() - start:.2f} s)")
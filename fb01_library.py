@@ -0,0 +1,80 @@
+# Patch library tool: fills and searches the SQLite voice library the live script saves to and recalls from
+# (--library, with the save_voice, recall_voice and patch_page CC actions).
+#
+# python fb01_library.py patches.sqlite import dumps/*.syx     store the voice dumps in sysex files
+# python fb01_library.py patches.sqlite list --algorithm 4      list patches (name pattern, algorithm, feedback)
+# python fb01_library.py patches.sqlite export 12 voice.syx     write patch 12 as an Inst 1 voice dump
+
+import argparse
+import sys
+
+import fb01_cc2sysex as fb01
+
+def sysex_messages(data): # Every F0 ... F7 message in a .syx file, without F0/F7
+    start = data.find(0xF0)
+    while start >= 0:
+        end = data.find(0xF7, start)
+        if end < 0:
+            return
+        yield data[start + 1:end]
+        start = data.find(0xF0, end)
+
+def import_files(library, paths):
+    voice = fb01.VoiceData(bytearray(fb01.init_voice))
+    for path in paths:
+        stored = duplicates = bad = 0
+        with open(path, 'rb') as file:
+            data = file.read()
+        for sysex_data in sysex_messages(data):
+            reply = fb01.parse_voice_dump(sysex_data)
+            if reply is None:
+                continue
+            if not reply.Valid:
+                bad += 1
+                continue
+            voice.load(reply.Image)
+            if library.save(voice, commit=False): # One commit per file
+                stored += 1
+            else:
+                duplicates += 1
+        library.Db.commit()
+        print(f"{path}: {stored} stored, {duplicates} already there, {bad} bad checksums")
+
+def export_patch(library, patch_id, path):
+    image = library.image(patch_id)
+    if image is None:
+        sys.exit(f"No patch {patch_id}")
+    device = fb01.Devices[0]
+    device.Voices[0].load(image)
+    with open(path, 'wb') as file:
+        file.write(b'\xF0' + bytes(fb01.voice_dump(device, 0).data) + b'\xF7')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the FB-01 patch library.")
+    parser.add_argument('library', help="library file (SQLite, created if needed)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('import', help="store the instrument voice dumps in .syx files")
+    command.add_argument('files', nargs='+')
+    command = commands.add_parser('list', help="list patches in name order with their recall page and CC value")
+    command.add_argument('--name', help="name pattern (SQL LIKE, e.g. 'Bass%%')")
+    command.add_argument('--algorithm', type=int, help="algorithm 1~8")
+    command.add_argument('--feedback', type=int, help="feedback level 0~7")
+    command = commands.add_parser('export', help="write a patch as an instrument voice dump (.syx)")
+    command.add_argument('id', type=int)
+    command.add_argument('file')
+    args = parser.parse_args()
+
+    library = fb01.PatchLibrary(args.library)
+    if args.command == 'import':
+        import_files(library, args.files)
+    elif args.command == 'list':
+        algorithm = None if args.algorithm is None else args.algorithm - 1
+        patches = library.find(args.name, algorithm, args.feedback)
+        positions = {row[0]: n for n, row in enumerate(library.find())}
+        for patch_id, name, algorithm, feedback in patches:
+            page, value = divmod(positions[patch_id], fb01.PatchLibrary.PAGE)
+            print(f"{patch_id:>6}  {name:<7}  algorithm {algorithm + 1}  feedback {feedback}  page {page} value {value}")
+        print(f"{len(patches)} of {library.count()} patches")
+    else:
+        export_patch(library, args.id, args.file)
+    library.close()
@@ -0,0 +1,200 @@
+# Replays a session journal written with --record: plays the recorded input back into the translation at the
+# original speed, faster, or as fast as possible, and compares what it sends with what the session sent.
+#
+# python fb01_replay.py session.fb01j                 as fast as possible
+# python fb01_replay.py session.fb01j --speed 1       at the original speed (--speed 4 = four times as fast)
+# python fb01_replay.py session.fb01j --dump          list the recorded messages
+
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+
+import mido
+
+import fb01_cc2sysex as fb01
+
+def read_journal(path): # -> (header, [(seconds, kind, source, data)])
+    with open(path, 'rb') as file:
+        data = file.read()
+    if not data.startswith(fb01.JOURNAL_MAGIC):
+        raise ValueError("not an FB-01 session journal")
+    offset = len(fb01.JOURNAL_MAGIC)
+    length, = struct.unpack_from('<I', data, offset)
+    offset += 4
+    header = json.loads(data[offset:offset + length])
+    offset += length
+    records = []
+    size = fb01.JOURNAL_RECORD.size
+    while offset + size <= len(data): # A journal cut short by a crash ends with a partial record, skip it
+        stamp, kind, source, length = fb01.JOURNAL_RECORD.unpack_from(data, offset)
+        offset += size
+        if offset + length > len(data):
+            break
+        records.append((stamp, kind, source, data[offset:offset + length]))
+        offset += length
+    return header, records
+
+class Discard: # Where the coalescers flush to; what they are handed is already captured
+    def send(self, msg):
+        pass
+
+    def close(self):
+        pass
+
+class Capture: # Output port stand-in that keeps what each device is sent, like JournalPort does when recording
+    def __init__(self, source, sent):
+        self.Source = source
+        self.Sent = sent
+
+    def record(self, msg):
+        self.Sent.append((self.Source, bytes(msg.bytes())))
+
+    def send(self, msg):
+        self.record(msg)
+
+    def close(self):
+        pass
+
+class JournalClock: # Session time of the record being replayed, so undo steps are grouped as they were live
+    def __init__(self):
+        self.Now = 0.0
+
+    def __call__(self):
+        return self.Now
+
+def setup(header, mapping): # Same mapping, devices, routing and options as the recorded session
+    warnings = []
+    if mapping is None:
+        mapping = header['mapping_file'] if os.path.exists(header['mapping_file']) else fb01.MAPPING
+    fb01.load_mapping(mapping)
+    if fb01.MappingHash != header['mapping']:
+        warnings.append(f"{mapping} is not the mapping the session was recorded with")
+    if header['nrpn']:
+        fb01.use_nrpn()
+    fb01.History = fb01.EditHistory(header['history']) if header['history'] > 0 else None
+    if header['library']:
+        fb01.use_library()
+        if os.path.exists(header['library']):
+            fb01.Library = fb01.PatchLibrary(header['library'])
+        else:
+            warnings.append(f"patch library {header['library']} is missing, recalls won't match")
+
+    sent = []
+    fb01.Devices[1:] = [fb01.Device() for spec in header['devices'][1:]]
+    for number, (device, spec) in enumerate(zip(fb01.Devices, header['devices'])):
+        device.reset()
+        device.Name = spec['name']
+        device.Translate = spec['translate']
+        device.System.Channel = spec['system']
+        device.attach(Discard())
+        device.Port = Capture(number, sent)
+        device.Coalescer.Record = device.Port.record
+    # route() numbers the instruments from the first channel of each range, so give it the recorded ranges
+    fb01.route([(channels[0], channels[-1], fb01.Devices[number])
+                for number, channels in enumerate(spec['channels'] for spec in header['devices']) if channels])
+    fb01.Log = fb01.Logger(fb01.LOG_OFF)
+    return sent, warnings
+
+def make_message(data, raw):
+    if raw:
+        return fb01.RawMessage(data)
+    if data[0] == 0xF0:
+        return mido.Message('sysex', data=data[1:-1])
+    return mido.Message.from_bytes(data)
+
+def replay(header, records, speed, raw):
+    sent, warnings = setup(header, None)
+    fb01.use_raw_messages(raw)
+    clock = JournalClock()
+    if fb01.History is not None:
+        fb01.History.Clock = clock
+    # The journal has the messages as they came in; each input's --remap is applied again here, as live
+    inputs = [fb01.ControllerInput(f"Input {number + 1}", remap, number)
+              for number, remap in enumerate(header.get('remaps', []))]
+    fb01_devices = [device for device in fb01.Devices if device.Translate]
+    for device in fb01_devices:
+        if header['send_voices']:
+            for inst in range(8):
+                fb01.send_voice(device, inst)
+        if header['fetch_voices']:
+            device.Fetcher.request_all()
+
+    start = time.perf_counter()
+    count = 0
+    for stamp, kind, source, data in records:
+        if kind == fb01.JOURNAL_OUT:
+            continue
+        if speed > 0:
+            delay = start + stamp / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        clock.Now = stamp
+        if kind == fb01.JOURNAL_RETURN:
+            msg = fb01.VoiceReply(data[0], data[2:], bool(data[1]))
+            msg.Fetcher = fb01.Devices[source].Fetcher
+        else:
+            msg = make_message(data, raw)
+            if source < len(inputs):
+                msg = inputs[source].remap(msg)
+            count += 1
+        fb01.handle_message(msg)
+    for device in fb01.Devices:
+        device.Coalescer.flush()
+        device.Port.send(mido.Message('control_change', control=123, value=0))
+    return sent, count, time.perf_counter() - start, warnings
+
+def compare(recorded, replayed): # -> (index of the first difference or None, number of differing messages)
+    first = None
+    differences = abs(len(recorded) - len(replayed))
+    for index, (old, new) in enumerate(zip(recorded, replayed)):
+        if old != new:
+            differences += 1
+            if first is None:
+                first = index
+    if first is None and len(recorded) != len(replayed):
+        first = min(len(recorded), len(replayed))
+    return first, differences
+
+def hex_bytes(data):
+    return ' '.join(f'{byte:02X}' for byte in data)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay an fb01_cc2sysex session journal and check its output.")
+    parser.add_argument('journal', help="journal file written with --record")
+    parser.add_argument('--speed', type=float, default=0,
+                        help="1 = original speed, 2 = twice as fast, ... (default 0, as fast as possible)")
+    parser.add_argument('--raw', action='store_true', help="replay through the raw-bytes path (--raw)")
+    parser.add_argument('--dump', action='store_true', help="list the recorded messages instead")
+    args = parser.parse_args()
+    try:
+        header, records = read_journal(args.journal)
+    except (OSError, ValueError) as error:
+        sys.exit(f"Can't read the journal: {error}")
+
+    if args.dump:
+        kinds = {fb01.JOURNAL_IN: "in ", fb01.JOURNAL_OUT: "out", fb01.JOURNAL_RETURN: "ret"}
+        for stamp, kind, source, data in records:
+            print(f"{stamp:10.4f} {kinds[kind]} {source:>2}  {hex_bytes(data)}")
+        sys.exit(0)
+
+    recorded = [(source, data) for stamp, kind, source, data in records if kind == fb01.JOURNAL_OUT]
+    sent, inputs, elapsed, warnings = replay(header, records, args.speed, args.raw)
+    for warning in warnings:
+        print(f"Warning: {warning}")
+    print(f"{inputs} messages replayed in {elapsed:.3f} s ({inputs / max(elapsed, 1e-9):.0f} messages/s),"
+          f" {len(sent)} sent, {len(recorded)} recorded")
+    first, differences = compare(recorded, sent)
+    if first is None:
+        print("Output matches the recording")
+        sys.exit(0)
+    print(f"{differences} messages differ, the first one is #{first + 1}:")
+    for label, messages in (("recorded", recorded), ("replayed", sent)):
+        if first < len(messages):
+            source, data = messages[first]
+            print(f"  {label}: device {source} {hex_bytes(data)}")
+        else:
+            print(f"  {label}: (nothing)")
+    sys.exit(1)
@@ -0,0 +1,50 @@
+# Shared setup for the tests: the translation works on module-level state (devices, routing, mapping tables),
+# so every test starts from the power-on INIT state with one FB-01 on an in-memory port.
+
+import os
+import sys
+
+import mido
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fb01_cc2sysex as fb01
+
+class FakePort: # In-memory output port that keeps the bytes of everything sent
+    def __init__(self):
+        self.Sent = []
+
+    def send(self, msg):
+        self.Sent.append(bytes(msg.bytes()))
+
+    def close(self):
+        pass
+
+@pytest.fixture(autouse=True)
+def mapping_cache(tmp_path_factory, monkeypatch): # Tools called by the tests write their cache here, not into ~/.cache
+    monkeypatch.setattr(fb01, 'MAPPING_CACHE', str(tmp_path_factory.mktemp("cache")))
+
+@pytest.fixture
+def port():
+    fb01.load_mapping(write_cache=False)
+    del fb01.Devices[1:]
+    device = fb01.Devices[0]
+    device.Name = "FB-01"
+    device.Translate = True
+    fb01.route([(0, 15, device)])
+    fb01.reset_state()
+    fb01.use_raw_messages(False)
+    fb01.selects[:] = [fb01.ParamSelect() for channel in range(16)]
+    fb01.History = None
+    fb01.Library = None
+    fb01.Log = fb01.Logger(fb01.LOG_OFF)
+    port = FakePort()
+    device.attach(port)
+    return port
+
+def sysex(*data):
+    return bytes((0xF0,) + data + (0xF7,))
+
+def cc(control, value, channel=0):
+    fb01.handle_message(mido.Message('control_change', control=control, value=value, channel=channel))
@@ -0,0 +1,76 @@
+import time
+
+from mido import Message
+
+import fb01_cc2sysex as fb01
+from conftest import sysex
+
+def param_change(address, value):
+    return Message('sysex', data=[0x43, 0x75, 0x00, 0x18, address, value & 0x0F, value >> 4])
+
+def test_no_window_sends_right_away(port):
+    coalescer = fb01.SysexCoalescer(port, 0)
+    coalescer.send(param_change(0x68, 5))
+    assert port.Sent == [sysex(0x43, 0x75, 0x00, 0x18, 0x68, 0x05, 0x00)]
+    assert coalescer.timeout() is None
+
+def test_same_value_again_is_suppressed(port):
+    coalescer = fb01.SysexCoalescer(port, 0)
+    coalescer.send(param_change(0x68, 5))
+    coalescer.send(param_change(0x68, 5))
+    coalescer.send(param_change(0x68, 6))
+    assert len(port.Sent) == 2
+    assert coalescer.Suppressed == 1
+
+def test_newest_value_wins_within_the_window(port):
+    coalescer = fb01.SysexCoalescer(port, 0.05)
+    for value in range(10):
+        coalescer.send(param_change(0x68, value))
+    coalescer.send(param_change(0x6B, 1))
+    assert port.Sent == []
+    assert 0 < coalescer.timeout() <= 0.05
+    time.sleep(0.06)
+    assert coalescer.timeout() == 0
+    coalescer.flush()
+    assert port.Sent == [sysex(0x43, 0x75, 0x00, 0x18, 0x68, 0x09, 0x00), sysex(0x43, 0x75, 0x00, 0x18, 0x6B, 0x01, 0x00)]
+    assert coalescer.timeout() is None
+
+def test_forget_sends_a_known_value_again(port): # After a voice dump the FB-01 may hold something else
+    coalescer = fb01.SysexCoalescer(port, 0)
+    coalescer.send(param_change(0x68, 5))
+    coalescer.forget(0x18)
+    coalescer.send(param_change(0x68, 5))
+    assert len(port.Sent) == 2
+
+def test_handle_message_goes_through_the_coalescer(port):
+    fb01.Devices[0].Coalescer.Window = 0.05
+    for value in range(0, 128, 8):
+        fb01.handle_message(Message('control_change', control=32, value=value)) # Op1 TL
+    assert port.Sent == []
+    fb01.Devices[0].Coalescer.flush()
+    assert len(port.Sent) == 1
+    assert fb01.Voices[0].Op1.TL == 127 - 120
+
+def test_a_voice_change_sends_known_values_again(port):
+    for msg in (Message('control_change', control=32, value=100), Message('control_change', control=104, value=3),
+                Message('control_change', control=32, value=100)):
+        fb01.handle_message(msg)
+    assert [data[5] for data in port.Sent] == [0x68, 0x05, 0x68] # Op1 TL, Inst Voice, Op1 TL
+
+def test_a_windowed_voice_change_still_goes_out(port):
+    fb01.Devices[0].Coalescer.Window = 0.05
+    fb01.handle_message(Message('control_change', control=32, value=100))
+    fb01.handle_message(Message('control_change', control=104, value=3))
+    fb01.Devices[0].Coalescer.flush()
+    fb01.handle_message(Message('control_change', control=32, value=100))
+    fb01.Devices[0].Coalescer.flush()
+    assert [data[5] for data in port.Sent] == [0x68, 0x05, 0x68]
+
+def test_a_program_change_sends_known_values_again(port):
+    fb01.Devices[0].Coalescer.Window = 0.05
+    fb01.handle_message(Message('control_change', control=32, value=100))
+    fb01.handle_message(Message('program_change', program=7))
+    fb01.handle_message(Message('control_change', control=32, value=100))
+    fb01.Devices[0].Coalescer.flush()
+    assert port.Sent == [sysex(0x43, 0x75, 0x00, 0x18, 0x68, 0x0B, 0x01), bytes((0xC0, 7)),
+                         sysex(0x43, 0x75, 0x00, 0x18, 0x68, 0x0B, 0x01)]
@@ -0,0 +1,96 @@
+import io
+
+import mido
+from mido import Message, MetaMessage, MidiFile, MidiTrack
+
+import fb01_cc2sysex as fb01
+import fb01_convert
+
+def smf(*tracks): # Format 1 file from [(tick, message)] lists
+    midi = MidiFile(type=1, ticks_per_beat=96)
+    for events in tracks:
+        track = MidiTrack()
+        tick = 0
+        for when, msg in events:
+            track.append(msg.copy(time=when - tick))
+            tick = when
+        midi.tracks.append(track)
+    data = io.BytesIO()
+    midi.save(file=data)
+    return data.getvalue()
+
+def convert(data):
+    destination = io.BytesIO()
+    fb01_convert.convert_stream(io.BytesIO(data), destination)
+    destination.seek(0)
+    return MidiFile(file=destination)
+
+def absolute(track):
+    tick = 0
+    for msg in track:
+        tick += msg.time
+        yield tick, msg
+
+def test_sysex_replaces_the_cc_at_its_tick(port):
+    midi = convert(smf([(0, Message('note_on', note=60)), (48, Message('control_change', control=32, value=100)),
+                        (96, Message('note_off', note=60))]))
+    events = [(tick, msg.type) for tick, msg in absolute(midi.tracks[0])]
+    assert events == [(0, 'note_on'), (48, 'sysex'), (96, 'note_off'), (96, 'end_of_track')]
+
+def test_thru_ccs_and_meta_events_are_kept(port):
+    midi = convert(smf([(0, MetaMessage('set_tempo', tempo=400000)), (10, Message('control_change', control=7, value=90))]))
+    assert [msg.type for msg in midi.tracks[0]] == ['set_tempo', 'control_change', 'end_of_track']
+    assert midi.tracks[0][1].time == 10
+
+def test_tracks_are_translated_in_tick_order(port):
+    # CC 24 (Algorithm) and CC 25 (Feedback) share one sysex byte. Track 2's Feedback change at tick 100 has to be
+    # sent with the Algorithm of tick 0, not with the one track 1 only sets at tick 200.
+    first = [(0, Message('control_change', control=24, value=2)), (200, Message('control_change', control=24, value=6))]
+    second = [(100, Message('control_change', control=25, value=3))]
+    midi = convert(smf(first, second))
+
+    # What the live loop sends for the same performance
+    fb01.reset_state()
+    fb01.Devices[0].attach(port)
+    live = mido.merge_tracks(MidiFile(file=io.BytesIO(smf(first, second))).tracks)
+    for msg in live:
+        if not msg.is_meta:
+            fb01.handle_message(msg)
+    converted = sorted((tick, track, bytes(msg.bytes())) for track, events in enumerate(midi.tracks)
+                       for tick, msg in absolute(events) if msg.type == 'sysex')
+    assert [data for tick, track, data in converted] == port.Sent
+    assert [(tick, track) for tick, track, data in converted] == [(0, 0), (100, 1), (200, 0)]
+
+def test_an_8_bit_nrpn_pair_makes_one_sysex(port):
+    fb01.use_nrpn()
+    param = fb01.params['Voice.LFOSpeed']
+    midi = convert(smf([(0, Message('control_change', control=99, value=3)),
+                        (0, Message('control_change', control=98, value=1)),
+                        (10, Message('control_change', control=6, value=90)),
+                        (20, Message('control_change', control=38, value=64)),
+                        (30, Message('control_change', control=6, value=91)), (40, Message('note_on', note=60))]))
+    events = [(tick, bytes(msg.bytes())) for tick, msg in absolute(midi.tracks[0]) if msg.type == 'sysex']
+    assert events == [(20, bytes([0xF0, 0x43, 0x75, 0x00, 0x18, param.Address, 181 & 0x0F, 181 >> 4, 0xF7])),
+                      (30, bytes([0xF0, 0x43, 0x75, 0x00, 0x18, param.Address, 182 & 0x0F, 182 >> 4, 0xF7]))]
+
+def test_undo_steps_follow_the_song_time(port):
+    # 96 ticks per beat at 120 BPM: ticks 0 and 96 are half a second apart (one step), tick 384 starts a new one
+    algorithm = fb01.params['Voice.Algorithm']
+    midi = convert(smf([(0, Message('control_change', control=24, value=2)),
+                        (96, Message('control_change', control=24, value=4)),
+                        (384, Message('control_change', control=24, value=6)),
+                        (400, Message('control_change', control=12, value=127)),
+                        (410, Message('control_change', control=12, value=127))]))
+    values = [(tick, msg.data[5] & 0x07) for tick, msg in absolute(midi.tracks[0])
+              if msg.type == 'sysex' and msg.data[4] == algorithm.Address]
+    assert values == [(0, 2), (96, 4), (384, 6), (400, 4), (410, fb01.init_voice[algorithm.Address - 0x40] & 0x07)]
+
+def test_a_bad_status_byte_fails_only_that_file(port, tmp_path):
+    # Delta 0, F4 (undefined system common), then a well formed end of track
+    track = bytes([0x00, 0xF4, 0x00, 0xFF, 0x2F, 0x00])
+    source = tmp_path / "bad.mid"
+    source.write_bytes(b'MThd' + bytes([0, 0, 0, 6, 0, 0, 0, 1, 0, 96]) + b'MTrk' + len(track).to_bytes(4, 'big')
+                       + track)
+    stats, error, elapsed = fb01_convert.convert_job(str(source), str(tmp_path / "out.mid"), fb01.MAPPING)
+    assert stats is None
+    assert error == "unsupported status byte F4"
@@ -0,0 +1,20 @@
+import mido
+
+import fb01_cc2sysex as fb01
+
+def returned(msg): # What the return port callback queued for the main loop
+    fetcher = fb01.Devices[0].Fetcher
+    fetcher.on_return(msg)
+    received, source, reply = fb01.inbox.get_nowait()
+    assert source is None
+    assert reply.Fetcher is fetcher
+    return reply
+
+def test_voice_dumps_are_read_from_mido_and_raw_return_ports(port):
+    device = fb01.Devices[0]
+    device.Voices[2].set_byte(0x4C, 5) # Algorithm
+    data = bytes(fb01.voice_dump(device, 2).bytes())[1:-1]
+    for msg in (mido.Message('sysex', data=data), fb01.RawMessage(b'\xF0' + data + b'\xF7')):
+        reply = returned(msg)
+        assert (reply.Inst, reply.Valid) == (2, True)
+        assert reply.Image == device.Voices[2].dump().tobytes()
@@ -0,0 +1,66 @@
+import fb01_cc2sysex as fb01
+from conftest import cc, sysex
+
+AMD = fb01.params['Voice.AMD'].Address
+
+def amd(value): # Voice AMD parameter change for inst 1
+    return sysex(0x43, 0x75, 0x00, 0x18, AMD, value & 0x0F, value >> 4)
+
+def test_a_knob_turn_is_one_step(port):
+    fb01.History = fb01.EditHistory()
+    for value in (10, 20, 30):
+        cc(17, value)                       # Voice AMD
+    del port.Sent[:]
+    cc(12, 127)                             # Undo
+    assert port.Sent == [amd(0)]
+    cc(13, 127)                             # Redo
+    assert port.Sent == [amd(0), amd(30)]
+    assert fb01.Devices[0].Voices[0].get_byte(AMD) == 30
+
+def test_turning_the_same_knob_after_a_pause_is_a_new_step(port):
+    fb01.History = fb01.EditHistory()
+    cc(17, 10)
+    cc(17, 20)
+    fb01.History.LastTime -= fb01.STEP_GAP
+    cc(17, 40)
+    del port.Sent[:]
+    cc(12, 127)
+    cc(12, 127)
+    assert port.Sent == [amd(20), amd(0)]
+
+def test_other_knobs_are_other_steps(port):
+    fb01.History = fb01.EditHistory()
+    cc(17, 10)
+    cc(19, 10)                              # Voice PMD
+    del port.Sent[:]
+    cc(12, 127)
+    assert fb01.Devices[0].Voices[0].get_byte(AMD) == 10
+    assert len(port.Sent) == 1 and port.Sent[0] != amd(0)
+
+def test_undo_only_sends_the_bytes_that_differ(port):
+    fb01.History = fb01.EditHistory()
+    cc(17, 50)
+    cc(17, 0)                               # Back where the turn started
+    del port.Sent[:]
+    cc(12, 127)
+    assert port.Sent == []
+
+def test_a_step_covers_both_bytes_of_a_double_message_cc(port):
+    fb01.History = fb01.EditHistory()
+    voice = fb01.Devices[0].Voices[0]
+    before = bytes(voice.dump())
+    cc(39, 6)                               # Op1 Multi 1 and DT2 2, two parameter bytes
+    cc(39, 11)                              # Multi 2, DT2 2
+    del port.Sent[:]
+    cc(12, 127)
+    assert len(port.Sent) == 2
+    assert bytes(voice.dump()) == before
+
+def test_editing_after_an_undo_drops_the_redo(port):
+    fb01.History = fb01.EditHistory()
+    cc(17, 10)
+    cc(12, 127)
+    cc(19, 10)
+    del port.Sent[:]
+    cc(13, 127)
+    assert port.Sent == []
@@ -0,0 +1,14 @@
+import fb01_cc2sysex as fb01
+
+def test_summary_lines_count_each_record_once(capsys):
+    log = fb01.Logger(fb01.LOG_SUMMARY)
+    log.put(fb01.LOG_CC, 32, 100, b'')
+    log.put(fb01.LOG_CC, 32, 101, b'')
+    log.summary()
+    log.put(fb01.LOG_CC, 32, 102, b'')
+    log.put(fb01.LOG_UNMAPPED, 3)
+    log.summary()
+    log.summary()                           # Nothing new, no line
+    assert capsys.readouterr().out.splitlines() == [
+        "2 CCs translated (0 double), 0 NRPN, 0 passed through, 0 unmapped",
+        "1 CCs translated (0 double), 0 NRPN, 0 passed through, 1 unmapped"]
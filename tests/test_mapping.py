@@ -0,0 +1,60 @@
+import os
+
+import fb01_cc2sysex as fb01
+
+def tables():
+    return (list(fb01.cc_passthru), [None if binding is None else (binding.Param, binding.Lut) for binding in fb01.cc_map],
+            list(fb01.cc_actions))
+
+def test_cache_holds_json_and_gives_the_same_tables(tmp_path, monkeypatch):
+    monkeypatch.setattr(fb01, 'MAPPING_CACHE', str(tmp_path))
+    fb01.load_mapping()
+    compiled = tables()
+    [name] = os.listdir(tmp_path)
+    assert name.endswith(".json")
+    fb01.load_mapping()
+    assert tables() == compiled
+
+def test_a_broken_cache_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setattr(fb01, 'MAPPING_CACHE', str(tmp_path))
+    fb01.load_mapping()
+    compiled = tables()
+    [name] = os.listdir(tmp_path)
+    (tmp_path / name).write_text('[[true], [], []]')
+    fb01.load_mapping()
+    assert tables() == compiled
+
+def test_read_only_loads_leave_no_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(fb01, 'MAPPING_CACHE', str(tmp_path / "cache"))
+    fb01.load_mapping(write_cache=False)
+    assert not os.path.exists(tmp_path / "cache")
+
+def test_the_cache_key_covers_the_compiler(tmp_path, monkeypatch):
+    monkeypatch.setattr(fb01, 'MAPPING_CACHE', str(tmp_path))
+    fb01.load_mapping()
+    monkeypatch.setattr(fb01, 'COMPILER_HASH', b"another version of the script")
+    fb01.load_mapping()
+    assert len(os.listdir(tmp_path)) == 2
+
+def test_default_action_ccs():
+    fb01.load_mapping(write_cache=False)
+    names = [fb01.params[f'Config.Name{char}'] for char in (1, 2, 3, 4, 8)]
+    assert [fb01.cc_map[control].Param for control in (6, 8, 9, 11, 15)] == names
+    assert fb01.cc_actions[12] is fb01.undo_cc
+    assert fb01.cc_actions[13] is fb01.redo_cc
+    assert fb01.cc_actions[14] is fb01.sync_voice_cc
+    assert fb01.cc_actions[114] is fb01.send_voice_cc
+
+def test_library_actions_take_over_their_default_ccs():
+    fb01.load_mapping(write_cache=False)
+    fb01.use_library()
+    library = [fb01.save_voice_cc, fb01.recall_voice_cc, fb01.patch_page_cc]
+    assert [fb01.cc_actions[control] for control in (8, 9, 11)] == library
+    assert fb01.cc_map[8] is None
+
+def test_library_actions_of_the_mapping_are_kept(tmp_path):
+    mapping = tmp_path / "mapping.json"
+    mapping.write_text('{"thru": [], "cc": {"8": {"param": "Config.Name2"}, "20": {"action": "recall_voice"}}}')
+    fb01.load_mapping(str(mapping), write_cache=False)
+    fb01.use_library()
+    assert fb01.cc_map[8] is not None and fb01.cc_actions[9] is None
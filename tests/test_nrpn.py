@@ -0,0 +1,66 @@
+import fb01_cc2sysex as fb01
+from conftest import cc, sysex
+
+def nrpn(msb, lsb, channel=0):
+    cc(99, msb, channel)
+    cc(98, lsb, channel)
+
+def test_numbers_stay_put():
+    assert fb01.nrpn_names[(0 << 7) | 0] == 'System.Channel'
+    assert fb01.nrpn_names[(1 << 7) | 1] == 'Config.Name1'
+    assert fb01.nrpn_names[(2 << 7) | 10] == 'Inst.LFOEnable'
+    assert fb01.nrpn_names[(3 << 7) | 11] == 'Voice.Algorithm'
+    assert fb01.nrpn_names[(3 << 7) | 26] == 'Voice.Name7'
+    assert fb01.nrpn_names[(4 << 7) | 0] == 'Op1.TL'
+    assert fb01.nrpn_names[(7 << 7) | 16] == 'Op4.RR'
+    assert len(fb01.nrpn_names) == len(fb01.params)
+
+def test_data_entry_sets_the_selected_parameter(port):
+    fb01.use_nrpn()
+    nrpn(3, 11)                             # Voice Algorithm
+    cc(6, 5)
+    cc(6, 5)                                # Already set, nothing to send
+    nrpn(2, 10, channel=1)                  # Inst 2 LFO enable
+    cc(6, 0, channel=1)
+    assert port.Sent == [sysex(0x43, 0x75, 0x00, 0x18, 0x4C, 0x05, 0x00), sysex(0x43, 0x75, 0x00, 0x19, 0x0A, 0x00)]
+    assert fb01.Devices[0].Voices[0].get_byte(0x4C) & 0x07 == 5
+
+def test_data_lsb_adds_the_low_bit_of_8_bit_parameters(port):
+    fb01.use_nrpn()
+    param = fb01.params['Voice.LFOSpeed']
+    nrpn(3, 1)
+    cc(6, 90)
+    assert port.Sent == []                  # The MSB waits for its LSB
+    cc(38, 64)
+    assert port.Sent == [sysex(0x43, 0x75, 0x00, 0x18, param.Address, 181 & 0x0F, 181 >> 4)]
+
+def test_data_msb_alone_goes_out_when_the_hold_ends(port):
+    fb01.use_nrpn()
+    param = fb01.params['Voice.LFOSpeed']
+    nrpn(3, 1)
+    cc(6, 90)
+    assert 0 < fb01.Devices[0].Coalescer.timeout() <= fb01.Devices[0].Coalescer.Hold
+    fb01.Devices[0].Coalescer.flush()
+    assert port.Sent == [sysex(0x43, 0x75, 0x00, 0x18, param.Address, 180 & 0x0F, 180 >> 4)]
+
+def test_increment_decrement_and_rpn(port):
+    fb01.use_nrpn()
+    nrpn(3, 11)
+    cc(96, 0)
+    cc(96, 0)
+    cc(97, 0)
+    cc(101, 0)                              # RPN 0, pitch bend sensitivity
+    cc(100, 0)
+    cc(6, 12)
+    bend = fb01.params['Inst.BendRange']
+    assert port.Sent == [sysex(0x43, 0x75, 0x00, 0x18, 0x4C, 0x01, 0x00), sysex(0x43, 0x75, 0x00, 0x18, 0x4C, 0x02, 0x00),
+                         sysex(0x43, 0x75, 0x00, 0x18, 0x4C, 0x01, 0x00),
+                         sysex(0x43, 0x75, 0x00, 0x18, bend.Address, 12 << bend.Shift)]
+
+def test_numbers_without_a_parameter_do_nothing(port):
+    fb01.use_nrpn()
+    nrpn(3, 127)
+    cc(6, 10)
+    nrpn(8, 0)
+    cc(6, 10)
+    assert port.Sent == []
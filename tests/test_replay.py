@@ -0,0 +1,32 @@
+import fb01_cc2sysex as fb01
+import fb01_replay
+
+AMD = fb01.params['Voice.AMD'].Address
+
+def header(**options):
+    fb01.load_mapping(write_cache=False)
+    settings = {'mapping': fb01.MappingHash, 'mapping_file': fb01.MAPPING, 'nrpn': False, 'history': 4096,
+                'library': None, 'send_voices': False, 'fetch_voices': False, 'remaps': [],
+                'devices': [{'name': "FB-01", 'translate': True, 'system': 0, 'channels': list(range(16))}]}
+    settings.update(options)
+    return settings
+
+def cc(stamp, control, value, source=0):
+    return (stamp, fb01.JOURNAL_IN, source, bytes((0xB0, control, value)))
+
+def amd_values(sent):
+    return [data[6] | (data[7] << 4) for source, data in sent if data[0] == 0xF0 and data[5] == AMD]
+
+def test_undo_steps_follow_the_journal_times(port):
+    # Two turns of the same knob, two seconds apart: undo only takes back the second one
+    records = [cc(0.0, 17, 10), cc(0.5, 17, 20), cc(2.5, 17, 40), cc(2.6, 12, 127)]
+    sent, count, elapsed, warnings = fb01_replay.replay(header(), records, 0, False)
+    assert count == 4
+    assert amd_values(sent) == [10, 20, 40, 20]
+
+def test_each_input_is_remapped_as_it_was_live(port):
+    remap = list(range(128))
+    remap[20] = 17
+    records = [cc(0.0, 20, 30, source=1), cc(0.1, 20, 30, source=0)]
+    sent, count, elapsed, warnings = fb01_replay.replay(header(remaps=[None, remap]), records, 0, False)
+    assert amd_values(sent) == [30]
@@ -0,0 +1,70 @@
+import mido
+
+import fb01_cc2sysex as fb01
+from conftest import cc
+
+def test_an_unknown_voice_is_sent_as_a_dump(port):
+    assert fb01.sync_voice(fb01.Devices[0], 0) == fb01.VOICE_DUMP_BYTES
+    assert [len(data) for data in port.Sent] == [fb01.VOICE_DUMP_BYTES]
+    assert fb01.Devices[0].Known[0]
+
+def test_only_the_differing_bytes_are_sent(port):
+    device = fb01.Devices[0]
+    fb01.sync_voice(device, 0)
+    del port.Sent[:]
+    voice = device.Voices[0]
+    for address in (0x49, 0x4C, 0x50): # As a patch recall would change them, without sending anything
+        voice.set_byte(address, voice.get_byte(address) ^ 0x01)
+    cc(14, 127)                         # sync_voice
+    assert port.Sent == [bytes(fb01.make_sysex([0x43, 0x75, 0x00, 0x18, address, voice.get_byte(address) & 0x0F,
+                                                voice.get_byte(address) >> 4]).bytes()) for address in (0x49, 0x4C, 0x50)]
+    del port.Sent[:]
+    cc(14, 127)                         # The FB-01 is believed to be up to date now
+    assert port.Sent == []
+
+def test_sent_parameter_changes_count_as_known(port):
+    device = fb01.Devices[0]
+    fb01.sync_voice(device, 0)
+    cc(17, 40)                          # Voice AMD, sent as a parameter change
+    del port.Sent[:]
+    fb01.sync_voice(device, 0)
+    assert port.Sent == []
+
+def test_many_differences_are_sent_as_a_dump(port):
+    device = fb01.Devices[0]
+    fb01.sync_voice(device, 0)
+    del port.Sent[:]
+    voice = device.Voices[0]
+    for address in range(0x40, 0x40 + fb01.VOICE_DUMP_BYTES // fb01.PARAM_CHANGE_BYTES + 1):
+        voice.set_byte(address, voice.get_byte(address) ^ 0x01)
+    fb01.sync_voice(device, 0)
+    assert [len(data) for data in port.Sent] == [fb01.VOICE_DUMP_BYTES]
+
+def test_a_fetched_voice_is_known(port):
+    device = fb01.Devices[0]
+    image = device.Voices[3].dump().tobytes()
+    device.Fetcher.receive(fb01.VoiceReply(3, image, True))
+    assert device.Known[3]
+    device.Voices[3].set_byte(0x4C, device.Voices[3].get_byte(0x4C) ^ 0x01)
+    del port.Sent[:]
+    fb01.sync_voice(device, 3)
+    assert [len(data) for data in port.Sent] == [fb01.PARAM_CHANGE_BYTES]
+
+def test_a_voice_change_makes_the_voice_unknown(port):
+    device = fb01.Devices[0]
+    fb01.sync_voice(device, 0)
+    cc(104, 5)                          # Inst Voice
+    assert not device.Known[0]
+    fb01.sync_voice(device, 0)
+    fb01.handle_message(mido.Message('program_change', program=9))
+    fb01.sync_voice(device, 0)
+    assert [len(data) for data in port.Sent] == [fb01.VOICE_DUMP_BYTES, 8, fb01.VOICE_DUMP_BYTES, 2,
+                                                 fb01.VOICE_DUMP_BYTES]
+
+def test_unused_bytes_are_only_sent_in_a_dump(port):
+    device = fb01.Devices[0]
+    fb01.sync_voice(device, 0)
+    del port.Sent[:]
+    device.Voices[0].set_byte(0x7C, 5)
+    fb01.sync_voice(device, 0)
+    assert [len(data) for data in port.Sent] == [fb01.VOICE_DUMP_BYTES]
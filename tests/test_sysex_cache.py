@@ -0,0 +1,28 @@
+import fb01_cc2sysex as fb01
+from conftest import cc, sysex
+
+def test_narrow_fields_use_the_prebuilt_messages(port):
+    # CC 109 (Inst LFO enable) is a one bit field with its byte to itself
+    binding = fb01.cc_map[109]
+    assert binding.Cache is not None
+    cc(109, 127)
+    cc(109, 0)
+    cc(109, 127, channel=1)
+    assert port.Sent == [sysex(0x43, 0x75, 0x00, 0x18, 0x0A, 0x01), sysex(0x43, 0x75, 0x00, 0x18, 0x0A, 0x00),
+                         sysex(0x43, 0x75, 0x00, 0x19, 0x0A, 0x01)]
+    assert binding.Cache[(0 << 8) | 1][1].bytes() == list(port.Sent[0])
+    assert fb01.Devices[0].Insts[0].get_byte(0x0A) == 0
+    assert fb01.Devices[0].Insts[1].get_byte(0x0A) == 1
+
+def test_bits_outside_the_field_are_kept(port):
+    fb01.Devices[0].Insts[0].set_byte(0x0A, 0x02)
+    cc(109, 127)
+    cc(109, 0)
+    assert port.Sent == [sysex(0x43, 0x75, 0x00, 0x18, 0x0A, 0x03), sysex(0x43, 0x75, 0x00, 0x18, 0x0A, 0x02)]
+
+def test_prebuilt_messages_follow_the_system_channel(port):
+    cc(109, 127)
+    fb01.Devices[0].System.Channel = 3
+    cc(109, 0)
+    cc(109, 127)
+    assert port.Sent[1:] == [sysex(0x43, 0x75, 0x03, 0x18, 0x0A, 0x00), sysex(0x43, 0x75, 0x03, 0x18, 0x0A, 0x01)]